@@ -2,22 +2,34 @@
 基础测试类
 所有测试类应该继承此类
 """
+import time
 import pytest
-import uiautomator2 as u2
 import logging
-from typing import Optional
+from typing import TYPE_CHECKING, Optional, List, Tuple, Dict, Any, Union
 from datetime import datetime
 
-from utils.helpers import wait_for, retry
-from utils.logger import setup_logger
+from config.config import Config
+from utils.adaptive_timeout import get_adaptive_timeouts
+from utils.helpers import poll_until, BackoffPolicy
+from utils.hierarchy import HierarchySnapshot, UiNode
+from utils.screenshot import get_screenshot_pipeline
+from utils.metrics import timed, device_serial
+from utils.batch import ActionBatch
+from utils.gestures import GestureEngine
+from utils.step_recorder import get_active_recorder
+from utils.logger import LOGGER_NAME
 
-logger = setup_logger()
+if TYPE_CHECKING:
+    import uiautomator2 as u2
+
+# 处理器在 device fixture 首次使用时由 setup_logger() 添加，导入本模块不创建日志文件
+logger = logging.getLogger(LOGGER_NAME)
 
 
 class BaseTest:
     """测试基类"""
 
-    def __init__(self, device: Optional[u2.Device] = None):
+    def __init__(self, device: Optional["u2.Device"] = None):
         """
         初始化测试类
 
@@ -26,6 +38,9 @@ class BaseTest:
         """
         self.device = device
         self.logger = logger
+        self.poll_policy = BackoffPolicy()
+        self.gestures = GestureEngine(device, on_action=self._ui_changed)
+        self.timeouts = get_adaptive_timeouts()
     
     def setup_method(self):
         """每个测试方法执行前的设置"""
@@ -35,15 +50,19 @@ class BaseTest:
         """每个测试方法执行后的清理"""
         self.logger.info(f"测试完成: {self.__class__.__name__}")
     
+    @timed()
     def take_screenshot(self, name: Optional[str] = None) -> str:
         """
         截图
         
+        测试线程只抓取图像，编码和写盘由后台截图流水线完成，会话结束时统一写完；
+        启用去重时近似重复的截图由索引映射到已有文件，需要实际文件时调用流水线的 resolve()
+        
         Args:
             name: 截图文件名（不含扩展名）
         
         Returns:
-            截图文件路径
+            请求的截图文件路径
         """
         import os
         
@@ -52,17 +71,112 @@ class BaseTest:
             name = f"screenshot_{timestamp}"
         
         screenshot_dir = "screenshots"
-        os.makedirs(screenshot_dir, exist_ok=True)
-        
         screenshot_path = os.path.join(screenshot_dir, f"{name}.png")
-        self.device.screenshot(screenshot_path)
-        self.logger.info(f"截图已保存: {screenshot_path}")
+        get_screenshot_pipeline().capture(self.device, screenshot_path)
+        self.logger.info(f"截图已提交: {screenshot_path}")
         return screenshot_path
     
+    def _ui_changed(self):
+        """
+        界面可能已被操作改变
+        
+        点击、输入、滑动、按键之后调用，子类可据此让缓存失效；
+        启用失败步骤回放时登记一帧截图（后台抓取，不阻塞）
+        """
+        recorder = get_active_recorder()
+        if recorder is not None:
+            recorder.capture()
+    
+    def _wait_timeout(self, operation: str, timeout: Optional[float], default: float) -> float:
+        """
+        确定等待的超时时间
+        
+        显式传入的超时原样使用；为 None 时按当前设备该类操作的历史耗时取自适应超时，
+        样本不足时为 default
+        
+        Args:
+            operation: 操作类型
+            timeout: 调用方给出的超时
+            default: Config 中对应的超时
+        
+        Returns:
+            超时时间（秒）
+        """
+        if timeout is not None:
+            return timeout
+        return self.timeouts.timeout(operation, default, device_serial(self.device))
+    
+    def _wait_finished(self, operation: str, result):
+        """
+        把等待结果计入自适应超时统计：轮询多次才成功的记录耗时，失败只计数
+        
+        第一次检查就成功的等待（元素早已在界面上）耗时接近 0，计入会把超时压得过低
+        """
+        if not result:
+            self.timeouts.record_timeout()
+        elif result.polls > 1:
+            self.timeouts.record(operation, result.elapsed, device_serial(self.device))
+    
+    def snapshot(self) -> HierarchySnapshot:
+        """
+        抓取当前界面层级快照
+
+        一次 dump_hierarchy() 调用，可在本地对任意数量的选择器求值
+
+        Returns:
+            HierarchySnapshot 对象
+        """
+        snapshot = HierarchySnapshot.capture(self.device)
+        self.gestures.observe_rotation(snapshot.rotation)
+        return snapshot
+    
+    def _locate(self, selector: dict) -> Optional[UiNode]:
+        """抓取一次层级快照并查找元素，find_element 每次轮询调用一次"""
+        return self.snapshot().find(selector)
+    
+    def find_element(
+        self,
+        selector: dict,
+        timeout: Optional[float] = None,
+        raise_exception: bool = True
+    ) -> Optional[UiNode]:
+        """
+        等待元素出现并返回其节点信息
+        
+        每次轮询只抓取一次层级快照
+        
+        Args:
+            selector: 元素选择器字典
+            timeout: 超时时间，None 表示按设备历史耗时自适应（不超过 IMPLICIT_WAIT 的倍数）
+            raise_exception: 超时时是否抛出异常
+        
+        Returns:
+            匹配的 UiNode，超时返回 None
+        """
+        timeout = self._wait_timeout("find_element", timeout, Config.IMPLICIT_WAIT)
+        result = poll_until(
+            lambda: self._locate(selector),
+            timeout=timeout,
+            policy=self.poll_policy
+        )
+        self._wait_finished("find_element", result)
+        
+        if not result:
+            self.logger.warning(f"等待元素超时: {selector} (超时: {timeout}秒, 检查次数: {result.polls})")
+            if raise_exception:
+                raise TimeoutError(f"元素未出现: {selector}")
+            return None
+        
+        self.logger.debug(
+            f"元素出现: {selector} (检查次数: {result.polls}, 耗时: {result.elapsed:.3f}秒)"
+        )
+        return result.value
+    
+    @timed()
     def wait_for_element(
         self,
         selector: dict,
-        timeout: float = 10.0,
+        timeout: Optional[float] = None,
         raise_exception: bool = True
     ) -> bool:
         """
@@ -70,110 +184,344 @@ class BaseTest:
         
         Args:
             selector: 元素选择器字典
-            timeout: 超时时间
+            timeout: 超时时间，None 表示自适应
             raise_exception: 超时时是否抛出异常
         
         Returns:
             True 如果元素出现，否则 False
         """
-        def check_element():
-            return self.device(**selector).exists
+        return self.find_element(selector, timeout, raise_exception) is not None
+    
+    @timed()
+    def wait_for_ui_idle(
+        self,
+        stable_for: float = 0.5,
+        timeout: float = 5.0,
+        use_screenshot: bool = False,
+        raise_exception: bool = False
+    ) -> bool:
+        """
+        等待界面稳定
         
-        result = wait_for(
-            check_element,
-            timeout=timeout,
-            error_message=f"等待元素超时: {selector}"
+        连续抓取层级快照比较指纹，界面在 stable_for 秒内没有变化即返回，
+        用于代替启动应用、滑动、按键之后的固定 sleep
+        
+        Args:
+            stable_for: 界面需要保持不变的时长（秒）
+            timeout: 超时时间
+            use_screenshot: 是否同时比较缩小截图的感知哈希，可发现层级不变的动画和图片加载
+            raise_exception: 超时时是否抛出异常
+        
+        Returns:
+            True 如果界面已稳定，超时返回 False
+        """
+        state = {"signature": None, "since": 0.0}
+        policy = BackoffPolicy(
+            initial=self.poll_policy.initial,
+            factor=self.poll_policy.factor,
+            maximum=min(self.poll_policy.maximum, max(stable_for / 2, 0.01)),
+            jitter=self.poll_policy.jitter,
         )
         
-        if not result and raise_exception:
-            raise TimeoutError(f"元素未出现: {selector}")
+        if use_screenshot:
+            # 依赖 numpy，只在需要比较截图时导入
+            from utils.screenshot_store import perceptual_hash
         
-        return result
+        def settled():
+            signature = self.snapshot().fingerprint
+            if use_screenshot:
+                signature += perceptual_hash(self.device.screenshot(), hash_size=8).tobytes().hex()
+            now = time.monotonic()
+            if signature != state["signature"]:
+                state["signature"], state["since"] = signature, now
+                return False
+            return now - state["since"] >= stable_for
+        
+        result = poll_until(settled, timeout=timeout, policy=policy)
+        if not result:
+            self.logger.warning(f"界面在 {timeout} 秒内未稳定 (检查次数: {result.polls})")
+            if raise_exception:
+                raise TimeoutError(f"界面未稳定: {timeout} 秒")
+            return False
+        
+        self.logger.debug(f"界面已稳定 (检查次数: {result.polls}, 耗时: {result.elapsed:.3f}秒)")
+        return True
     
-    def click_element(self, selector: dict, timeout: float = 10.0):
+    @staticmethod
+    def _candidates(selectors: Union[Dict[Any, dict], List[dict]]) -> List[Tuple[Any, dict]]:
+        """把名称 -> 选择器字典或选择器列表统一为 (键, 选择器) 列表，列表的键为下标"""
+        if isinstance(selectors, dict):
+            return list(selectors.items())
+        return list(enumerate(selectors))
+    
+    @timed()
+    def wait_any(
+        self,
+        selectors: Union[Dict[Any, dict], List[dict]],
+        timeout: Optional[float] = None,
+        raise_exception: bool = False
+    ) -> Optional[Any]:
+        """
+        等待多个元素中的任意一个出现
+        
+        每次轮询在同一份层级快照上检查所有候选，整体最多等待一个 timeout，
+        适合页面加载判断和多语言文本等场景
+        
+        Args:
+            selectors: 名称 -> 元素选择器字典，或选择器列表
+            timeout: 超时时间，None 表示按设备历史耗时自适应（不超过 EXPLICIT_WAIT 的倍数）
+            raise_exception: 超时时是否抛出异常
+        
+        Returns:
+            第一个出现的候选的键（列表时为下标）；同一次检查中多个出现时按给定顺序取第一个；
+            超时返回 None
+        """
+        candidates = self._candidates(selectors)
+        
+        def first_present():
+            snapshot = self.snapshot()
+            for key, selector in candidates:
+                if snapshot.exists(selector):
+                    return key, selector
+            return None
+        
+        timeout = self._wait_timeout("wait_any", timeout, Config.EXPLICIT_WAIT)
+        result = poll_until(first_present, timeout=timeout, policy=self.poll_policy)
+        self._wait_finished("wait_any", result)
+        if not result:
+            self.logger.warning(f"等待任一元素超时: {selectors} (超时: {timeout}秒, 检查次数: {result.polls})")
+            if raise_exception:
+                raise TimeoutError(f"元素均未出现: {selectors}")
+            return None
+        
+        key, selector = result.value
+        self.logger.debug(f"元素出现: {selector} (检查次数: {result.polls}, 耗时: {result.elapsed:.3f}秒)")
+        return key
+    
+    @timed()
+    def wait_all(
+        self,
+        selectors: Union[Dict[Any, dict], List[dict]],
+        timeout: Optional[float] = None,
+        raise_exception: bool = False
+    ) -> bool:
+        """
+        等待多个元素全部出现
+        
+        每次轮询在同一份层级快照上检查所有候选，整体最多等待一个 timeout
+        
+        Args:
+            selectors: 名称 -> 元素选择器字典，或选择器列表
+            timeout: 超时时间，None 表示按设备历史耗时自适应（不超过 EXPLICIT_WAIT 的倍数）
+            raise_exception: 超时时是否抛出异常
+        
+        Returns:
+            True 如果在同一份快照中全部出现，否则 False
+        """
+        candidates = self._candidates(selectors)
+        missing: List[Any] = [key for key, _ in candidates]
+        
+        def all_present():
+            snapshot = self.snapshot()
+            missing[:] = [key for key, selector in candidates if not snapshot.exists(selector)]
+            return not missing
+        
+        timeout = self._wait_timeout("wait_all", timeout, Config.EXPLICIT_WAIT)
+        result = poll_until(all_present, timeout=timeout, policy=self.poll_policy)
+        self._wait_finished("wait_all", result)
+        if not result:
+            self.logger.warning(f"等待全部元素超时，未出现: {missing} (超时: {timeout}秒, 检查次数: {result.polls})")
+            if raise_exception:
+                raise TimeoutError(f"元素未全部出现，缺少: {missing}")
+            return False
+        return True
+    
+    @timed()
+    def click_element(self, selector: dict, timeout: Optional[float] = None):
         """
         点击元素
         
+        直接点击快照中元素的中心坐标，不再重复查找元素
+        
         Args:
             selector: 元素选择器字典
-            timeout: 等待元素出现的超时时间
+            timeout: 等待元素出现的超时时间，None 表示自适应
         """
-        self.wait_for_element(selector, timeout)
-        self.device(**selector).click()
+        node = self.find_element(selector, timeout)
+        self.device.click(*node.center)
+        self._ui_changed()
         self.logger.info(f"点击元素: {selector}")
     
-    def input_text(self, selector: dict, text: str, timeout: float = 10.0, clear: bool = True):
+    @timed()
+    def input_text(self, selector: dict, text: str, timeout: Optional[float] = None, clear: bool = True):
         """
         输入文本
         
+        点击快照中元素的中心获取焦点后输入，不再重复查找元素
+        
         Args:
             selector: 元素选择器字典
             text: 要输入的文本
-            timeout: 等待元素出现的超时时间
+            timeout: 等待元素出现的超时时间，None 表示自适应
             clear: 是否先清空输入框
         """
-        self.wait_for_element(selector, timeout)
-        element = self.device(**selector)
-        
-        if clear:
-            element.clear_text()
-        
-        element.set_text(text)
+        node = self.find_element(selector, timeout)
+        self.device.click(*node.center)
+        self.device.send_keys(text, clear=clear)
+        self._ui_changed()
         self.logger.info(f"输入文本到元素 {selector}: {text}")
     
-    def get_text(self, selector: dict, timeout: float = 10.0) -> str:
+    @timed()
+    def get_text(self, selector: dict, timeout: Optional[float] = None) -> str:
         """
         获取元素文本
         
         Args:
             selector: 元素选择器字典
-            timeout: 等待元素出现的超时时间
+            timeout: 等待元素出现的超时时间，None 表示自适应
         
         Returns:
             元素文本内容
         """
-        self.wait_for_element(selector, timeout)
-        text = self.device(**selector).get_text()
+        text = self.find_element(selector, timeout).text
         self.logger.info(f"获取元素文本 {selector}: {text}")
         return text
     
-    def swipe(self, direction: str, distance: float = 0.5):
+    def count_elements(self, selector: dict) -> int:
         """
-        滑动屏幕
+        获取当前界面匹配元素的数量
         
         Args:
-            direction: 滑动方向 ('up', 'down', 'left', 'right')
-            distance: 滑动距离比例 (0.0-1.0)
-        """
-        width, height = self.device.window_size()
-        
-        if direction == "up":
-            self.device.swipe(width // 2, int(height * (1 - distance / 2)),
-                            width // 2, int(height * distance / 2), duration=0.5)
-        elif direction == "down":
-            self.device.swipe(width // 2, int(height * distance / 2),
-                            width // 2, int(height * (1 - distance / 2)), duration=0.5)
-        elif direction == "left":
-            self.device.swipe(int(width * (1 - distance / 2)), height // 2,
-                            int(width * distance / 2), height // 2, duration=0.5)
-        elif direction == "right":
-            self.device.swipe(int(width * distance / 2), height // 2,
-                            int(width * (1 - distance / 2)), height // 2, duration=0.5)
+            selector: 元素选择器字典
+        
+        Returns:
+            匹配元素数量
+        """
+        return self.snapshot().count(selector)
+    
+    def get_texts(self, selector: dict) -> List[str]:
+        """
+        批量获取当前界面所有匹配元素的文本（一次 RPC）
+        
+        Args:
+            selector: 元素选择器字典
+        
+        Returns:
+            文本列表，按界面顺序排列
+        """
+        return self.snapshot().texts(selector)
+    
+    def get_bounds(self, selector: dict) -> List[Tuple[int, int, int, int]]:
+        """
+        批量获取当前界面所有匹配元素的坐标范围（一次 RPC）
+        
+        Args:
+            selector: 元素选择器字典
+        
+        Returns:
+            (left, top, right, bottom) 列表
+        """
+        return self.snapshot().bounds(selector)
+    
+    def batch(self, timeout: Optional[float] = None, stop_on_error: bool = True) -> ActionBatch:
+        """
+        创建批量操作脚本
+        
+        在 with 块中收集点击、输入、按键、滑动等步骤，退出时一次性执行：
+        选择器从同一份层级快照解析，坐标操作连续下发；执行完后才让页面缓存失效并记录步骤截图
+        
+        Args:
+            timeout: 等待选择器出现的超时时间，None 表示与 find_element 相同的自适应超时
+            stop_on_error: 某一步失败后是否跳过剩余步骤
+        
+        Returns:
+            ActionBatch 对象，执行后通过 results 获取每一步的结果和耗时
+        """
+        return ActionBatch(
+            self.device,
+            timeout=self._wait_timeout("find_element", timeout, Config.IMPLICIT_WAIT),
+            stop_on_error=stop_on_error,
+            policy=self.poll_policy,
+            on_done=self._ui_changed
+        )
+    
+    @timed()
+    def swipe(
+        self,
+        direction: str,
+        distance: float = 0.5,
+        duration: float = 0.5,
+        selector: Optional[dict] = None
+    ):
+        """
+        滑动屏幕或元素
         
+        屏幕尺寸和轨迹由手势引擎缓存，屏幕旋转后自动刷新
+        
+        Args:
+            direction: 滑动方向 ('up', 'down', 'left', 'right')
+            distance: 滑动距离占屏幕（或元素）边长的比例 (0.0-1.0)
+            duration: 持续时间（秒）
+            selector: 在该元素范围内滑动，默认整个屏幕
+        """
+        box = self.find_element(selector).bounds if selector else None
+        self.gestures.swipe(direction, distance, duration=duration, box=box)
         self.logger.info(f"滑动方向: {direction}")
     
+    @timed()
+    def pinch(self, scale: float, selector: Optional[dict] = None, steps: int = 20):
+        """
+        双指缩放屏幕或元素
+        
+        Args:
+            scale: 结束与起始手指间距之比，小于 1 为捏合，大于 1 为放大
+            selector: 以该元素中心为缩放中心，默认屏幕中心
+            steps: 注入步数
+        """
+        if selector:
+            node = self.find_element(selector)
+            left, top, right, bottom = node.bounds
+            self.gestures.pinch(
+                scale,
+                center=node.center,
+                radius=min(right - left, bottom - top) / 2,
+                steps=steps,
+                selector=selector
+            )
+        else:
+            self.gestures.pinch(scale, steps=steps)
+        self.logger.info(f"缩放比例: {scale}")
+    
+    @timed()
+    def set_orientation(self, orientation: str):
+        """
+        旋转屏幕，之后的整屏手势使用新的屏幕尺寸
+        
+        Args:
+            orientation: 'natural'、'left'、'right' 或 'upsidedown'
+        """
+        self.gestures.set_orientation(orientation)
+        self._ui_changed()
+        self.logger.info(f"屏幕方向: {orientation}")
+    
+    @timed()
     def press_back(self):
         """按返回键"""
         self.device.press("back")
+        self._ui_changed()
         self.logger.info("按下返回键")
     
+    @timed()
     def press_home(self):
         """按 Home 键"""
         self.device.press("home")
+        self._ui_changed()
         self.logger.info("按下 Home 键")
     
+    @timed()
     def press_recent(self):
         """按最近任务键"""
         self.device.press("recent")
+        self._ui_changed()
         self.logger.info("按下最近任务键")
 
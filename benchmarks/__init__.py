@@ -0,0 +1,3 @@
+"""
+框架开销基准测试
+"""
@@ -0,0 +1,219 @@
+"""
+框架自身开销基准测试
+使用 FakeDevice 代替真机，测量 BaseTest、页面对象、DeviceManager 和 wait_for 的主机侧耗时，
+结果写入 JSON 文件，可与基线比较以在 CI 中发现回归
+
+用法::
+
+    python -m benchmarks.bench_framework --output reports/benchmark.json
+    python -m benchmarks.bench_framework --baseline benchmarks/baseline.json --max-regression 0.3
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Callable, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from base.base_test import BaseTest
+from page_objects.home_page import HomePage
+from utils.device_manager import DeviceManager
+from utils.fake_device import FakeDevice
+from utils.helpers import wait_for
+from utils.hierarchy import HierarchySnapshot
+from utils.metrics import get_metrics_registry
+
+# 低于该绝对差值（毫秒）的变化视为噪声，不判定为回归
+NOISE_FLOOR_MS = 0.05
+
+TITLE = {"resourceId": "android:id/title", "text": "显示"}
+SEARCH_BOX = HomePage.SEARCH_BOX
+
+
+def _percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def measure(
+    func: Callable[[], Any],
+    device: FakeDevice,
+    iterations: int,
+    warmup: int = 3
+) -> Dict[str, Any]:
+    """
+    重复执行一个操作并统计耗时
+
+    主机侧开销 = 实际耗时 - RPC 次数 × 注入延迟
+
+    Args:
+        func: 被测操作
+        device: 被测操作使用的设备替身
+        iterations: 计时的执行次数
+        warmup: 预热次数，不计入结果
+
+    Returns:
+        每次执行的耗时统计（毫秒）和平均 RPC 次数
+    """
+    for _ in range(warmup):
+        func()
+    device.reset_counters()
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000.0)
+
+    rpc_per_call = device.rpc_total / iterations
+    injected_ms = sum(
+        count * device.latencies.get(name, device.latency) for name, count in device.rpc_counts.items()
+    ) * 1000.0 / iterations
+    mean_ms = sum(samples) / iterations
+    return {
+        "iterations": iterations,
+        "rpc_per_call": round(rpc_per_call, 3),
+        "mean_ms": round(mean_ms, 4),
+        "p50_ms": round(_percentile(samples, 50), 4),
+        "p95_ms": round(_percentile(samples, 95), 4),
+        "max_ms": round(max(samples), 4),
+        "overhead_ms": round(max(0.0, mean_ms - injected_ms), 4),
+    }
+
+
+def build_cases(latency: float) -> List[Tuple[str, FakeDevice, Callable[[], Any]]]:
+    """
+    构造所有基准用例
+
+    Args:
+        latency: 每次 RPC 注入的延迟（秒）
+
+    Returns:
+        (名称, 设备替身, 被测操作) 列表
+    """
+    device = FakeDevice(latency=latency)
+    base = BaseTest(device)
+    home = HomePage(device)
+
+    manager_device = FakeDevice(latency=latency)
+    manager = DeviceManager({"serial": manager_device.serial}, connect_func=lambda serial: manager_device)
+    manager.connect()
+
+    return [
+        ("hierarchy.parse", device, lambda: HierarchySnapshot(device.hierarchy).find(TITLE)),
+        ("helpers.wait_for", device, lambda: wait_for(lambda: True, timeout=1.0)),
+        ("base.find_element", device, lambda: base.find_element(TITLE, timeout=1.0)),
+        ("base.click_element", device, lambda: base.click_element(TITLE, timeout=1.0)),
+        ("base.get_text", device, lambda: base.get_text(TITLE, timeout=1.0)),
+        ("base.input_text", device, lambda: base.input_text(SEARCH_BOX, "abc", timeout=1.0)),
+        ("base.get_texts", device, lambda: base.get_texts({"resourceId": "android:id/title"})),
+        ("base.swipe", device, lambda: base.swipe("up")),
+        ("base.press_back", device, base.press_back),
+        ("page.check_elements", device, lambda: home.check_elements({
+            "search": HomePage.SEARCH_BOX, "menu": HomePage.MENU_BUTTON, "settings": HomePage.SETTINGS_BUTTON,
+        })),
+        ("page.is_page_loaded", device, lambda: home.is_page_loaded(timeout=1.0)),
+        ("page.search", device, lambda: home.search("abc")),
+        ("manager.is_connected", manager_device, manager.is_connected),
+        ("manager.get_device_info", manager_device, manager.get_device_info),
+    ]
+
+
+def run_benchmarks(iterations: int = 200, latency: float = 0.0, only: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    执行基准测试
+
+    Args:
+        iterations: 每个用例的执行次数
+        latency: 每次 RPC 注入的延迟（秒）
+        only: 只执行名称以这些前缀开头的用例
+
+    Returns:
+        包含运行环境和各用例统计的结果字典
+    """
+    results = {}
+    for name, device, func in build_cases(latency):
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        results[name] = measure(func, device, iterations)
+    # 基准测试的操作不应计入测试报告的耗时统计
+    get_metrics_registry().reset()
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": iterations,
+            "latency_ms": latency * 1000.0,
+        },
+        "benchmarks": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float = 0.3) -> List[str]:
+    """
+    与基线比较主机侧开销
+
+    Args:
+        current: 本次结果
+        baseline: 基线结果
+        max_regression: 允许的相对增长比例
+
+    Returns:
+        回归描述列表，为空表示没有回归
+    """
+    regressions = []
+    for name, result in current["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base:
+            continue
+        before, after = base["overhead_ms"], result["overhead_ms"]
+        if after - before > NOISE_FLOOR_MS and after > before * (1 + max_regression):
+            regressions.append(f"{name}: {before:.4f}ms -> {after:.4f}ms")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="框架开销基准测试")
+    parser.add_argument("--iterations", type=int, default=200, help="每个用例的执行次数")
+    parser.add_argument("--latency", type=float, default=0.0, help="每次 RPC 注入的延迟（毫秒）")
+    parser.add_argument("--output", default="reports/benchmark.json", help="结果文件路径")
+    parser.add_argument("--baseline", help="基线结果文件，给出时与之比较")
+    parser.add_argument("--max-regression", type=float, default=0.3, help="允许的相对增长比例")
+    parser.add_argument("--only", nargs="*", help="只执行名称以这些前缀开头的用例")
+    args = parser.parse_args(argv)
+
+    # 日志输出会淹没结果，只保留警告
+    logging.getLogger("uiautomator2_test").setLevel(logging.WARNING)
+
+    report = run_benchmarks(args.iterations, args.latency / 1000.0, args.only)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    for name, result in report["benchmarks"].items():
+        print(f"{name:28s} overhead {result['overhead_ms']:9.4f}ms  "
+              f"p95 {result['p95_ms']:9.4f}ms  rpc {result['rpc_per_call']:.1f}")
+    print(f"结果已写入: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("latency_ms") != report["meta"]["latency_ms"]:
+            print("警告: 基线与本次的注入延迟不同，比较结果仅供参考")
+        regressions = compare(report, baseline, args.max_regression)
+        for line in regressions:
+            print(f"回归: {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+pytest 启动开销基准测试
+在独立的子进程中测量 conftest 及基础模块的导入耗时和 pytest --collect-only 的收集耗时，
+并检查导入后是否已加载 uiautomator2、numpy 等重量级依赖；每个 xdist worker 都要重复付出这部分开销
+
+用法::
+
+    python -m benchmarks.bench_startup --output reports/startup.json
+    python -m benchmarks.bench_startup --baseline benchmarks/startup_baseline.json --max-regression 0.3
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 低于该绝对差值（毫秒）的变化视为噪声，不判定为回归
+NOISE_FLOOR_MS = 20.0
+
+# 收集用例时不应加载的依赖，只有用到设备或相应功能时才导入
+HEAVY_MODULES = ["uiautomator2", "adbutils", "numpy", "PIL"]
+
+# 收集阶段会导入的框架模块
+STARTUP_MODULES = ["conftest", "base.base_test", "page_objects.home_page"]
+
+_IMPORT_SCRIPT = """
+import sys, json, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _median(samples: List[float]) -> float:
+    ordered = sorted(samples)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def measure_import(modules: Optional[List[str]] = None, repeat: int = 5) -> Dict[str, Any]:
+    """
+    在全新的解释器中测量导入耗时
+
+    pytest 本身的导入不计入，只统计框架模块
+
+    Args:
+        modules: 要导入的模块，默认 STARTUP_MODULES
+        repeat: 重复次数，取中位数
+
+    Returns:
+        包含中位数、最小值（毫秒）和导入后已加载的重量级依赖的字典
+    """
+    script = "import pytest\n" + _IMPORT_SCRIPT.format(
+        modules=modules or STARTUP_MODULES, heavy=HEAVY_MODULES
+    )
+    samples = []
+    loaded: List[str] = []
+    for _ in range(max(1, repeat)):
+        output = subprocess.run(
+            [sys.executable, "-c", script], cwd=ROOT, check=True,
+            stdout=subprocess.PIPE, universal_newlines=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        samples.append(result["seconds"] * 1000.0)
+        loaded = result["loaded"]
+    return {
+        "repeat": len(samples),
+        "median_ms": round(_median(samples), 2),
+        "min_ms": round(min(samples), 2),
+        "heavy_modules": loaded,
+    }
+
+
+def measure_collection(args: Optional[List[str]] = None, repeat: int = 3) -> Dict[str, Any]:
+    """
+    测量 pytest --collect-only 的总耗时（解释器启动、插件加载、conftest 导入和收集）
+
+    清空 addopts，避免 HTML/JSON 报告插件写文件
+
+    Args:
+        args: 额外的 pytest 参数，例如 ["-k", "smoke"]
+        repeat: 重复次数，取中位数
+
+    Returns:
+        包含中位数、最小值（毫秒）和收集到的用例数的字典
+    """
+    command = [
+        sys.executable, "-m", "pytest", "--collect-only", "-q",
+        "-p", "no:cacheprovider", "-o", "addopts=",
+    ] + list(args or [])
+    samples = []
+    collected = 0
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        output = subprocess.run(
+            command, cwd=ROOT, check=True,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True,
+        ).stdout
+        samples.append((time.perf_counter() - start) * 1000.0)
+        collected = sum(1 for line in output.splitlines() if "::" in line)
+    return {
+        "repeat": len(samples),
+        "median_ms": round(_median(samples), 2),
+        "min_ms": round(min(samples), 2),
+        "collected": collected,
+    }
+
+
+def run_benchmarks(repeat: int = 5, pytest_args: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    执行启动基准测试
+
+    Args:
+        repeat: 每项测量的重复次数
+        pytest_args: 传给 pytest --collect-only 的额外参数
+
+    Returns:
+        包含运行环境和各项统计的结果字典
+    """
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "benchmarks": {
+            "import.framework": measure_import(repeat=repeat),
+            "pytest.collect_only": measure_collection(pytest_args, repeat=repeat),
+        },
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float = 0.3) -> List[str]:
+    """
+    与基线比较启动耗时，并检查是否新引入了重量级依赖
+
+    Args:
+        current: 本次结果
+        baseline: 基线结果
+        max_regression: 允许的相对增长比例
+
+    Returns:
+        回归描述列表，为空表示没有回归
+    """
+    regressions = []
+    for name, result in current["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base:
+            continue
+        before, after = base["median_ms"], result["median_ms"]
+        if after - before > NOISE_FLOOR_MS and after > before * (1 + max_regression):
+            regressions.append(f"{name}: {before:.1f}ms -> {after:.1f}ms")
+        added = sorted(set(result.get("heavy_modules", [])) - set(base.get("heavy_modules", [])))
+        if added:
+            regressions.append(f"{name}: 导入时新加载了 {', '.join(added)}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="pytest 启动开销基准测试")
+    parser.add_argument("--repeat", type=int, default=5, help="每项测量的重复次数")
+    parser.add_argument("--output", default="reports/startup.json", help="结果文件路径")
+    parser.add_argument("--baseline", help="基线结果文件，给出时与之比较")
+    parser.add_argument("--max-regression", type=float, default=0.3, help="允许的相对增长比例")
+    parser.add_argument("pytest_args", nargs="*", help="传给 pytest --collect-only 的额外参数")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.repeat, args.pytest_args)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    for name, result in report["benchmarks"].items():
+        extra = result.get("heavy_modules", result.get("collected"))
+        print(f"{name:22s} median {result['median_ms']:9.2f}ms  min {result['min_ms']:9.2f}ms  {extra}")
+    print(f"结果已写入: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.max_regression)
+        for line in regressions:
+            print(f"回归: {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,7 +10,12 @@ class Config:
     
     # 设备配置
     DEVICE_SERIAL = os.getenv("DEVICE_SERIAL", None)  # 设备序列号，None 表示使用默认设备
+    DEVICE_SERIALS = os.getenv("DEVICE_SERIALS", None)  # 逗号分隔的设备池，None 表示通过 adb 自动发现
     DEVICE_TIMEOUT = float(os.getenv("DEVICE_TIMEOUT", "10.0"))  # 设备操作超时时间
+    HEARTBEAT_TTL = float(os.getenv("HEARTBEAT_TTL", "5.0"))  # 设备心跳缓存有效期
+    HEARTBEAT_INTERVAL = float(os.getenv("HEARTBEAT_INTERVAL", "0"))  # 后台心跳间隔，0 表示不启动后台线程
+    DEVICE_POOL_FILE = os.getenv("DEVICE_POOL_FILE", os.path.join("reports", "device_pool.json"))  # 设备租约文件
+    DEVICE_PROFILE_DIR = os.getenv("DEVICE_PROFILE_DIR", os.path.join(".cache", "device_profiles"))  # 设备静态信息缓存目录，空字符串表示不写盘
     
     # 应用配置
     APP_PACKAGE = os.getenv("APP_PACKAGE", "com.example.app")  # 应用包名
@@ -24,10 +29,47 @@ class Config:
     REPORT_DIR = os.getenv("REPORT_DIR", "reports")
     SCREENSHOT_DIR = os.getenv("SCREENSHOT_DIR", "screenshots")
     LOG_DIR = os.getenv("LOG_DIR", "logs")
+    LOG_QUEUE = os.getenv("LOG_QUEUE", "false").lower() == "true"  # 日志是否通过后台线程写入
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # 日志队列容量，满时丢弃并计数
+    
+    # 截图写盘配置
+    SCREENSHOT_WORKERS = int(os.getenv("SCREENSHOT_WORKERS", "2"))  # 后台编码写盘线程数
+    SCREENSHOT_QUEUE_SIZE = int(os.getenv("SCREENSHOT_QUEUE_SIZE", "16"))  # 等待写盘的最大截图数
+    SCREENSHOT_QUEUE_POLICY = os.getenv("SCREENSHOT_QUEUE_POLICY", "block")  # 队列满时: block 或 drop_oldest
+    SCREENSHOT_DEDUP = os.getenv("SCREENSHOT_DEDUP", "true").lower() == "true"  # 近似重复的截图只记录引用
+    SCREENSHOT_DEDUP_DISTANCE = int(os.getenv("SCREENSHOT_DEDUP_DISTANCE", "4"))  # 视为重复的最大感知哈希距离（共 256 位）
     
     # 等待配置
     IMPLICIT_WAIT = float(os.getenv("IMPLICIT_WAIT", "10.0"))  # 隐式等待时间
     EXPLICIT_WAIT = float(os.getenv("EXPLICIT_WAIT", "10.0"))  # 显式等待时间
+    ADAPTIVE_TIMEOUT = os.getenv("ADAPTIVE_TIMEOUT", "true").lower() == "true"  # 未显式传入超时的等待按设备历史耗时自动调整
+    ADAPTIVE_TIMEOUT_DIR = os.getenv("ADAPTIVE_TIMEOUT_DIR", os.path.join(".cache", "timeouts"))  # 各设备等待耗时统计目录，空字符串表示不写盘
+    ADAPTIVE_TIMEOUT_PERCENTILE = float(os.getenv("ADAPTIVE_TIMEOUT_PERCENTILE", "99"))  # 计算超时使用的百分位
+    ADAPTIVE_TIMEOUT_FACTOR = float(os.getenv("ADAPTIVE_TIMEOUT_FACTOR", "3.0"))  # 百分位耗时的安全系数
+    ADAPTIVE_TIMEOUT_MIN_SAMPLES = int(os.getenv("ADAPTIVE_TIMEOUT_MIN_SAMPLES", "20"))  # 样本数达到该值前使用 IMPLICIT_WAIT / EXPLICIT_WAIT
+    ADAPTIVE_TIMEOUT_MIN = float(os.getenv("ADAPTIVE_TIMEOUT_MIN", "2.0"))  # 自适应超时下限（秒）
+    ADAPTIVE_TIMEOUT_MIN_FACTOR = float(os.getenv("ADAPTIVE_TIMEOUT_MIN_FACTOR", "0.5"))  # 自适应超时同时不低于 IMPLICIT_WAIT / EXPLICIT_WAIT 的该倍数
+    
+    # 资源采样配置
+    RESOURCE_SAMPLING = os.getenv("RESOURCE_SAMPLING", "off").lower()  # off、test（每个设备用例单独采样）或 session
+    RESOURCE_SAMPLE_INTERVAL = float(os.getenv("RESOURCE_SAMPLE_INTERVAL", "1.0"))  # 采样间隔（秒）
+    RESOURCE_SAMPLE_CAPACITY = int(os.getenv("RESOURCE_SAMPLE_CAPACITY", "600"))  # 每个指标最多保存的点数，写满后降采样
+    
+    # 失败步骤回放配置
+    STEP_RECORDER = os.getenv("STEP_RECORDER", "false").lower() == "true"  # 为使用设备的用例在内存中保留最近几步的截图，失败时写盘
+    STEP_RECORDER_FRAMES = int(os.getenv("STEP_RECORDER_FRAMES", "10"))  # 环形缓冲区保留的帧数
+    STEP_RECORDER_MAX_SIZE = int(os.getenv("STEP_RECORDER_MAX_SIZE", "480"))  # 缩小后图像最长边（像素）
+    STEP_RECORDER_FORMAT = os.getenv("STEP_RECORDER_FORMAT", "webp").lower()  # 失败时写出的格式: webp（动画）或 frames（图片序列）
+    
+    # 帧耗时阈值
+    FRAME_MAX_P95_MS = float(os.getenv("FRAME_MAX_P95_MS", "32.0"))  # assert_smooth() 默认的 p95 帧耗时上限
+    FRAME_MAX_JANK_RATIO = float(os.getenv("FRAME_MAX_JANK_RATIO", "0.1"))  # assert_smooth() 默认的卡顿帧比例上限
+    
+    # 重试配置
+    RETRY_BUDGET = float(os.getenv("RETRY_BUDGET", "120.0"))  # 每个会话（worker）花在重试等待上的总秒数，0 表示不限制
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "8.0"))  # 单次重试等待的上限
+    BREAKER_THRESHOLD = int(os.getenv("BREAKER_THRESHOLD", "3"))  # 连续多少次设备错误后熔断该设备
+    BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "30.0"))  # 熔断后多少秒放行一次试探调用
     
     @classmethod
     def get_device_config(cls) -> Dict[str, Any]:
@@ -40,6 +82,8 @@ class Config:
         return {
             "serial": cls.DEVICE_SERIAL,
             "timeout": cls.DEVICE_TIMEOUT,
+            "heartbeat_ttl": cls.HEARTBEAT_TTL,
+            "profile_dir": cls.DEVICE_PROFILE_DIR,
         }
     
     @classmethod
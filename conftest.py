@@ -3,17 +3,79 @@ pytest 配置文件
 提供全局 fixtures 和测试配置
 """
 import pytest
-import uiautomator2 as u2
-from typing import Generator
+from typing import TYPE_CHECKING, Generator
 import logging
 import os
+import uuid
 from datetime import datetime
 
+from config.config import Config
+from utils.adaptive_timeout import get_adaptive_timeouts
+from utils.app_state import AppStateTracker
 from utils.device_manager import DeviceManager
-from utils.logger import setup_logger
+from utils.device_pool import DevicePool, current_worker_id
+from utils.logger import LOGGER_NAME, setup_logger, shutdown_logging
+from utils.metrics import get_metrics_registry, device_serial
+from utils.resource_sampler import ResourceSampler
+from utils.retry import get_retry_registry
+from utils.screenshot import get_screenshot_pipeline, shutdown_screenshot_pipeline
+from utils.sharding import DurationSharding
+from utils.step_recorder import StepRecorder, set_active_recorder
 
-# 配置日志
-logger = setup_logger()
+if TYPE_CHECKING:
+    import uiautomator2 as u2
+    from utils.frame_stats import FrameStatsCollector
+
+# 处理器（控制台和日志文件）在首次请求设备时才添加，只收集用例时不创建日志文件
+logger = logging.getLogger(LOGGER_NAME)
+
+# 会话级资源采样摘要，设备序列号 -> 摘要
+_session_resources = {}
+
+
+def _is_xdist_worker(config) -> bool:
+    return hasattr(config, "workerinput")
+
+
+def pytest_addoption(parser):
+    """
+    注册命令行选项
+    """
+    group = parser.getgroup("sharding", "按历史耗时分片")
+    group.addoption(
+        "--shard-by-duration", action="store_true", default=False,
+        help="配合 -n N --dist loadgroup，按历史耗时把用例均衡分给各 worker",
+    )
+    group.addoption(
+        "--durations-db", default=os.path.join("reports", "durations.json"),
+        help="用例历史耗时库，每次运行结束时更新",
+    )
+
+
+def pytest_configure(config):
+    """
+    注册按历史耗时分片插件，主进程生成本次会话的设备租约标识
+    """
+    if not _is_xdist_worker(config):
+        config.device_pool_session = uuid.uuid4().hex
+    config.pluginmanager.register(
+        DurationSharding(
+            config,
+            db_path=config.getoption("durations_db"),
+            report_path=config.getoption("json_report_file", None),
+            enabled=config.getoption("shard_by_duration"),
+            device_fixture="device_manager",
+        ),
+        "duration-sharding",
+    )
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """
+    把设备租约标识传给 xdist worker，同一会话的 worker 共用一份租约状态
+    """
+    node.workerinput["device_pool_session"] = node.config.device_pool_session
 
 
 @pytest.fixture(scope="session")
@@ -22,26 +84,82 @@ def device_config():
     设备配置 fixture
     可以通过环境变量或配置文件指定设备序列号
     """
-    device_serial = os.getenv("DEVICE_SERIAL", None)
-    return {
-        "serial": device_serial,
-        "timeout": 10.0,
-    }
+    # DEVICE_SERIALS 为逗号分隔的设备池，未设置时通过 adb 自动发现
+    if Config.DEVICE_SERIALS:
+        serials = [s.strip() for s in Config.DEVICE_SERIALS.split(",") if s.strip()]
+    elif Config.DEVICE_SERIAL:
+        serials = [Config.DEVICE_SERIAL]
+    else:
+        serials = None
+    return dict(
+        Config.get_device_config(),
+        serials=serials,
+        heartbeat_interval=Config.HEARTBEAT_INTERVAL,
+    )
 
 
 @pytest.fixture(scope="session")
-def device(device_config) -> Generator[u2.Device, None, None]:
+def device_pool(request, device_config) -> DevicePool:
     """
-    设备连接 fixture
-    在整个测试会话期间保持连接
+    设备池 fixture
+    每个 xdist worker 从池中独占租用一台设备；首次租用时才创建租约文件，
+    上一次运行留下的租约按会话标识清空
+    """
+    config = request.config
+    if _is_xdist_worker(config):
+        session = config.workerinput.get("device_pool_session")
+    else:
+        session = config.device_pool_session
+    return DevicePool(
+        Config.DEVICE_POOL_FILE,
+        serials=device_config["serials"],
+        timeout=device_config["timeout"],
+        manager_options={
+            "heartbeat_ttl": device_config["heartbeat_ttl"],
+            "profile_dir": device_config["profile_dir"],
+        },
+        session=session,
+    )
+
+
+@pytest.fixture(scope="session")
+def device_manager(device_pool, device_config) -> Generator[DeviceManager, None, None]:
+    """
+    设备管理器 fixture
+    从设备池租用设备，is_connected() 走心跳缓存
     """
-    device_manager = DeviceManager(device_config)
-    device = device_manager.connect()
+    # 第一个需要设备的用例才添加日志处理器（会创建 logs 目录和日志文件）
+    setup_logger()
+    manager = device_pool.acquire()
     
-    if device is None:
+    if manager is None:
         pytest.skip("无法连接到设备，跳过测试")
     
-    logger.info(f"设备连接成功: {device_manager.get_device_info()}")
+    # 重试默认计入这台设备的熔断器，熔断时把设备从池中摘除，恢复后放回
+    retry_registry = get_retry_registry()
+    retry_registry.default_serial = manager.serial or device_serial(manager.device)
+    retry_registry.on_breaker_open = device_pool.mark_bad
+    retry_registry.on_breaker_close = device_pool.mark_good
+    
+    if device_config["heartbeat_interval"] > 0:
+        manager.start_heartbeat(device_config["heartbeat_interval"])
+    
+    yield manager
+    
+    manager.stop_heartbeat()
+    # 租用设备的等待耗时统计供下一次会话计算自适应超时（替身设备的样本不写盘）
+    get_adaptive_timeouts().save([device_serial(manager.device)])
+    device_pool.release()
+
+
+@pytest.fixture(scope="session")
+def device(device_manager) -> Generator["u2.Device", None, None]:
+    """
+    设备连接 fixture
+    在整个测试会话期间保持连接
+    """
+    device = device_manager.device
+    logger.info(f"设备连接成功 ({current_worker_id()}): {device_manager.get_device_info()}")
     
     yield device
     
@@ -53,6 +171,156 @@ def device(device_config) -> Generator[u2.Device, None, None]:
         logger.warning(f"清理设备时出错: {e}")
 
 
+@pytest.fixture(scope="session")
+def app_state(device, device_config) -> Generator[AppStateTracker, None, None]:
+    """
+    会话级应用前台状态跟踪
+    """
+    tracker = AppStateTracker(device, timeout=device_config["timeout"])
+    
+    yield tracker
+    
+    logger.info(f"应用启动统计: {tracker.get_stats()}")
+
+
+@pytest.fixture(scope="function")
+def app_session(app_state):
+    """
+    让应用处于前台主界面的 fixture
+    
+    用法: app_session("com.android.settings")，应用已在前台时直接复用，
+    在后台时用 intent 回到主界面，fresh=True 时冷启动
+    """
+    return app_state.ensure
+
+
+def _start_sampler(device, package):
+    sampler = ResourceSampler(
+        device,
+        package or Config.APP_PACKAGE,
+        interval=Config.RESOURCE_SAMPLE_INTERVAL,
+        capacity=Config.RESOURCE_SAMPLE_CAPACITY,
+    )
+    sampler.start()
+    return sampler
+
+
+@pytest.fixture(scope="function")
+def resource_monitor(device, request) -> Generator[ResourceSampler, None, None]:
+    """
+    被测应用资源采样 fixture
+    
+    用例执行期间在后台采样 CPU、内存和电池，摘要写入 report.json 中该用例的 metadata.resources；
+    包名取 @pytest.mark.resources(package=...)，默认 Config.APP_PACKAGE
+    """
+    marker = request.node.get_closest_marker("resources")
+    sampler = _start_sampler(device, marker.kwargs.get("package") if marker else None)
+    
+    yield sampler
+    
+    sampler.stop()
+    request.node.resource_summary = sampler.summary()
+
+
+@pytest.fixture(scope="session")
+def session_resource_monitor(device, device_manager) -> Generator[ResourceSampler, None, None]:
+    """
+    会话级资源采样 fixture，摘要写入 report.json 的 resources 字段
+    """
+    sampler = _start_sampler(device, None)
+    
+    yield sampler
+    
+    sampler.stop()
+    _session_resources[device_manager.serial or "default"] = sampler.summary()
+
+
+@pytest.fixture(scope="function")
+def frame_stats(device, request):
+    """
+    帧耗时采集 fixture
+    
+    用法: with frame_stats("com.android.settings") as frames: ...，
+    退出 with 块后 frames.stats 为 FrameStats（读取失败时 with 语句抛出 RuntimeError）；
+    各段摘要写入 report.json 中该用例的 metadata.frames
+    """
+    collectors = []
+    
+    # 依赖 numpy，只在用到该 fixture 时导入
+    from utils.frame_stats import FrameStatsCollector
+    
+    def start(package: str = None) -> "FrameStatsCollector":
+        collector = FrameStatsCollector(device, package or Config.APP_PACKAGE)
+        collectors.append(collector)
+        return collector
+    
+    yield start
+    
+    summaries = [
+        dict(collector.stats.summary(), package=collector.package)
+        for collector in collectors if collector.stats is not None
+    ]
+    if summaries:
+        request.node.frame_summary = summaries
+
+
+@pytest.fixture(autouse=True)
+def _resource_sampling(request):
+    """
+    按 RESOURCE_SAMPLING 为使用设备的用例自动启用资源采样
+    """
+    if "device" in request.fixturenames:
+        if Config.RESOURCE_SAMPLING == "test":
+            request.getfixturevalue("resource_monitor")
+        elif Config.RESOURCE_SAMPLING == "session":
+            request.getfixturevalue("session_resource_monitor")
+    yield
+
+
+@pytest.fixture(scope="function")
+def step_recorder(device, request) -> Generator[StepRecorder, None, None]:
+    """
+    失败步骤回放 fixture
+    
+    用例执行期间每次操作后在内存中保留一帧缩小的截图，只保留最近 STEP_RECORDER_FRAMES 帧；
+    用例失败时补抓最后一帧并写入 screenshots/steps/<用例名>_<时间戳>/，通过时不写盘
+    """
+    recorder = StepRecorder(
+        device,
+        frames=Config.STEP_RECORDER_FRAMES,
+        max_size=Config.STEP_RECORDER_MAX_SIZE,
+    )
+    recorder.start()
+    previous = set_active_recorder(recorder)
+    
+    yield recorder
+    
+    set_active_recorder(previous)
+    recorder.stop()
+    rep_call = getattr(request.node, "rep_call", None)
+    if rep_call is not None and rep_call.failed:
+        recorder.capture_now("failure")
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        directory = os.path.join(Config.SCREENSHOT_DIR, "steps", f"{request.node.name}_{timestamp}")
+        try:
+            paths = recorder.dump(directory, Config.STEP_RECORDER_FORMAT)
+            request.node.step_frames = paths
+            logger.info(f"失败步骤回放已写入: {directory} ({len(paths)} 个文件)")
+        except Exception as e:
+            logger.error(f"写入失败步骤回放出错: {e}")
+    recorder.clear()
+
+
+@pytest.fixture(autouse=True)
+def _step_recording(request):
+    """
+    按 STEP_RECORDER 为使用设备的用例自动启用失败步骤回放
+    """
+    if Config.STEP_RECORDER and "device" in request.fixturenames:
+        request.getfixturevalue("step_recorder")
+    yield
+
+
 @pytest.fixture(scope="function")
 def clean_device(device):
     """
@@ -81,11 +349,9 @@ def screenshot_on_failure(device, request):
             test_name = request.node.name
             screenshot_path = f"screenshots/{test_name}_{timestamp}.png"
             
-            # 确保目录存在
-            os.makedirs("screenshots", exist_ok=True)
-            
-            device.screenshot(screenshot_path)
-            logger.info(f"测试失败截图已保存: {screenshot_path}")
+            # 后台写盘；失败画面只与完全相同的截图合并，避免错误提示被并入之前的正常画面
+            get_screenshot_pipeline().capture(device, screenshot_path, max_distance=-1)
+            logger.info(f"测试失败截图: {screenshot_path}")
         except Exception as e:
             logger.error(f"截图失败: {e}")
 
@@ -104,19 +370,124 @@ def pytest_runtest_makereport(item, call):
 def setup_test_environment():
     """
     测试环境初始化
-    """
-    # 创建必要的目录
-    os.makedirs("screenshots", exist_ok=True)
-    os.makedirs("reports", exist_ok=True)
-    os.makedirs("logs", exist_ok=True)
     
+    不预先创建目录：截图、报告、日志和设备池文件在首次写入时各自创建所在目录
+    """
     logger.info("=" * 50)
     logger.info("测试环境初始化完成")
     logger.info("=" * 50)
     
     yield
     
+    # 确保所有后台截图都已写盘
+    stats = shutdown_screenshot_pipeline()
+    if stats:
+        logger.info(f"截图写入统计: {stats}")
+    
     logger.info("=" * 50)
     logger.info("测试环境清理完成")
     logger.info("=" * 50)
+    
+    # 队列模式下写完剩余日志
+    for name, counts in shutdown_logging().items():
+        if counts["dropped"]:
+            logger.warning(f"日志队列 {name} 丢弃了 {counts['dropped']} 条记录")
+
+
+def pytest_terminal_summary(terminalreporter):
+    """
+    会话结束时输出设备池利用率和各操作耗时
+    """
+    if _is_xdist_worker(terminalreporter.config) or terminalreporter.config.option.collectonly:
+        return
+    usage = DevicePool(
+        Config.DEVICE_POOL_FILE, session=terminalreporter.config.device_pool_session
+    ).utilization()
+    if usage["devices"]:
+        terminalreporter.section("设备池利用率")
+    for serial, stats in usage["devices"].items():
+        state = " (不可用)" if stats["bad"] else ""
+        terminalreporter.write_line(
+            f"{serial}{state}: 租用 {stats['leases']} 次, "
+            f"占用 {stats['busy_seconds']:.1f}秒 / {usage['wall_seconds']:.1f}秒, "
+            f"利用率 {stats['utilization']:.0%}"
+        )
+    
+    retries = get_retry_registry().summary()
+    if retries["retries"] or retries["fast_failures"] or retries["budget_exhausted"]:
+        terminalreporter.section("重试")
+        terminalreporter.write_line(
+            f"重试 {retries['retries']} 次, 等待 {retries['retry_seconds']:.1f}秒 "
+            f"(预算 {retries['budget_seconds']:.0f}秒, 超出预算 {retries['budget_exhausted']} 次), "
+            f"熔断快速失败 {retries['fast_failures']} 次"
+        )
+        for serial, breaker in retries["breakers"].items():
+            if breaker["trips"]:
+                terminalreporter.write_line(f"{serial}: 熔断 {breaker['trips']} 次, 当前 {breaker['state']}")
+    
+    latency = get_metrics_registry().summary()["operations"]
+    if latency:
+        terminalreporter.section("操作耗时")
+        for operation, stats in latency.items():
+            terminalreporter.write_line(
+                f"{operation}: {stats['count']} 次, p50 {stats['p50_ms']}ms, "
+                f"p95 {stats['p95_ms']}ms, p99 {stats['p99_ms']}ms"
+            )
+
 
+def pytest_sessionfinish(session):
+    """
+    xdist worker 把本进程的耗时直方图、重试统计和自适应超时摘要交给主进程合并
+    """
+    if _is_xdist_worker(session.config):
+        session.config.workeroutput["latency"] = get_metrics_registry().to_dict()
+        session.config.workeroutput["retry"] = get_retry_registry().to_dict()
+        session.config.workeroutput["resources"] = _session_resources
+        session.config.workeroutput["timeouts"] = get_adaptive_timeouts().summary()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """
+    主进程合并 worker 的耗时直方图、重试统计和自适应超时摘要
+    """
+    workeroutput = getattr(node, "workeroutput", {})
+    latency = workeroutput.get("latency")
+    if latency:
+        get_metrics_registry().merge(latency)
+    retry_stats = workeroutput.get("retry")
+    if retry_stats:
+        get_retry_registry().merge(retry_stats)
+    _session_resources.update(workeroutput.get("resources", {}))
+    timeouts = workeroutput.get("timeouts")
+    if timeouts:
+        get_adaptive_timeouts().merge(timeouts)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_json_modifyreport(json_report):
+    """
+    把各操作的耗时分布、重试统计、自适应超时和会话级资源采样写入 reports/report.json
+    """
+    json_report["latency"] = get_metrics_registry().summary()
+    json_report["retry"] = get_retry_registry().summary()
+    json_report["timeouts"] = get_adaptive_timeouts().summary()
+    if _session_resources:
+        json_report["resources"] = _session_resources
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_json_runtest_metadata(item, call):
+    """
+    把用例的资源采样、帧耗时摘要和失败步骤回放路径写入 report.json 中该用例的 metadata
+    """
+    if call.when != "teardown":
+        return None
+    metadata = {}
+    if getattr(item, "resource_summary", None):
+        metadata["resources"] = item.resource_summary
+    if getattr(item, "frame_summary", None):
+        metadata["frames"] = item.frame_summary
+    if getattr(item, "step_frames", None):
+        metadata["steps"] = item.step_frames
+    return metadata or None
@@ -2,10 +2,14 @@
 页面对象基类
 所有页面对象应该继承此类
 """
-import uiautomator2 as u2
 import logging
-from typing import Optional, Dict, Any
+from typing import TYPE_CHECKING, Optional, Dict, Any
 from base.base_test import BaseTest
+from utils.element_cache import ElementCache
+from utils.hierarchy import HierarchySnapshot, UiNode
+
+if TYPE_CHECKING:
+    import uiautomator2 as u2
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +17,7 @@ logger = logging.getLogger(__name__)
 class BasePage(BaseTest):
     """页面对象基类"""
     
-    def __init__(self, device: u2.Device):
+    def __init__(self, device: "u2.Device"):
         """
         初始化页面对象
         
@@ -22,15 +26,52 @@ class BasePage(BaseTest):
         """
         super().__init__(device)
         self.page_name = self.__class__.__name__
+        self.element_cache = ElementCache()
+    
+    def snapshot(self) -> HierarchySnapshot:
+        """
+        抓取当前界面层级快照并刷新元素缓存
+        
+        层级指纹与缓存一致时复用已解析的快照
+        
+        Returns:
+            HierarchySnapshot 对象
+        """
+        snapshot = self.element_cache.update(self.device.dump_hierarchy())
+        self.gestures.observe_rotation(snapshot.rotation)
+        return snapshot
     
-    def is_page_loaded(self, timeout: float = 10.0) -> bool:
+    def _locate(self, selector: dict) -> Optional[UiNode]:
+        """
+        抓取一次层级快照并查找元素
+        
+        层级指纹未变化时直接返回缓存的节点，不再解析和匹配
+        """
+        snapshot = self.snapshot()
+        node = self.element_cache.lookup(selector)
+        if node is None:
+            node = snapshot.find(selector)
+            if node is not None:
+                self.element_cache.store(selector, node)
+        return node
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        元素缓存统计
+        
+        Returns:
+            包含 hits、misses、invalidations、hit_rate 的字典
+        """
+        return self.element_cache.get_stats()
+    
+    def is_page_loaded(self, timeout: Optional[float] = None) -> bool:
         """
         检查页面是否已加载
         
         子类应该重写此方法，定义页面加载的标识元素
         
         Args:
-            timeout: 超时时间
+            timeout: 超时时间，None 表示按设备历史耗时自适应
         
         Returns:
             True 如果页面已加载，否则 False
@@ -38,14 +79,27 @@ class BasePage(BaseTest):
         # 默认实现，子类应该重写
         return True
     
-    def wait_for_page_load(self, timeout: float = 10.0):
+    def wait_for_page_load(self, timeout: Optional[float] = None):
         """
         等待页面加载完成
         
         Args:
-            timeout: 超时时间
+            timeout: 超时时间，None 表示按设备历史耗时自适应
         """
         if not self.is_page_loaded(timeout):
             raise TimeoutError(f"页面 {self.page_name} 加载超时")
         self.logger.info(f"页面 {self.page_name} 加载完成")
-
+    
+    def check_elements(self, selectors: Dict[str, dict]) -> Dict[str, bool]:
+        """
+        在同一份层级快照上检查多个页面元素
+        
+        检查 N 个选择器只需要一次 RPC
+        
+        Args:
+            selectors: 名称 -> 元素选择器字典
+        
+        Returns:
+            名称 -> 元素是否存在
+        """
+        return self.snapshot().exists_many(selectors)
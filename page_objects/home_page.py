@@ -1,9 +1,13 @@
 """
 首页页面对象示例
 """
-import uiautomator2 as u2
+from typing import TYPE_CHECKING, Optional
+
 from page_objects.base_page import BasePage
 
+if TYPE_CHECKING:
+    import uiautomator2 as u2
+
 
 class HomePage(BasePage):
     """首页页面对象"""
@@ -13,21 +17,16 @@ class HomePage(BasePage):
     MENU_BUTTON = {"resourceId": "com.example.app:id/menu_button"}
     SETTINGS_BUTTON = {"description": "设置"}
     
-    def __init__(self, device: u2.Device):
+    def __init__(self, device: "u2.Device"):
         super().__init__(device)
     
-    def is_page_loaded(self, timeout: float = 10.0) -> bool:
+    def is_page_loaded(self, timeout: Optional[float] = None) -> bool:
         """
         检查首页是否已加载
         
-        通过检查关键元素是否存在来判断
+        搜索框或菜单按钮任一出现即视为已加载，两者在每次检查中同时判断
         """
-        try:
-            # 检查搜索框或菜单按钮是否存在
-            return (self.device(**self.SEARCH_BOX).exists(timeout=timeout) or
-                   self.device(**self.MENU_BUTTON).exists(timeout=timeout))
-        except Exception:
-            return False
+        return self.wait_any([self.SEARCH_BOX, self.MENU_BUTTON], timeout=timeout) is not None
     
     def click_search_box(self):
         """点击搜索框"""
@@ -39,6 +38,12 @@ class HomePage(BasePage):
         self.input_text(self.SEARCH_BOX, text)
         return self
     
+    def search(self, text: str):
+        """在搜索框输入文本（set_text 会先点击获取焦点，无需单独点击）"""
+        with self.batch() as batch:
+            batch.set_text(self.SEARCH_BOX, text)
+        return self
+    
     def click_menu_button(self):
         """点击菜单按钮"""
         self.click_element(self.MENU_BUTTON)
@@ -0,0 +1,111 @@
+"""
+自适应超时测试用例
+使用设备替身，无需连接设备
+"""
+import time
+from base.base_test import BaseTest
+from utils.adaptive_timeout import AdaptiveTimeouts
+from utils.fake_device import FakeDevice
+
+
+def test_default_until_enough_samples_then_percentile():
+    timeouts = AdaptiveTimeouts(min_samples=5, minimum=0.1, min_factor=0.0)
+    for _ in range(4):
+        timeouts.record("find_element", 0.1, "fast")
+    assert timeouts.timeout("find_element", 10.0, "fast") == 10.0
+    timeouts.record("find_element", 0.1, "fast")
+    # p99 100ms × 安全系数 3
+    assert timeouts.timeout("find_element", 10.0, "fast") == 0.3
+    assert timeouts.stats["fallback"] == 1 and timeouts.stats["adaptive"] == 1
+
+
+def test_clamped_per_device_and_operation():
+    timeouts = AdaptiveTimeouts(min_samples=3, minimum=2.0, min_factor=0.0)
+    for _ in range(3):
+        timeouts.record("find_element", 0.05, "fast")
+        timeouts.record("find_element", 8.0, "slow")
+    assert timeouts.timeout("find_element", 10.0, "fast") == 2.0
+    # 不超过 Config 中的超时
+    assert timeouts.timeout("find_element", 10.0, "slow") == 10.0
+    assert timeouts.timeout("find_element", 1.0, "fast") == 1.0
+    assert timeouts.timeout("wait_any", 10.0, "fast") == 10.0
+    assert timeouts.timeout("find_element", 10.0, "other") == 10.0
+    # 下限不低于默认超时的 min_factor 倍
+    floored = AdaptiveTimeouts(min_samples=1, minimum=2.0, min_factor=0.5)
+    floored.record("find_element", 0.01, "fast")
+    assert floored.timeout("find_element", 10.0, "fast") == 5.0
+
+
+def test_stats_persist_per_serial_with_decay(tmp_path):
+    first = AdaptiveTimeouts(str(tmp_path), min_samples=3, minimum=0.1, min_factor=0.0)
+    for _ in range(10):
+        first.record("wait_any", 0.2, "192.168.1.5:5555")
+    first.save()
+    assert (tmp_path / "192.168.1.5_5555.json").exists()
+
+    second = AdaptiveTimeouts(str(tmp_path), min_samples=3, minimum=0.1, min_factor=0.0, max_samples=4)
+    assert second.timeout("wait_any", 10.0, "192.168.1.5:5555") == 0.6
+    assert second.histograms["192.168.1.5:5555"]["wait_any"].count == 4
+
+
+def test_disabled_returns_default():
+    timeouts = AdaptiveTimeouts(min_samples=1, enabled=False)
+    timeouts.record("find_element", 0.1)
+    assert timeouts.timeout("find_element", 10.0) == 10.0
+    assert timeouts.histograms == {}
+
+
+def test_parallel_workers_merge_on_save(tmp_path):
+    gw0 = AdaptiveTimeouts(str(tmp_path), min_samples=1)
+    gw1 = AdaptiveTimeouts(str(tmp_path), min_samples=1)
+    gw0.record("find_element", 0.2, "A")
+    gw1.record("find_element", 0.4, "A")
+    gw1.record("find_element", 0.4, "fake-serial")
+    gw0.save()
+    gw1.save(["A"])
+    gw1.save(["A"])
+    assert AdaptiveTimeouts(str(tmp_path))._device("A")["find_element"].count == 2
+    assert not (tmp_path / "fake-serial.json").exists()
+
+
+class AppearingDevice(FakeDevice):
+    """元素在第 appear_after 次 dump 时才出现的设备替身"""
+
+    def __init__(self, appear_after: int):
+        super().__init__()
+        self.appear_after = appear_after
+        self.dumps = 0
+
+    def dump_hierarchy(self, *args, **kwargs) -> str:
+        self.dumps += 1
+        xml = super().dump_hierarchy(*args, **kwargs)
+        return xml if self.dumps >= self.appear_after else xml.replace('text="显示"', 'text=""')
+
+
+def test_only_waits_that_polled_are_recorded():
+    device = AppearingDevice(appear_after=2)
+    test = BaseTest(device)
+    test.timeouts = AdaptiveTimeouts(min_samples=1)
+    test.find_element({"text": "显示"})
+    test.find_element({"text": "显示"})
+    histogram = test.timeouts.histograms[device.serial]["find_element"]
+    # 第二次查找第一次检查就成功，不计入
+    assert histogram.count == 1
+
+
+def test_negative_check_shortened_on_fast_device():
+    device = FakeDevice()
+    test = BaseTest(device)
+    test.timeouts = AdaptiveTimeouts(min_samples=3, minimum=0.2, min_factor=0.05)
+    for _ in range(3):
+        test.timeouts.record("find_element", 0.05, device.serial)
+
+    start = time.monotonic()
+    assert not test.wait_for_element({"text": "不存在"}, raise_exception=False)
+    assert time.monotonic() - start < 1.0
+    assert test.timeouts.stats["timeouts"] == 1
+
+    # 显式传入的超时不受影响
+    start = time.monotonic()
+    test.wait_for_element({"text": "不存在"}, timeout=0.5, raise_exception=False)
+    assert time.monotonic() - start >= 0.5
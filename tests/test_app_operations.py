@@ -3,16 +3,18 @@
 测试应用的启动、关闭、切换等基本操作
 """
 import pytest
-import uiautomator2 as u2
-import time
+from typing import TYPE_CHECKING
 from base.base_test import BaseTest
 
+if TYPE_CHECKING:
+    import uiautomator2 as u2
+
 
 class TestAppOperations(BaseTest):
     """应用操作测试类"""
     
     @pytest.fixture(autouse=True)
-    def setup(self, device: u2.Device):
+    def setup(self, device: "u2.Device"):
         """测试设置"""
         super().__init__(device)
         self.setup_method()
@@ -21,7 +23,7 @@ class TestAppOperations(BaseTest):
     
     @pytest.mark.smoke
     @pytest.mark.android
-    def test_app_start_and_stop(self, device: u2.Device):
+    def test_app_start_and_stop(self, device: "u2.Device"):
         """
         测试应用启动和关闭
         使用系统设置应用作为示例
@@ -30,7 +32,7 @@ class TestAppOperations(BaseTest):
         
         # 确保应用已关闭
         device.app_stop(app_package)
-        time.sleep(1)
+        self.wait_for_ui_idle()
         
         # 启动应用
         device.app_start(app_package)
@@ -45,19 +47,19 @@ class TestAppOperations(BaseTest):
         self.logger.info(f"应用启动成功，当前应用: {current_app}")
         
         # 等待界面加载
-        time.sleep(2)
+        self.wait_for_ui_idle()
         
         # 关闭应用
         device.app_stop(app_package)
         self.logger.info(f"关闭应用: {app_package}")
         
         # 验证应用已关闭
-        time.sleep(1)
+        self.wait_for_ui_idle()
         current_app = device.app_current()
         assert current_app["package"] != app_package, "应用未成功关闭"
     
     @pytest.mark.android
-    def test_app_clear_data(self, device: u2.Device):
+    def test_app_clear_data(self, device: "u2.Device"):
         """
         测试清除应用数据
         """
@@ -74,7 +76,7 @@ class TestAppOperations(BaseTest):
         self.logger.info("应用数据清除成功")
     
     @pytest.mark.android
-    def test_app_info(self, device: u2.Device):
+    def test_app_info(self, device: "u2.Device"):
         """
         测试获取应用信息
         """
@@ -90,7 +92,7 @@ class TestAppOperations(BaseTest):
         self.logger.info(f"应用信息: {app_info}")
     
     @pytest.mark.android
-    def test_app_list(self, device: u2.Device):
+    def test_app_list(self, device: "u2.Device"):
         """
         测试获取已安装应用列表
         """
@@ -104,7 +106,7 @@ class TestAppOperations(BaseTest):
         assert "com.android.settings" in app_list, "系统设置应用未在列表中"
     
     @pytest.mark.android
-    def test_app_running_list(self, device: u2.Device):
+    def test_app_running_list(self, device: "u2.Device"):
         """
         测试获取正在运行的应用列表
         """
@@ -116,7 +118,7 @@ class TestAppOperations(BaseTest):
         self.logger.info(f"运行中的应用: {running_apps}")
     
     @pytest.mark.android
-    def test_app_wait_activity(self, device: u2.Device):
+    def test_app_wait_activity(self, device: "u2.Device"):
         """
         测试等待特定 Activity 出现
         """
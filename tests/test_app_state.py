@@ -0,0 +1,54 @@
+"""
+应用前台状态跟踪测试用例
+使用设备替身，无需连接设备
+"""
+import pytest
+from utils.app_state import AppStateTracker, RESET_FLAGS
+from utils.fake_device import FakeDevice
+
+PACKAGE = "com.android.settings"
+RESOLVE = f"cmd package resolve-activity --brief -c android.intent.category.LAUNCHER {PACKAGE}"
+
+
+@pytest.fixture
+def device():
+    device = FakeDevice(shell_outputs={RESOLVE: f"priority=0 preferredOrder=0\n{PACKAGE}/.Settings\n"})
+    device.current_app = {"package": "com.android.launcher", "activity": ".Launcher"}
+    return device
+
+
+def test_background_app_is_reset_with_intent(device):
+    tracker = AppStateTracker(device)
+    assert tracker.ensure(PACKAGE) == AppStateTracker.RESET
+    assert ("shell", f"am start -n {PACKAGE}/{PACKAGE}.Settings -f {RESET_FLAGS}") in device.actions
+    assert not any(action[0] == "app_start" for action in device.actions)
+
+
+def test_foreground_main_activity_is_reused(device):
+    tracker = AppStateTracker(device)
+    device.current_app = {"package": PACKAGE, "activity": ".Settings"}
+    device.reset_counters()
+    assert tracker.ensure(PACKAGE) == AppStateTracker.REUSED
+    # 只解析一次启动 Activity 并查询一次前台应用
+    assert device.rpc_counts["app_current"] == 1
+    assert device.rpc_counts["app_start"] == 0
+    assert tracker.ensure(PACKAGE) == AppStateTracker.REUSED
+    assert device.rpc_counts["shell"] == 1
+
+
+def test_sub_activity_is_reset_and_fresh_cold_starts(device):
+    tracker = AppStateTracker(device)
+    device.current_app = {"package": PACKAGE, "activity": ".SubSettings"}
+    assert tracker.ensure(PACKAGE) == AppStateTracker.RESET
+    assert tracker.ensure(PACKAGE, fresh=True) == AppStateTracker.COLD
+    assert ("app_start", PACKAGE, f"{PACKAGE}.Settings", True) in device.actions
+    stats = tracker.get_stats()
+    assert stats["cold"] == 1 and stats["reset"] == 1 and stats["reused"] == 0
+
+
+def test_unresolvable_activity_falls_back_to_app_start():
+    device = FakeDevice()
+    device.current_app = {"package": "com.android.launcher", "activity": ".Launcher"}
+    tracker = AppStateTracker(device)
+    assert tracker.ensure("com.example.other") == AppStateTracker.RESET
+    assert ("app_start", "com.example.other", None, False) in device.actions
@@ -0,0 +1,96 @@
+"""
+批量操作脚本测试用例
+使用替身设备，无需连接设备
+"""
+import pytest
+from base.base_test import BaseTest
+from tests.test_hierarchy import HIERARCHY_XML
+
+
+class RecordingDevice:
+    """记录所有调用的设备替身"""
+
+    serial = "fake-serial"
+
+    def __init__(self, xml: str = HIERARCHY_XML):
+        self.xml = xml
+        self.calls = []
+
+    def dump_hierarchy(self) -> str:
+        self.calls.append(("dump_hierarchy",))
+        return self.xml
+
+    def click(self, x, y):
+        self.calls.append(("click", x, y))
+
+    def send_keys(self, text, clear=False):
+        self.calls.append(("send_keys", text, clear))
+
+    def press(self, key):
+        self.calls.append(("press", key))
+
+    def swipe(self, fx, fy, tx, ty, duration=None):
+        self.calls.append(("swipe", fx, fy, tx, ty, duration))
+
+
+def test_batch_resolves_all_selectors_from_one_dump():
+    device = RecordingDevice()
+    with BaseTest(device).batch(timeout=1.0) as batch:
+        batch.tap({"text": "显示"})
+        batch.set_text({"description": "搜索"}, "蓝牙")
+        batch.press("enter")
+        batch.swipe(540, 1500, 540, 500)
+    assert [r.ok for r in batch.results] == [True, True, True, True]
+    assert device.calls == [
+        ("dump_hierarchy",),
+        ("click", 540, 460),
+        ("click", 540, 260),
+        ("send_keys", "蓝牙", True),
+        ("press", "enter"),
+        ("swipe", 540, 1500, 540, 500, 0.1),
+    ]
+    assert batch.results[1].point == (540, 260)
+
+
+def test_sync_starts_a_new_snapshot():
+    device = RecordingDevice()
+    batch = BaseTest(device).batch(timeout=1.0)
+    batch.tap({"text": "显示"}).sync().tap({"text": "声音"}).run()
+    assert [c[0] for c in device.calls].count("dump_hierarchy") == 2
+
+
+def test_missing_selector_fails_and_skips_rest():
+    device = RecordingDevice()
+    batch = BaseTest(device).batch(timeout=0.2)
+    batch.press("home").tap({"text": "不存在"}).press("back")
+    with pytest.raises(TimeoutError):
+        batch.run()
+    results = batch.results
+    assert results[0].ok and isinstance(results[1].error, TimeoutError)
+    assert results[2].skipped
+    assert ("press", "home") in device.calls
+    assert ("press", "back") not in device.calls
+
+
+def test_continue_on_error_without_raising():
+    device = RecordingDevice()
+    batch = BaseTest(device).batch(timeout=0.2, stop_on_error=False)
+    batch.raise_on_error = False
+    batch.tap({"text": "不存在"}).sync().press("back")
+    results = batch.run()
+    assert [r.ok for r in results] == [False, True]
+    assert ("press", "back") in device.calls
+
+
+def test_ui_changed_runs_after_the_batch():
+    device = RecordingDevice()
+    changes = []
+
+    class Test(BaseTest):
+        def _ui_changed(self):
+            changes.append(len(device.calls))
+
+    with Test(device).batch(timeout=1.0) as batch:
+        batch.tap({"text": "显示"}).press("back")
+        assert changes == []
+    assert changes == [len(device.calls)] == [3]
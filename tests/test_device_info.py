@@ -3,9 +3,12 @@
 测试获取设备信息、屏幕信息等
 """
 import pytest
-import uiautomator2 as u2
+from typing import TYPE_CHECKING
 from base.base_test import BaseTest
 
+if TYPE_CHECKING:
+    import uiautomator2 as u2
+
 
 class TestDeviceInfo(BaseTest):
     """设备信息测试类"""
@@ -16,7 +19,7 @@ class TestDeviceInfo(BaseTest):
     
     @pytest.mark.smoke
     @pytest.mark.android
-    def test_device_basic_info(self, device: u2.Device):
+    def test_device_basic_info(self, device: "u2.Device"):
         """
         测试获取设备基本信息
         """
@@ -35,7 +38,7 @@ class TestDeviceInfo(BaseTest):
         self.logger.info(f"型号: {info.get('model')}")
     
     @pytest.mark.android
-    def test_device_serial(self, device: u2.Device):
+    def test_device_serial(self, device: "u2.Device"):
         """
         测试获取设备序列号
         """
@@ -45,7 +48,7 @@ class TestDeviceInfo(BaseTest):
         self.logger.info(f"设备序列号: {serial}")
     
     @pytest.mark.android
-    def test_window_size(self, device: u2.Device):
+    def test_window_size(self, device: "u2.Device"):
         """
         测试获取屏幕尺寸
         """
@@ -58,7 +61,7 @@ class TestDeviceInfo(BaseTest):
         self.logger.info(f"屏幕方向: {'横屏' if width > height else '竖屏'}")
     
     @pytest.mark.android
-    def test_display_info(self, device: u2.Device):
+    def test_display_info(self, device: "u2.Device"):
         """
         测试获取显示信息
         """
@@ -75,7 +78,7 @@ class TestDeviceInfo(BaseTest):
                 self.logger.info(f"显示密度: {display['density']}")
     
     @pytest.mark.android
-    def test_device_orientation(self, device: u2.Device):
+    def test_device_orientation(self, device: "u2.Device"):
         """
         测试获取设备方向
         """
@@ -85,7 +88,7 @@ class TestDeviceInfo(BaseTest):
         self.logger.info(f"设备方向: {orientation}")
     
     @pytest.mark.android
-    def test_device_wake_up(self, device: u2.Device):
+    def test_device_wake_up(self, device: "u2.Device"):
         """
         测试唤醒设备
         """
@@ -97,7 +100,7 @@ class TestDeviceInfo(BaseTest):
         assert info is not None, "设备未唤醒"
     
     @pytest.mark.android
-    def test_device_screen_on(self, device: u2.Device):
+    def test_device_screen_on(self, device: "u2.Device"):
         """
         测试检查屏幕是否点亮
         """
@@ -105,7 +108,7 @@ class TestDeviceInfo(BaseTest):
         self.logger.info(f"屏幕状态: {'点亮' if is_screen_on else '熄灭'}")
     
     @pytest.mark.android
-    def test_device_battery_info(self, device: u2.Device):
+    def test_device_battery_info(self, device: "u2.Device"):
         """
         测试获取电池信息
         """
@@ -118,7 +121,7 @@ class TestDeviceInfo(BaseTest):
             self.logger.warning(f"获取电池信息失败: {e}")
     
     @pytest.mark.android
-    def test_device_memory_info(self, device: u2.Device):
+    def test_device_memory_info(self, device: "u2.Device"):
         """
         测试获取内存信息
         """
@@ -130,7 +133,7 @@ class TestDeviceInfo(BaseTest):
             self.logger.warning(f"获取内存信息失败: {e}")
     
     @pytest.mark.android
-    def test_device_cpu_info(self, device: u2.Device):
+    def test_device_cpu_info(self, device: "u2.Device"):
         """
         测试获取 CPU 信息
         """
@@ -141,3 +144,20 @@ class TestDeviceInfo(BaseTest):
         except Exception as e:
             self.logger.warning(f"获取 CPU 信息失败: {e}")
 
+    
+    @pytest.mark.android
+    def test_device_resource_info_batch(self, device_manager):
+        """
+        测试一次 shell 调用获取电池、内存和 CPU 信息
+        """
+        battery, mem_info, cpu_info = device_manager.shell_batch([
+            "dumpsys battery | grep level",
+            "cat /proc/meminfo | head -3",
+            "cat /proc/cpuinfo | head -10",
+        ])
+        
+        assert mem_info.ok, f"读取内存信息失败: {mem_info.output}"
+        assert "MemTotal" in mem_info.output
+        self.logger.info(f"电池信息: {battery.output.strip()}")
+        self.logger.info(f"内存信息:\n{mem_info.output}")
+        self.logger.info(f"CPU 信息:\n{cpu_info.output}")
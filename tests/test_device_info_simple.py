@@ -2,16 +2,20 @@
 简化版设备信息测试
 直接使用函数式测试，避免类继承问题
 """
+import logging
 import pytest
-import uiautomator2 as u2
-from utils.logger import setup_logger
+from typing import TYPE_CHECKING
+from utils.logger import LOGGER_NAME
 
-logger = setup_logger()
+if TYPE_CHECKING:
+    import uiautomator2 as u2
+
+logger = logging.getLogger(LOGGER_NAME)
 
 
 @pytest.mark.smoke
 @pytest.mark.android
-def test_device_basic_info(device: u2.Device):
+def test_device_basic_info(device: "u2.Device"):
     """
     测试获取设备基本信息
     """
@@ -31,7 +35,7 @@ def test_device_basic_info(device: u2.Device):
 
 
 @pytest.mark.android
-def test_device_serial(device: u2.Device):
+def test_device_serial(device: "u2.Device"):
     """
     测试获取设备序列号
     """
@@ -43,7 +47,7 @@ def test_device_serial(device: u2.Device):
 
 
 @pytest.mark.android
-def test_window_size(device: u2.Device):
+def test_window_size(device: "u2.Device"):
     """
     测试获取屏幕尺寸
     """
@@ -58,7 +62,7 @@ def test_window_size(device: u2.Device):
 
 
 @pytest.mark.android
-def test_device_orientation(device: u2.Device):
+def test_device_orientation(device: "u2.Device"):
     """
     测试获取设备方向
     """
@@ -70,7 +74,7 @@ def test_device_orientation(device: u2.Device):
 
 
 @pytest.mark.android
-def test_device_wake_up(device: u2.Device):
+def test_device_wake_up(device: "u2.Device"):
     """
     测试唤醒设备
     """
@@ -0,0 +1,138 @@
+"""
+设备池测试用例
+使用虚拟序列号和替身连接函数，无需连接设备
+"""
+import os
+import json
+import subprocess
+import sys
+import pytest
+from utils.device_pool import DevicePool
+
+
+class FakeDevice:
+    """只实现 info 的设备替身"""
+
+    def __init__(self, serial: str):
+        self.serial = serial
+        self.info = {"productName": f"fake-{serial}"}
+
+
+def make_connect(broken=()):
+    """创建替身连接函数，broken 中的序列号连接失败"""
+    def connect(serial):
+        if serial in broken:
+            raise ConnectionError(f"{serial} offline")
+        return FakeDevice(serial)
+    return connect
+
+
+@pytest.fixture
+def lease_file(tmp_path):
+    return str(tmp_path / "device_pool.json")
+
+
+def dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_each_worker_leases_a_distinct_device(lease_file):
+    pool = DevicePool(lease_file, serials=["A", "B"], connect_func=make_connect())
+    pool.reset()
+    first = pool.acquire("gw0")
+    second = pool.acquire("gw1")
+    assert {first.serial, second.serial} == {"A", "B"}
+    assert pool.acquire("gw2") is None
+    # 同一 worker 重复申请得到同一台设备
+    assert pool.acquire("gw0").serial == first.serial
+
+
+def test_release_makes_device_available(lease_file):
+    pool = DevicePool(lease_file, serials=["A"], connect_func=make_connect())
+    pool.reset()
+    assert pool.acquire("gw0").serial == "A"
+    pool.release("gw0")
+    assert pool.acquire("gw1").serial == "A"
+
+
+def test_failed_connect_marks_bad_and_releases(lease_file):
+    pool = DevicePool(lease_file, serials=["A", "B"], connect_func=make_connect(broken={"A"}))
+    pool.reset()
+    manager = pool.acquire("gw0")
+    assert manager.serial == "B"
+    usage = pool.utilization()["devices"]
+    assert usage["A"]["bad"] and usage["A"]["holder"] is None
+    assert usage["B"]["holder"] == "gw0"
+
+
+def test_mark_good_returns_device_to_its_worker(lease_file):
+    pool = DevicePool(lease_file, serials=["A"], connect_func=make_connect())
+    pool.reset()
+    assert pool.acquire("gw0").serial == "A"
+    pool.mark_bad("A")
+    assert pool.acquire("gw1") is None
+    pool.mark_good("A", "gw0")
+    usage = pool.utilization()["devices"]
+    assert not usage["A"]["bad"] and usage["A"]["holder"] == "gw0"
+    assert pool.acquire("gw1") is None
+    pool.release("gw0")
+    assert pool.acquire("gw1").serial == "A"
+
+
+def test_crashed_worker_lease_is_reclaimed(lease_file):
+    pool = DevicePool(lease_file, serials=["A"], connect_func=make_connect())
+    pool.reset()
+    with open(lease_file, encoding="utf-8") as f:
+        state = json.load(f)
+    state["leases"]["A"] = {"worker": "gw0", "pid": dead_pid(), "since": state["started_at"]}
+    with open(lease_file, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+
+    assert pool.acquire("gw1").serial == "A"
+    assert pool.utilization()["devices"]["A"]["leases"] == 1
+
+
+def test_utilization_reports_every_device(lease_file):
+    pool = DevicePool(lease_file, serials=["A", "B"], connect_func=make_connect())
+    pool.reset()
+    pool.acquire("gw0")
+    pool.release("gw0")
+    usage = pool.utilization()
+    assert set(usage["devices"]) == {"A"}
+    assert usage["devices"]["A"]["leases"] == 1
+    assert 0.0 <= usage["devices"]["A"]["utilization"] <= 1.0
+    assert os.path.exists(lease_file)
+
+
+def test_discovery_is_used_when_no_serials(lease_file):
+    pool = DevicePool(lease_file, connect_func=make_connect(), discover_func=lambda: ["X"])
+    pool.reset()
+    assert pool.acquire("master").serial == "X"
+
+
+def test_failed_discovery_falls_back_to_default_device(lease_file):
+    connected = []
+    pool = DevicePool(
+        lease_file,
+        connect_func=lambda serial: connected.append(serial) or FakeDevice("auto"),
+        discover_func=lambda: [],
+    )
+    assert pool.acquire("master") is not None
+    assert connected == [None]
+
+
+def test_new_session_discards_previous_leases(lease_file):
+    previous = DevicePool(lease_file, serials=["A"], connect_func=make_connect(), session="old")
+    previous.acquire("gw0")
+    assert previous.utilization()["devices"]["A"]["holder"] == "gw0"
+
+    pool = DevicePool(lease_file, serials=["A"], connect_func=make_connect(), session="new")
+    assert pool.utilization()["devices"] == {}
+    assert pool.acquire("gw1").serial == "A"
+
+
+def test_utilization_does_not_create_lease_file(lease_file):
+    assert DevicePool(lease_file).utilization()["devices"] == {}
+    assert not os.path.exists(lease_file) and not os.path.exists(lease_file + ".lock")
@@ -0,0 +1,76 @@
+"""
+设备静态信息缓存测试用例
+使用设备替身，无需连接设备
+"""
+from utils.device_manager import DeviceManager
+from utils.device_profile import DeviceProfileCache, parse_getprop, parse_display
+from utils.fake_device import FakeDevice
+
+
+def connected_manager(tmp_path, device: FakeDevice) -> DeviceManager:
+    manager = DeviceManager(
+        {"serial": device.serial, "profile_dir": str(tmp_path)},
+        connect_func=lambda serial: device
+    )
+    manager.connect()
+    device.reset_counters()
+    return manager
+
+
+def test_parsers():
+    props = parse_getprop("[ro.product.model]: [Pixel 7]\n[ro.empty]: []\nnoise\n")
+    assert props == {"ro.product.model": "Pixel 7", "ro.empty": ""}
+    display = parse_display(
+        "Physical size: 1080x2400\nOverride size: 720x1600\n",
+        "Physical density: 420\n"
+    )
+    assert display == {"width": 720, "height": 1600, "density": 420}
+
+
+def test_static_fields_fetched_once_and_persisted(tmp_path):
+    device = FakeDevice(serial="192.168.1.5:5555")
+    manager = connected_manager(tmp_path, device)
+    info = manager.get_device_info(dynamic=False)
+    assert info["model"] == "Fake Phone"
+    assert info["sdk"] == 33
+    assert info["display"] == {"width": 1080, "height": 2340, "density": 420}
+    assert device.rpc_counts["shell"] == 1
+    assert device.rpc_counts["deviceInfo"] == 0
+
+    manager.get_device_info(dynamic=False)
+    assert device.rpc_counts["shell"] == 1
+    assert (tmp_path / "192.168.1.5_5555.json").exists()
+
+    # 新会话：只校验一次构建指纹
+    second = connected_manager(tmp_path, device)
+    assert second.get_device_info(dynamic=False)["model"] == "Fake Phone"
+    assert device.rpc_counts["shell"] == 1
+    assert second.profiles.stats["hits"] == 1
+
+
+def test_fingerprint_change_invalidates(tmp_path):
+    device = FakeDevice()
+    connected_manager(tmp_path, device).get_profile()
+
+    device.props.update({"ro.build.fingerprint": "fake/new-build", "ro.build.version.release": "14"})
+    manager = connected_manager(tmp_path, device)
+    assert manager.get_profile()["version"] == "14"
+    assert manager.profiles.stats == {"hits": 0, "misses": 1, "invalidations": 1}
+
+
+def test_dynamic_fields_from_heartbeat(tmp_path):
+    device = FakeDevice()
+    manager = connected_manager(tmp_path, device)
+    info = manager.get_device_info()
+    assert info["current_package"] == "com.example.app"
+    assert info["screen_on"] is True
+    # connect() 的心跳仍在有效期内
+    assert device.rpc_counts["deviceInfo"] == 0
+
+
+def test_memory_only_cache():
+    device = FakeDevice()
+    cache = DeviceProfileCache()
+    assert cache.get(device, device.serial)["brand"] == "fake"
+    assert cache.get(device, device.serial) is cache.get(device, device.serial)
+    assert device.rpc_counts["shell"] == 1
@@ -0,0 +1,57 @@
+"""
+页面元素缓存测试用例
+使用设备替身，无需连接设备
+"""
+from page_objects.home_page import HomePage
+from utils.fake_device import FakeDevice, DEFAULT_HIERARCHY
+from utils.hierarchy import hierarchy_fingerprint
+
+
+def test_fingerprint_changes_with_any_attribute():
+    changed = DEFAULT_HIERARCHY.replace('text="显示"', 'text="显示设置"')
+    assert hierarchy_fingerprint(DEFAULT_HIERARCHY) == hierarchy_fingerprint(DEFAULT_HIERARCHY)
+    assert hierarchy_fingerprint(DEFAULT_HIERARCHY) != hierarchy_fingerprint(changed)
+
+
+def test_repeated_reads_reuse_parsed_snapshot():
+    device = FakeDevice()
+    page = HomePage(device)
+    assert page.get_text({"text": "显示"}) == "显示"
+    parsed = page.element_cache.snapshot
+    assert page.get_text({"text": "显示"}) == "显示"
+    assert page.wait_for_element({"text": "显示"}, timeout=0.1)
+    # 每次查找都 dump 校验指纹，界面未变化时复用已解析的快照和节点
+    assert device.rpc_counts["dumpWindowHierarchy"] == 3
+    assert page.element_cache.snapshot is parsed
+    assert page.cache_stats()["hits"] == 2
+    assert page.cache_stats()["misses"] == 1
+
+
+def test_change_outside_base_test_is_seen():
+    device = FakeDevice()
+    page = HomePage(device)
+    assert page.wait_for_element({"text": "显示"}, timeout=0.1)
+    # 不经过 BaseTest 的操作（启动应用、直接调用设备、异步加载）改变了界面
+    device.set_hierarchy(DEFAULT_HIERARCHY.replace('text="显示"', 'text="声音设置"'))
+    assert page.find_element({"text": "显示"}, timeout=0.2, raise_exception=False) is None
+    assert not page.wait_for_element({"text": "显示"}, timeout=0.2, raise_exception=False)
+    assert page.cache_stats()["invalidations"] == 1
+
+
+def test_action_requires_fingerprint_check():
+    device = FakeDevice()
+    page = HomePage(device)
+    page.click_search_box()
+    parsed = page.element_cache.snapshot
+    # 界面未变化时复用已解析的快照
+    page.click_search_box()
+    assert device.rpc_counts["dumpWindowHierarchy"] == 2
+    assert page.element_cache.snapshot is parsed
+    assert page.cache_stats()["invalidations"] == 0
+
+    device.set_hierarchy(DEFAULT_HIERARCHY.replace('focused="false" scrollable="false" bounds="[40,120]',
+                                                   'focused="true" scrollable="false" bounds="[40,120]'))
+    page.press_back()
+    page.click_search_box()
+    assert page.element_cache.snapshot is not parsed
+    assert page.cache_stats()["invalidations"] == 1
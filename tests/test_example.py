@@ -3,16 +3,19 @@
 演示如何使用框架进行测试
 """
 import pytest
-import uiautomator2 as u2
+from typing import TYPE_CHECKING
 from base.base_test import BaseTest
 from page_objects.home_page import HomePage
 
+if TYPE_CHECKING:
+    import uiautomator2 as u2
+
 
 class TestExample(BaseTest):
     """示例测试类"""
     
     @pytest.fixture(autouse=True)
-    def setup(self, device: u2.Device):
+    def setup(self, device: "u2.Device"):
         """测试设置"""
         super().__init__(device)
         self.setup_method()
@@ -21,7 +24,7 @@ class TestExample(BaseTest):
     
     @pytest.mark.smoke
     @pytest.mark.android
-    def test_device_connection(self, device: u2.Device):
+    def test_device_connection(self, device: "u2.Device"):
         """
         测试设备连接
         验证设备是否可以正常连接并获取信息
@@ -38,7 +41,7 @@ class TestExample(BaseTest):
     
     @pytest.mark.smoke
     @pytest.mark.android
-    def test_screenshot(self, device: u2.Device):
+    def test_screenshot(self, device: "u2.Device"):
         """
         测试截图功能
         """
@@ -48,16 +51,15 @@ class TestExample(BaseTest):
     
     @pytest.mark.regression
     @pytest.mark.android
-    def test_swipe_gesture(self, device: u2.Device):
+    def test_swipe_gesture(self, device: "u2.Device"):
         """
         测试滑动手势
         """
         # 向上滑动
         self.swipe("up", distance=0.3)
         
-        # 等待一下
-        import time
-        time.sleep(1)
+        # 等待界面稳定
+        self.wait_for_ui_idle()
         
         # 向下滑动
         self.swipe("down", distance=0.3)
@@ -66,7 +68,7 @@ class TestExample(BaseTest):
     
     @pytest.mark.smoke
     @pytest.mark.android
-    def test_home_page_example(self, device: u2.Device):
+    def test_home_page_example(self, device: "u2.Device"):
         """
         测试首页示例（需要根据实际应用调整）
         演示如何使用页面对象模式
@@ -84,7 +86,7 @@ class TestExample(BaseTest):
         self.logger.info("首页测试完成")
     
     @pytest.mark.android
-    def test_app_launch(self, device: u2.Device, app_package: str = "com.android.settings"):
+    def test_app_launch(self, device: "u2.Device", app_package: str = "com.android.settings"):
         """
         测试应用启动
         
@@ -108,7 +110,7 @@ class TestExample(BaseTest):
 
 
 @pytest.mark.android
-def test_simple_example(device: u2.Device):
+def test_simple_example(device: "u2.Device"):
     """
     简单的函数式测试示例
     """
@@ -0,0 +1,79 @@
+"""
+设备替身与基准测试脚本测试用例
+无需连接设备
+"""
+import json
+import time
+from base.base_test import BaseTest
+from page_objects.home_page import HomePage
+from utils.device_manager import DeviceManager
+from utils.fake_device import FakeDevice
+from benchmarks.bench_framework import compare, main
+from benchmarks import bench_startup
+
+
+def test_fake_device_serves_hierarchy_and_counts_rpcs():
+    device = FakeDevice()
+    base = BaseTest(device)
+    assert base.get_text({"text": "显示"}) == "显示"
+    base.click_element({"description": "设置"})
+    assert device.actions[-1] == ("click", 990, 2270)
+    assert device.rpc_counts["dumpWindowHierarchy"] == 2
+    assert device.rpc_counts["click"] == 1
+
+
+def test_input_text_uses_snapshot_node():
+    device = FakeDevice()
+    BaseTest(device).input_text(HomePage.SEARCH_BOX, "abc")
+    assert device.actions[-2:] == [("click", 470, 180), ("send_keys", "abc", True)]
+    assert device.rpc_counts["dumpWindowHierarchy"] == 1
+
+
+def test_fake_device_ui_object_and_shell():
+    device = FakeDevice(shell_outputs={"getprop ro.build.fingerprint": "fp", "false": ("", 1)})
+    assert device(**HomePage.SEARCH_BOX).exists
+    assert not device(text="不存在").exists
+    assert device(resourceId="android:id/title").count == 5
+    assert device.shell("getprop ro.build.fingerprint").output == "fp"
+    assert device.shell(["false"]).exit_code == 1
+    assert device.screenshot().size == (270, 585)
+
+
+def test_fake_device_with_page_and_manager():
+    device = FakeDevice()
+    assert HomePage(device).is_page_loaded(timeout=0.1)
+    manager = DeviceManager({"serial": device.serial}, connect_func=lambda serial: device)
+    assert manager.connect() is device
+    assert manager.get_device_info()["product_name"] == "fake_phone"
+
+
+def test_fake_device_injects_latency():
+    device = FakeDevice(latency=0.0, latencies={"pressKey": 0.02})
+    start = time.perf_counter()
+    device.press("back")
+    assert time.perf_counter() - start >= 0.02
+
+
+def test_benchmark_writes_report_and_detects_regression(tmp_path):
+    output = tmp_path / "benchmark.json"
+    assert main(["--iterations", "5", "--output", str(output), "--only", "helpers", "base.find"]) == 0
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert set(report["benchmarks"]) == {"helpers.wait_for", "base.find_element"}
+
+    slower = json.loads(json.dumps(report))
+    slower["benchmarks"]["base.find_element"]["overhead_ms"] += 10.0
+    assert compare(slower, report) == ["base.find_element: {:.4f}ms -> {:.4f}ms".format(
+        report["benchmarks"]["base.find_element"]["overhead_ms"],
+        slower["benchmarks"]["base.find_element"]["overhead_ms"],
+    )]
+    assert compare(report, slower) == []
+
+
+def test_startup_does_not_load_heavy_dependencies():
+    result = bench_startup.measure_import(repeat=1)
+    assert result["heavy_modules"] == []
+
+    regressed = {"benchmarks": {"import.framework": dict(result, heavy_modules=["numpy"])}}
+    baseline = {"benchmarks": {"import.framework": result}}
+    assert bench_startup.compare(regressed, baseline) == ["import.framework: 导入时新加载了 numpy"]
+    assert bench_startup.compare(baseline, baseline) == []
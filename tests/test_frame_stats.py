@@ -0,0 +1,130 @@
+"""
+帧耗时统计测试用例
+解析器使用录制的 gfxinfo 输出，采集器使用设备替身，无需连接设备
+"""
+import pytest
+from utils.fake_device import FakeDevice
+from utils.frame_stats import (
+    FrameStats, FrameStatsCollector, FrameThresholdError, parse_framestats, parse_counters,
+)
+
+# Android 10 的 framestats（无 FrameDeadline 列）：第一行 Flags=1 为窗口首帧，
+# 其余三帧耗时 8ms、12ms、40ms，最后一帧晚了两个 vsync
+LEGACY_OUTPUT = """Applications Graphics Acceleration Info:
+Uptime: 1166284 Realtime: 1166284
+
+** Graphics info for pid 12345 [com.android.settings] **
+
+Stats since: 1150000000000ns
+Total frames rendered: 4
+Janky frames: 1 (25.00%)
+50th percentile: 12ms
+90th percentile: 40ms
+95th percentile: 40ms
+99th percentile: 40ms
+Number Missed Vsync: 2
+Number High input latency: 0
+Number Slow UI thread: 1
+
+---PROFILEDATA---
+Flags,IntendedVsync,Vsync,OldestInputEvent,NewestInputEvent,HandleInputStart,AnimationStart,PerformTraversalsStart,DrawStart,SyncQueued,SyncStart,IssueDrawCommandsStart,SwapBuffers,FrameCompleted,DequeueBufferDuration,QueueBufferDuration,
+1,1000000000000,1000000000000,0,0,1000000100000,1000000200000,1000000300000,1000000400000,1000000500000,1000000600000,1000000700000,1000000800000,1000090000000,0,0,
+0,1000016666667,1000016666667,0,0,1000016766667,1000016866667,1000016966667,1000017066667,1000017166667,1000017266667,1000017366667,1000017466667,1000024666667,0,0,
+0,1000033333334,1000033333334,0,0,1000033433334,1000033533334,1000033633334,1000033733334,1000033833334,1000033933334,1000034033334,1000034133334,1000045333334,0,0,
+0,1000050000001,1000083333335,0,0,1000083433335,1000083533335,1000083633335,1000083733335,1000083833335,1000083933335,1000084033335,1000084133335,1000090000001,0,0,
+---PROFILEDATA---
+
+View hierarchy:
+"""
+
+# Android 12+ 的 framestats：以 FrameDeadline 判定卡顿
+MODERN_HEADER = ("Flags,FrameTimelineVsyncId,IntendedVsync,Vsync,InputEventId,HandleInputStart,AnimationStart,"
+                 "PerformTraversalsStart,DrawStart,FrameDeadline,FrameInterval,FrameStartTime,SyncQueued,SyncStart,"
+                 "IssueDrawCommandsStart,SwapBuffers,FrameCompleted,DequeueBufferDuration,QueueBufferDuration,"
+                 "GpuCompleted,SwapBuffersCompleted,DisplayPresentTime,")
+
+
+def modern_output(frames, start=2000000000000, interval=8333333):
+    """生成 120Hz 设备的 framestats，frames 为每帧耗时（毫秒）"""
+    rows = []
+    for i, duration_ms in enumerate(frames):
+        intended = start + i * interval
+        completed = intended + int(duration_ms * 1e6)
+        values = [0, i, intended, intended, 0] + [intended] * 4 + [intended + 2 * interval, interval]
+        values += [intended] * 5 + [completed, 0, 0, completed, completed, 0]
+        rows.append(",".join(str(v) for v in values) + ",")
+    return "\n".join([
+        f"Total frames rendered: {len(frames)}",
+        "---PROFILEDATA---", MODERN_HEADER, *rows, "---PROFILEDATA---", "",
+    ])
+
+
+def test_parse_legacy_output():
+    columns = parse_framestats(LEGACY_OUTPUT)
+    assert len(columns["Flags"]) == 4
+    assert parse_counters(LEGACY_OUTPUT) == {"total_frames": 4, "janky_frames": 1, "missed_vsync": 2}
+
+    stats = FrameStats.from_output(LEGACY_OUTPUT)
+    assert stats.frames == 3
+    assert stats.durations_ms.round(3).tolist() == [8.0, 12.0, 40.0]
+    assert stats.missed_vsync.tolist() == [0, 0, 2]
+    assert stats.jank_ratio == 0.25
+    assert stats.summary()["p50_ms"] == 12.0
+
+
+def test_modern_output_uses_frame_deadline():
+    # 120Hz 下截止时间为两个间隔后（16.7ms），只有 20ms 的帧算卡顿
+    stats = FrameStats.from_output(modern_output([5, 10, 15, 20]), frame_interval_ns=8333333)
+    assert stats.janky.tolist() == [False, False, False, True]
+    assert stats.jank_ratio == 0.25
+    assert stats.summary()["max_ms"] == 20.0
+
+
+def test_thresholds():
+    stats = FrameStats.from_output(LEGACY_OUTPUT)
+    assert stats.violations(max_p95_ms=50, max_jank_ratio=0.3, max_missed_vsync=2) == []
+    problems = stats.violations(max_p95_ms=20, max_jank_ratio=0.1)
+    assert len(problems) == 2
+    with pytest.raises(FrameThresholdError):
+        stats.assert_smooth(max_p95_ms=20)
+    stats.assert_smooth(max_p95_ms=50, max_jank_ratio=0.3)
+
+
+def test_empty_output():
+    stats = FrameStats.from_output("No process found for: com.example.app\n")
+    assert stats.frames == 0
+    assert stats.summary()["p95_ms"] is None
+    assert stats.violations(max_p95_ms=1, max_jank_ratio=0.0) == []
+
+
+def test_collector_reports_failed_collect():
+    def offline(*args, **kwargs):
+        raise ConnectionError("adb offline")
+
+    device = FakeDevice()
+    frames = FrameStatsCollector(device, "com.android.settings")
+    with pytest.raises(RuntimeError, match="帧耗时失败"):
+        with frames:
+            device.shell = offline
+    assert frames.stats.frames == 0
+
+    # with 块内的异常不被读取失败掩盖
+    device = FakeDevice()
+    with pytest.raises(LookupError):
+        with FrameStatsCollector(device, "com.android.settings") as frames:
+            device.shell = offline
+            raise LookupError("element missing")
+    assert frames.stats.frames == 0
+
+
+def test_collector_resets_and_merges_samples():
+    package = "com.android.settings"
+    command = f"dumpsys gfxinfo {package} framestats"
+    device = FakeDevice(shell_outputs={command: modern_output([5, 6])})
+    with FrameStatsCollector(device, package, frame_interval_ns=8333333) as frames:
+        frames.sample()
+        # 后一次读取与前一次有重叠的帧
+        device.shell_outputs[command] = modern_output([6, 30, 7], start=2000000000000 + 8333333)
+    assert device.actions[0] == ("shell", f"dumpsys gfxinfo {package} reset")
+    assert frames.stats.durations_ms.round(3).tolist() == [5.0, 6.0, 30.0, 7.0]
+    assert frames.stats.janky.sum() == 1
@@ -3,16 +3,18 @@
 测试滑动、拖拽、缩放等手势操作
 """
 import pytest
-import uiautomator2 as u2
-import time
+from typing import TYPE_CHECKING
 from base.base_test import BaseTest
 
+if TYPE_CHECKING:
+    import uiautomator2 as u2
+
 
 class TestGestureOperations(BaseTest):
     """手势操作测试类"""
     
     @pytest.fixture(autouse=True)
-    def setup(self, device: u2.Device):
+    def setup(self, device: "u2.Device"):
         """测试设置"""
         super().__init__(device)
         self.setup_method()
@@ -21,75 +23,71 @@ class TestGestureOperations(BaseTest):
     
     @pytest.mark.smoke
     @pytest.mark.android
-    def test_swipe_up(self, device: u2.Device):
+    def test_swipe_up(self, device: "u2.Device", app_session):
         """
         测试向上滑动
         """
-        device.app_start("com.android.settings")
-        device.app_wait("com.android.settings", timeout=10.0)
-        time.sleep(2)
+        app_session("com.android.settings")
+        self.wait_for_ui_idle()
         
         # 向上滑动
         self.swipe("up", distance=0.5)
-        time.sleep(1)
+        self.wait_for_ui_idle()
         self.take_screenshot("swipe_up")
         self.logger.info("向上滑动完成")
     
     @pytest.mark.android
-    def test_swipe_down(self, device: u2.Device):
+    def test_swipe_down(self, device: "u2.Device", app_session):
         """
         测试向下滑动
         """
-        device.app_start("com.android.settings")
-        device.app_wait("com.android.settings", timeout=10.0)
-        time.sleep(2)
+        app_session("com.android.settings")
+        self.wait_for_ui_idle()
         
         # 先向上滑动
         self.swipe("up", distance=0.5)
-        time.sleep(1)
+        self.wait_for_ui_idle()
         
         # 再向下滑动
         self.swipe("down", distance=0.5)
-        time.sleep(1)
+        self.wait_for_ui_idle()
         self.take_screenshot("swipe_down")
         self.logger.info("向下滑动完成")
     
     @pytest.mark.android
-    def test_swipe_left(self, device: u2.Device):
+    def test_swipe_left(self, device: "u2.Device", app_session):
         """
         测试向左滑动
         """
-        device.app_start("com.android.settings")
-        device.app_wait("com.android.settings", timeout=10.0)
-        time.sleep(2)
+        app_session("com.android.settings")
+        self.wait_for_ui_idle()
         
         # 向左滑动
         self.swipe("left", distance=0.5)
-        time.sleep(1)
+        self.wait_for_ui_idle()
         self.take_screenshot("swipe_left")
         self.logger.info("向左滑动完成")
     
     @pytest.mark.android
-    def test_swipe_right(self, device: u2.Device):
+    def test_swipe_right(self, device: "u2.Device", app_session):
         """
         测试向右滑动
         """
-        device.app_start("com.android.settings")
-        device.app_wait("com.android.settings", timeout=10.0)
-        time.sleep(2)
+        app_session("com.android.settings")
+        self.wait_for_ui_idle()
         
         # 先向左滑动
         self.swipe("left", distance=0.5)
-        time.sleep(1)
+        self.wait_for_ui_idle()
         
         # 再向右滑动
         self.swipe("right", distance=0.5)
-        time.sleep(1)
+        self.wait_for_ui_idle()
         self.take_screenshot("swipe_right")
         self.logger.info("向右滑动完成")
     
     @pytest.mark.android
-    def test_swipe_custom(self, device: u2.Device):
+    def test_swipe_custom(self, device: "u2.Device"):
         """
         测试自定义滑动
         """
@@ -101,11 +99,11 @@ class TestGestureOperations(BaseTest):
             width // 2, height // 4,
             duration=0.5
         )
-        time.sleep(1)
+        self.wait_for_ui_idle()
         self.logger.info("自定义滑动完成")
     
     @pytest.mark.android
-    def test_drag(self, device: u2.Device):
+    def test_drag(self, device: "u2.Device"):
         """
         测试拖拽操作
         """
@@ -117,71 +115,100 @@ class TestGestureOperations(BaseTest):
             width // 2, height // 4,
             duration=0.5
         )
-        time.sleep(1)
+        self.wait_for_ui_idle()
         self.logger.info("拖拽操作完成")
     
     @pytest.mark.android
-    def test_pinch_in(self, device: u2.Device):
+    def test_pinch_in(self, device: "u2.Device"):
         """
         测试捏合手势（缩小）
         """
-        width, height = device.window_size()
-        center_x, center_y = width // 2, height // 2
-        
         # 捏合手势（两个点向内移动）
-        device.pinch_in(percent=50, steps=10)
-        time.sleep(1)
+        self.pinch(0.5, steps=10)
+        self.wait_for_ui_idle()
         self.logger.info("捏合手势完成")
     
     @pytest.mark.android
-    def test_pinch_out(self, device: u2.Device):
+    def test_pinch_out(self, device: "u2.Device"):
         """
         测试放大手势
         """
         # 放大手势（两个点向外移动）
-        device.pinch_out(percent=50, steps=10)
-        time.sleep(1)
+        self.pinch(2.0, steps=10)
+        self.wait_for_ui_idle()
         self.logger.info("放大手势完成")
     
     @pytest.mark.android
-    def test_scroll(self, device: u2.Device):
+    def test_multi_stroke(self, device: "u2.Device"):
+        """
+        测试一次注入多段滑动
+        """
+        left, top, right, bottom = self.gestures.screen_box()
+        center_x, center_y = right // 2, bottom // 2
+        
+        # 先向上再向下，一次 shell 调用完成
+        self.gestures.strokes([
+            ((center_x, center_y), (center_x, center_y - bottom // 4)),
+            ((center_x, center_y - bottom // 4), (center_x, center_y)),
+        ])
+        self.wait_for_ui_idle()
+        self.logger.info("多段滑动完成")
+    
+    @pytest.mark.android
+    def test_scroll(self, device: "u2.Device", app_session):
         """
         测试滚动操作
         """
-        device.app_start("com.android.settings")
-        device.app_wait("com.android.settings", timeout=10.0)
-        time.sleep(2)
+        app_session("com.android.settings")
+        self.wait_for_ui_idle()
         
         # 向下滚动
         device(scrollable=True).scroll.vert.forward(steps=10)
-        time.sleep(1)
+        self.wait_for_ui_idle()
         self.take_screenshot("scroll_down")
         
         # 向上滚动
         device(scrollable=True).scroll.vert.backward(steps=10)
-        time.sleep(1)
+        self.wait_for_ui_idle()
         self.take_screenshot("scroll_up")
         
         self.logger.info("滚动操作完成")
     
     @pytest.mark.android
-    def test_fling(self, device: u2.Device):
+    def test_scroll_smoothness(self, device: "u2.Device", app_session, frame_stats):
+        """
+        测试滚动帧耗时
+        """
+        app_session("com.android.settings")
+        self.wait_for_ui_idle()
+        
+        # framestats 只保留最近 120 帧，每次滑动后读取一次
+        with frame_stats("com.android.settings") as frames:
+            for _ in range(3):
+                self.swipe("up", distance=0.6)
+                frames.sample()
+            self.swipe("down", distance=0.6)
+        
+        self.logger.info(f"滚动帧耗时: {frames.stats.summary()}")
+        frames.stats.assert_smooth()
+    
+    @pytest.mark.android
+    def test_fling(self, device: "u2.Device", app_session):
         """
         测试快速滑动（fling）
         """
-        device.app_start("com.android.settings")
-        device.app_wait("com.android.settings", timeout=10.0)
-        time.sleep(2)
+        app_session("com.android.settings")
+        self.wait_for_ui_idle()
         
         # 快速向下滑动
         try:
             device(scrollable=True).fling.vert.forward()
-            time.sleep(2)
+            self.wait_for_ui_idle()
             self.take_screenshot("fling_down")
             
             # 快速向上滑动
             device(scrollable=True).fling.vert.backward()
-            time.sleep(2)
+            self.wait_for_ui_idle()
             self.take_screenshot("fling_up")
             
             self.logger.info("快速滑动完成")
@@ -0,0 +1,112 @@
+"""
+手势引擎测试用例
+使用设备替身，无需连接设备
+"""
+import pytest
+from base.base_test import BaseTest
+from page_objects.home_page import HomePage
+from utils.fake_device import FakeDevice, DEFAULT_HIERARCHY
+from utils.gestures import GestureEngine, direction_points, interpolate
+
+
+def test_direction_points():
+    box = (0, 0, 1000, 2000)
+    assert direction_points(box, "up", 0.5) == ((500, 1500), (500, 500))
+    assert direction_points(box, "right", 0.8) == ((100, 1000), (900, 1000))
+    with pytest.raises(ValueError):
+        direction_points(box, "diagonal")
+
+
+def test_interpolate_even_spacing():
+    points = interpolate([(0, 0), (100, 0), (100, 100)], steps=4)
+    assert points == [(0, 0), (50, 0), (100, 0), (100, 50), (100, 100)]
+
+
+def test_window_size_fetched_once():
+    device = FakeDevice()
+    base = BaseTest(device)
+    for direction in ("up", "down", "left", "right", "up"):
+        base.swipe(direction)
+    assert device.rpc_counts["window_size"] == 1
+    assert device.rpc_counts["deviceInfo"] == 0
+    assert device.rpc_counts["swipe"] == 5
+    assert device.actions[0] == ("swipe", 540, 1755, 540, 585, 0.5)
+
+
+def test_rotation_invalidates_geometry():
+    device = FakeDevice()
+    base = BaseTest(device)
+    base.swipe("up")
+    base.snapshot()
+
+    device._info.update(displayWidth=2340, displayHeight=1080, displayRotation=1)
+    device.set_hierarchy(DEFAULT_HIERARCHY.replace('rotation="0"', 'rotation="1"'))
+    base.snapshot()
+    base.swipe("left")
+    assert device.rpc_counts["window_size"] == 2
+    assert device.actions[-1] == ("swipe", 1755, 540, 585, 540, 0.5)
+
+
+def test_set_orientation_refreshes_geometry_without_snapshot():
+    device = FakeDevice()
+    base = BaseTest(device)
+    base.swipe("up")
+    base.pinch(0.5)
+    base.set_orientation("left")
+    base.swipe("left")
+    assert device.rpc_counts["window_size"] == 2
+    assert device.actions[-1] == ("swipe", 1755, 540, 585, 540, 0.5)
+    base.pinch(0.5)
+    _, s1, _, _, _, _ = device.actions[-1]
+    assert s1[1] == 540
+    # 旋转后的第一次快照不再重复刷新
+    base.snapshot()
+    base.swipe("right")
+    assert device.rpc_counts["window_size"] == 2
+    assert device.rpc_counts["deviceInfo"] == 0
+
+
+def test_swipe_within_element():
+    device = FakeDevice()
+    page = HomePage(device)
+    page.swipe("up", distance=1.0, selector={"resourceId": "android:id/list"})
+    assert device.actions[-1] == ("swipe", 540, 2200, 540, 260, 0.5)
+    assert device.rpc_counts["window_size"] == 0
+
+
+def test_pinch_on_element_and_screen():
+    device = FakeDevice()
+    base = BaseTest(device)
+    base.pinch(0.5, selector={"resourceId": "com.example.app:id/search_box"}, steps=10)
+    assert device.actions[-1] == ("gesture", (410, 180), (530, 180), (440, 180), (500, 180), 10)
+
+    base.pinch(2.0)
+    _, s1, s2, e1, e2, _ = device.actions[-1]
+    assert (e2[0] - e1[0]) == pytest.approx(2 * (s2[0] - s1[0]), abs=2)
+
+
+def test_fling_uses_short_duration():
+    device = FakeDevice()
+    page = HomePage(device)
+    page.find_element(HomePage.SEARCH_BOX)
+    page.gestures.fling("up")
+    assert device.actions[-1][-1] == 0.05
+
+
+def test_polyline_single_rpc():
+    device = FakeDevice()
+    GestureEngine(device).polyline([(0, 0), (100, 0), (100, 100)], duration=0.01, steps=4)
+    assert device.rpc_counts["swipePoints"] == 1
+    assert len(device.actions[-1][1]) == 5
+
+
+def test_strokes_single_shell_call():
+    device = FakeDevice()
+    engine = GestureEngine(device)
+    engine.strokes([((0, 100), (0, 0)), ((10, 10), (20, 20))], duration=0.1)
+    assert device.rpc_counts["shell"] == 1
+    assert device.actions[-1] == ("shell", "input swipe 0 100 0 0 100; input swipe 10 10 20 20 100")
+
+    device.shell_outputs["input swipe 1 1 2 2 100"] = ("error", 1)
+    with pytest.raises(RuntimeError):
+        engine.strokes([((1, 1), (2, 2))], duration=0.1)
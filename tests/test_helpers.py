@@ -0,0 +1,81 @@
+"""
+辅助函数测试用例
+使用虚拟时钟验证轮询引擎，无需连接设备
+"""
+from utils.helpers import BackoffPolicy, poll_until, wait_for
+
+
+class FakeClock:
+    """可手动推进的单调时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_backoff_policy_grows_to_maximum():
+    policy = BackoffPolicy(initial=0.1, factor=2.0, maximum=0.5, jitter=0)
+    assert [policy.interval(n) for n in range(4)] == [0.1, 0.2, 0.4, 0.5]
+
+
+def test_backoff_policy_jitter_bounds():
+    policy = BackoffPolicy(initial=0.2, factor=1.0, maximum=0.2, jitter=0.5)
+    for n in range(50):
+        assert 0.1 <= policy.interval(n) <= 0.3
+
+
+def test_poll_until_returns_value_and_stats():
+    clock = FakeClock()
+    values = iter([None, 0, "node"])
+    result = poll_until(
+        lambda: next(values),
+        timeout=5.0,
+        policy=BackoffPolicy(initial=0.1, factor=2.0, jitter=0),
+        clock=clock,
+        sleep=clock.sleep
+    )
+    assert result.success
+    assert result.value == "node"
+    assert result.polls == 3
+    assert abs(result.elapsed - 0.3) < 1e-9
+
+
+def test_poll_until_clamps_last_check_to_deadline():
+    clock = FakeClock()
+    result = poll_until(
+        lambda: False,
+        timeout=1.0,
+        policy=BackoffPolicy(initial=0.4, factor=1.0, maximum=0.4, jitter=0),
+        clock=clock,
+        sleep=clock.sleep
+    )
+    assert not result
+    assert clock.now == 1.0
+    assert clock.sleeps[-1] == 1.0 - 0.8
+    assert result.polls == 4
+
+
+def test_poll_until_treats_exceptions_as_not_ready():
+    clock = FakeClock()
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 2:
+            raise RuntimeError("device busy")
+        return True
+
+    result = poll_until(flaky, timeout=1.0, clock=clock, sleep=clock.sleep)
+    assert result.success and result.polls == 2
+
+
+def test_wait_for_keeps_boolean_contract():
+    assert wait_for(lambda: "value", timeout=0.1) is True
+    assert wait_for(lambda: False, timeout=0.1, interval=0.05) is False
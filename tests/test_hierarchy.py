@@ -0,0 +1,79 @@
+"""
+层级快照测试用例
+使用固定的层级 XML，无需连接设备
+"""
+import pytest
+from utils.hierarchy import HierarchySnapshot, parse_bounds
+
+
+HIERARCHY_XML = """<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>
+<hierarchy rotation="0">
+  <node index="0" text="" resource-id="" class="android.widget.FrameLayout" package="com.android.settings" content-desc="" clickable="false" enabled="true" focused="false" bounds="[0,0][1080,2340]">
+    <node index="0" text="设置" resource-id="com.android.settings:id/title" class="android.widget.TextView" package="com.android.settings" content-desc="" clickable="false" enabled="true" focused="false" bounds="[40,100][400,180]" />
+    <node index="1" text="" resource-id="com.android.settings:id/search_action_bar" class="android.widget.EditText" package="com.android.settings" content-desc="搜索" clickable="true" enabled="true" focused="true" bounds="[40,200][1040,320]" />
+    <node index="2" text="显示" resource-id="com.android.settings:id/row" class="android.widget.TextView" package="com.android.settings" content-desc="" clickable="true" enabled="true" focused="false" bounds="[0,400][1080,520]" />
+    <node index="3" text="声音" resource-id="com.android.settings:id/row" class="android.widget.TextView" package="com.android.settings" content-desc="" clickable="true" enabled="true" focused="false" bounds="[0,520][1080,640]" />
+  </node>
+</hierarchy>"""
+
+
+class FakeDevice:
+    """只实现 dump_hierarchy 的设备替身"""
+
+    def __init__(self, xml: str):
+        self.xml = xml
+        self.dump_count = 0
+
+    def dump_hierarchy(self) -> str:
+        self.dump_count += 1
+        return self.xml
+
+
+@pytest.fixture
+def snapshot():
+    return HierarchySnapshot(HIERARCHY_XML)
+
+
+def test_parse_bounds():
+    assert parse_bounds("[0,400][1080,520]") == (0, 400, 1080, 520)
+    assert parse_bounds("") == (0, 0, 0, 0)
+
+
+def test_find_by_exact_attributes(snapshot):
+    node = snapshot.find({"resourceId": "com.android.settings:id/search_action_bar"})
+    assert node is not None
+    assert node.description == "搜索"
+    assert node.center == (540, 260)
+    assert snapshot.exists({"text": "设置"})
+    assert not snapshot.exists({"text": "不存在的元素12345"})
+
+
+def test_selector_variants_and_booleans(snapshot):
+    assert snapshot.count({"textContains": "示"}) == 1
+    assert snapshot.count({"resourceIdMatches": r".*:id/row"}) == 2
+    assert snapshot.count({"clickable": True}) == 3
+    assert snapshot.find({"focused": True}).class_name == "android.widget.EditText"
+
+
+def test_instance_and_bulk_reads(snapshot):
+    row = {"resourceId": "com.android.settings:id/row"}
+    assert snapshot.texts(row) == ["显示", "声音"]
+    assert snapshot.bounds(row) == [(0, 400, 1080, 520), (0, 520, 1080, 640)]
+    assert snapshot.find(dict(row, instance=1)).text == "声音"
+    assert snapshot.find(dict(row, instance=2)) is None
+
+
+def test_exists_many_uses_single_dump():
+    device = FakeDevice(HIERARCHY_XML)
+    result = HierarchySnapshot.capture(device).exists_many({
+        "title": {"text": "设置"},
+        "search": {"description": "搜索"},
+        "missing": {"text": "Settings"},
+    })
+    assert result == {"title": True, "search": True, "missing": False}
+    assert device.dump_count == 1
+
+
+def test_unknown_selector_key(snapshot):
+    with pytest.raises(ValueError):
+        snapshot.find({"unknownKey": "x"})
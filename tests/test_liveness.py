@@ -0,0 +1,170 @@
+"""
+设备存活状态测试用例
+使用虚拟时钟和替身设备，无需连接设备
+"""
+from utils.device_manager import DeviceManager
+from utils.liveness import LivenessTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeDevice:
+    """记录 info 调用次数的设备替身"""
+
+    serial = "fake-serial"
+
+    def __init__(self):
+        self.info_calls = 0
+        self.online = True
+
+    @property
+    def info(self):
+        self.info_calls += 1
+        if not self.online:
+            raise ConnectionError("device offline")
+        return {"productName": "fake", "sdk": 33, "version": "13"}
+
+
+def test_heartbeat_is_cached_within_ttl():
+    clock = FakeClock()
+    calls = []
+    tracker = LivenessTracker(lambda: calls.append(1) or {"sdk": 33}, ttl=5.0, clock=clock)
+    assert tracker.is_alive()
+    clock.now = 4.9
+    assert tracker.is_alive()
+    assert len(calls) == 1
+    clock.now = 5.0
+    assert tracker.is_alive()
+    assert len(calls) == 2
+
+
+def test_suspect_after_consecutive_failures():
+    clock = FakeClock()
+    online = [True]
+
+    def probe():
+        if not online[0]:
+            raise ConnectionError("offline")
+        return {"sdk": 33}
+
+    tracker = LivenessTracker(probe, ttl=1.0, suspect_after=2, clock=clock)
+    assert tracker.beat()
+    online[0] = False
+    assert not tracker.beat()
+    assert tracker.state == LivenessTracker.ALIVE
+    # 一次失败就不再视为存活，suspect 只决定何时重连
+    assert not tracker.is_alive()
+    assert not tracker.needs_reconnect()
+    assert not tracker.beat()
+    assert tracker.state == LivenessTracker.SUSPECT
+    assert not tracker.is_alive()
+    # 最近一次成功的信息仍然保留
+    assert tracker.last_info == {"sdk": 33}
+    online[0] = True
+    assert tracker.beat()
+    assert tracker.get_status()["consecutive_failures"] == 0
+
+
+def test_device_manager_is_connected_costs_no_rpc_on_hot_path():
+    device = FakeDevice()
+    manager = DeviceManager({"serial": "fake-serial"}, connect_func=lambda serial: device)
+    assert manager.connect() is device
+    assert device.info_calls == 1
+    for _ in range(100):
+        assert manager.is_connected()
+    assert manager.get_device_info()["product_name"] == "fake"
+    assert device.info_calls == 1
+
+
+def test_device_manager_falls_back_to_last_known_info():
+    device = FakeDevice()
+    manager = DeviceManager(
+        {"serial": "fake-serial", "heartbeat_ttl": 0.0, "suspect_after": 1},
+        connect_func=lambda serial: device
+    )
+    manager.connect()
+    device.online = False
+    assert not manager.is_connected()
+    assert manager.get_device_info()["sdk"] == 33
+
+
+def test_device_manager_reconnects_at_most_once_per_ttl():
+    clock = FakeClock()
+    device = FakeDevice()
+    connects = []
+
+    def connect(serial):
+        connects.append(serial)
+        return device
+
+    manager = DeviceManager(
+        {"serial": "fake-serial", "heartbeat_ttl": 5.0, "suspect_after": 1},
+        connect_func=connect
+    )
+    manager.liveness.clock = clock
+    manager.connect()
+    device.online = False
+    clock.now = 5.0
+    assert not manager.is_connected()
+    assert manager.liveness.needs_reconnect()
+    assert len(connects) == 2
+    for _ in range(10):
+        assert not manager.is_connected()
+    assert len(connects) == 2
+    clock.now = 10.0
+    assert not manager.is_connected()
+    assert len(connects) == 3
+    device.online = True
+    clock.now = 15.0
+    assert manager.is_connected()
+
+
+def test_device_manager_records_failed_connect():
+    def broken(serial):
+        raise ConnectionError("adb offline")
+
+    manager = DeviceManager({"serial": "fake-serial", "suspect_after": 1}, connect_func=broken)
+    assert manager.connect() is None
+    assert manager.liveness.get_status()["consecutive_failures"] == 1
+    assert manager.liveness.needs_reconnect()
+
+
+def test_device_manager_reports_failed_probe_immediately():
+    device = FakeDevice()
+    manager = DeviceManager(
+        {"serial": "fake-serial", "heartbeat_ttl": 5.0, "suspect_after": 3},
+        connect_func=lambda serial: device
+    )
+    manager.connect()
+    device.online = False
+    assert not manager.liveness.beat()
+    # 失败结果在 TTL 内被缓存，但仍然是 False
+    assert not manager.is_connected()
+    assert not manager.is_connected()
+    device.online = True
+    assert manager.liveness.beat()
+    assert manager.is_connected()
+
+
+def test_background_prober_keeps_cache_fresh():
+    device = FakeDevice()
+    manager = DeviceManager(
+        {"serial": "fake-serial", "heartbeat_ttl": 0.2},
+        connect_func=lambda serial: device
+    )
+    manager.connect()
+    manager.start_heartbeat(0.02)
+    try:
+        import time
+        time.sleep(0.2)
+        assert device.info_calls > 2
+        assert manager.liveness.is_fresh()
+    finally:
+        manager.disconnect()
+    assert manager.liveness._thread is None
@@ -0,0 +1,51 @@
+"""
+日志工具测试用例
+无需连接设备
+"""
+import logging
+import os
+import queue
+import pytest
+from utils.logger import CountingQueueHandler, setup_logger, get_log_stats, shutdown_logging
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path / "logs"
+    shutdown_logging()
+
+
+def read_log(log_dir) -> str:
+    (log_file,) = os.listdir(log_dir)
+    return (log_dir / log_file).read_text(encoding="utf-8")
+
+
+def test_queue_mode_writes_through_listener(log_dir):
+    logger = setup_logger("queue_mode_test", use_queue=True)
+    assert [type(h) for h in logger.handlers] == [CountingQueueHandler]
+    for i in range(50):
+        logger.info(f"点击元素 {i}")
+    stats = shutdown_logging()
+    assert stats["queue_mode_test"]["queued"] == 50
+    assert stats["queue_mode_test"]["dropped"] == 0
+    assert "点击元素 49" in read_log(log_dir)
+    # 关闭后处理器直接挂回 Logger，后续日志仍写入文件
+    logger.info("会话结束后的日志")
+    assert "会话结束后的日志" in read_log(log_dir)
+    assert get_log_stats() == {}
+
+
+def test_full_queue_drops_and_counts():
+    handler = CountingQueueHandler(queue.Queue(maxsize=2))
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "msg", None, None)
+    for _ in range(5):
+        handler.enqueue(record)
+    assert (handler.queued, handler.dropped) == (2, 3)
+
+
+def test_direct_mode_is_default(log_dir, monkeypatch):
+    monkeypatch.delenv("LOG_QUEUE", raising=False)
+    logger = setup_logger("direct_mode_test")
+    assert not any(isinstance(h, CountingQueueHandler) for h in logger.handlers)
+    assert "direct_mode_test" not in get_log_stats()
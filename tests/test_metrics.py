@@ -0,0 +1,81 @@
+"""
+操作耗时统计测试用例
+无需连接设备
+"""
+from utils.metrics import (
+    LatencyHistogram, MetricsRegistry, BUCKET_BOUNDS_MS, get_metrics_registry, timed
+)
+
+
+def test_histogram_percentiles_are_bucket_bounds():
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.record(ms / 1000.0)
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    assert abs(summary["mean_ms"] - 50.5) < 1e-6
+    # 分桶误差不超过一个桶宽（25%）
+    for p, exact in ((50, 50), (95, 95), (99, 99)):
+        value = histogram.percentile(p)
+        assert exact <= value <= exact * 1.25
+    assert summary["max_ms"] == 100.0
+
+
+def test_histogram_overflow_and_empty():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+    histogram.record(BUCKET_BOUNDS_MS[-1] / 1000.0 * 10)
+    assert histogram.percentile(99) == histogram.max_ms
+
+
+def test_registry_merge_round_trip():
+    worker_a, worker_b, controller = MetricsRegistry(), MetricsRegistry(), MetricsRegistry()
+    worker_a.record("click_element", 0.010, selector={"text": "设置"}, device="A")
+    worker_b.record(
+        "click_element", 0.030, selector={"className": "android.widget.TextView", "text": "设置"},
+        device="B", error=True
+    )
+    worker_b.record(
+        "click_element", 0.020, selector={"text": "设置", "className": "android.widget.TextView"}
+    )
+    controller.merge(worker_a.to_dict())
+    controller.merge(worker_b.to_dict())
+    summary = controller.summary()
+    click = summary["operations"]["click_element"]
+    assert click["count"] == 3 and click["errors"] == 1
+    # 字段顺序不同的等价选择器归入同一个直方图
+    assert summary["selectors"]['click_element {"text": "设置"}']["count"] == 1
+    key = 'click_element {"className": "android.widget.TextView", "text": "设置"}'
+    assert summary["selectors"][key]["count"] == 2
+    assert set(summary["devices"]) == {"click_element @A", "click_element @B"}
+
+
+def test_timed_records_selector_device_and_errors():
+    registry = get_metrics_registry()
+    registry.reset()
+
+    class Device:
+        serial = "fake-serial"
+
+    class Page:
+        device = Device()
+
+        @timed()
+        def click_element(self, selector, timeout=10.0):
+            return selector
+
+        @timed("press")
+        def press_back(self):
+            raise RuntimeError("device gone")
+
+    page = Page()
+    page.click_element({"text": "显示"})
+    try:
+        page.press_back()
+    except RuntimeError:
+        pass
+    summary = registry.summary()
+    assert summary["operations"]["click_element"]["count"] == 1
+    assert summary["operations"]["press"]["errors"] == 1
+    assert "click_element @fake-serial" in summary["devices"]
+    registry.reset()
@@ -0,0 +1,115 @@
+"""
+资源采样测试用例
+解析器使用录制的命令输出，采样器使用设备替身，无需连接设备
+"""
+import time
+from utils.fake_device import FakeDevice
+from utils.resource_sampler import (
+    ResourceSampler, TimeSeries,
+    parse_proc_stat, parse_pid_stat, parse_meminfo_pss, parse_battery,
+)
+
+PROC_STAT = """cpu  2255 34 2290 22625563 6290 127 456 0 0 0
+cpu0 1132 34 1441 11311718 3675 127 438 0 0 0
+"""
+
+PID_STAT = ("12345 (ndroid.settings) S 640 640 0 0 -1 1077952832 52081 0 233 0 "
+            "310 95 0 0 10 -10 40 0 1290450 15477346304 36211 18446744073709551615\n")
+
+PID_STAT_SPACES = "777 (my app (beta)) R 1 1 0 0 -1 0 0 0 0 0 20 5 0 0 20 0 1 0 100 0 0\n"
+
+MEMINFO = """Applications Memory Usage (in Kilobytes):
+Uptime: 1166284 Realtime: 1166284
+
+** MEMINFO in pid 12345 [com.android.settings] **
+                   Pss  Private  Private  SwapPss      Rss     Heap     Heap     Heap
+                 Total    Dirty    Clean    Dirty    Total     Size    Alloc     Free
+                ------   ------   ------   ------   ------   ------   ------   ------
+  Native Heap     9560     9512        0        0    11168    14864    11396     3467
+        TOTAL    51200    29800     6388        0   143552    38528    31024     7503
+
+ App Summary
+                       Pss(KB)                        Rss(KB)
+                        ------                         ------
+           Java Heap:    12476                          35092
+
+           TOTAL PSS:    51200            TOTAL RSS:   143552       TOTAL SWAP PSS:        0
+"""
+
+MEMINFO_LEGACY = """** MEMINFO in pid 2048 [com.example.app] **
+                   Pss  Private  Private  Swapped     Heap     Heap     Heap
+                 Total    Dirty    Clean    Dirty     Size    Alloc     Free
+        TOTAL    30720    20000     5000        0    20000    18000     2000
+"""
+
+BATTERY = """Current Battery Service state:
+  AC powered: false
+  USB powered: true
+  level: 87
+  scale: 100
+  voltage: 4200
+  temperature: 315
+"""
+
+
+def test_parsers():
+    assert parse_proc_stat(PROC_STAT) == (2255 + 34 + 2290 + 22625563 + 6290 + 127 + 456, 22625563 + 6290)
+    assert parse_pid_stat(PID_STAT) == 405
+    assert parse_pid_stat(PID_STAT_SPACES) == 25
+    assert parse_meminfo_pss(MEMINFO) == 51200
+    assert parse_meminfo_pss(MEMINFO_LEGACY) == 30720
+    assert parse_meminfo_pss("No process found for: com.example.app\n") is None
+    assert parse_battery(BATTERY) == {"level": 87.0, "temperature": 31.5}
+    assert parse_proc_stat("") is None and parse_pid_stat("") is None
+
+
+def test_time_series_bounded_and_summarized():
+    series = TimeSeries(capacity=8)
+    for i in range(100):
+        series.append(float(i), 2.0 * i + 1)
+    assert len(series) < 8
+    assert series.times[0] == 0.0 and series.times[-1] > 80
+    summary = series.summary()
+    assert summary["min"] == 1.0
+    assert summary["slope_per_s"] == 2.0
+    assert TimeSeries().summary() is None
+
+
+def test_cpu_from_consecutive_samples():
+    sampler = ResourceSampler(FakeDevice(), "com.android.settings")
+    sampler.record(0.0, ["cpu  100 0 100 800 0 0 0 0\n", PID_STAT, MEMINFO, BATTERY])
+    # 200 jiffies 中空闲 50，应用占 40
+    pid_stat = PID_STAT.replace(" 310 95 ", " 340 105 ")
+    sampler.record(1.0, ["cpu  200 0 150 850 0 0 0 0\n", pid_stat, MEMINFO, BATTERY])
+    metrics = sampler.summary()["metrics"]
+    assert metrics["cpu_total"]["mean"] == 75.0
+    assert metrics["cpu_app"]["mean"] == 20.0
+    assert metrics["pss_mb"]["max"] == 50.0
+    assert metrics["battery_temp"]["unit"] == "°C"
+
+
+def test_app_not_running_skips_app_metrics():
+    sampler = ResourceSampler(FakeDevice(), "com.example.app")
+    sampler.record(0.0, [PROC_STAT, "", "No process found\n", BATTERY])
+    sampler.record(1.0, [PROC_STAT.replace("2255", "2355"), "", "No process found\n", BATTERY])
+    metrics = sampler.summary()["metrics"]
+    assert "cpu_app" not in metrics and "pss_mb" not in metrics
+    assert metrics["cpu_total"]["mean"] == 100.0
+
+
+def test_background_sampling_one_shell_call_per_sample():
+    package = "com.android.settings"
+    device = FakeDevice(shell_outputs={
+        "head -1 /proc/stat": PROC_STAT,
+        f"cat /proc/$(pidof -s {package})/stat": PID_STAT,
+        f"dumpsys meminfo {package}": MEMINFO,
+        "dumpsys battery": BATTERY,
+    })
+    sampler = ResourceSampler(device, package, interval=0.02)
+    sampler.start()
+    time.sleep(0.15)
+    sampler.stop()
+    summary = sampler.summary()
+    assert summary["samples"] >= 3
+    assert device.rpc_counts["shell"] == summary["samples"]
+    assert summary["metrics"]["battery_level"]["mean"] == 87.0
@@ -0,0 +1,135 @@
+"""
+带预算的重试测试用例
+无需连接设备
+"""
+import pytest
+from utils.helpers import BackoffPolicy
+from utils.retry import (
+    RetryRegistry, CircuitBreaker, DeviceUnavailableError, classify,
+    TRANSIENT, DEVICE, FATAL,
+)
+
+
+class ConnectError(Exception):
+    """与 uiautomator2.exceptions.ConnectError 同名"""
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def flaky(failures, error=LookupError):
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error("boom")
+        return "ok"
+
+    func.calls = calls
+    return func
+
+
+def test_classify():
+    assert classify(LookupError()) == TRANSIENT
+    assert classify(AssertionError()) == TRANSIENT
+    assert classify(ConnectError()) == DEVICE
+    assert classify(ConnectionResetError()) == DEVICE
+    assert classify(TypeError()) == FATAL
+    assert classify(DeviceUnavailableError()) == FATAL
+
+
+def test_exponential_backoff_and_stats():
+    registry = RetryRegistry(budget=0)
+    sleeps = []
+    func = flaky(2)
+    policy = BackoffPolicy(initial=1.0, factor=2.0, maximum=8.0, jitter=0)
+    assert registry.call(func, max_attempts=3, policy=policy, sleep=sleeps.append) == "ok"
+    assert sleeps == [1.0, 2.0]
+    summary = registry.summary()
+    assert summary["retries"] == 2
+    assert summary["retry_seconds"] == 3.0
+    assert summary["operations"]["func"]["calls"] == 1
+
+
+def test_fatal_errors_not_retried():
+    registry = RetryRegistry()
+    func = flaky(5, error=TypeError)
+    with pytest.raises(TypeError):
+        registry.call(func, max_attempts=3, sleep=lambda s: None)
+    assert len(func.calls) == 1
+    assert registry.summary()["operations"]["func"]["fatal"] == 1
+
+
+def test_budget_stops_retries():
+    registry = RetryRegistry(budget=2.5)
+    policy = BackoffPolicy(initial=1.0, factor=2.0, maximum=8.0, jitter=0)
+    with pytest.raises(LookupError):
+        registry.call(flaky(10), max_attempts=5, policy=policy, sleep=lambda s: None)
+    summary = registry.summary()
+    assert summary["budget_spent"] == 1.0
+    assert summary["budget_exhausted"] == 1
+
+
+def test_breaker_opens_and_notifies_pool():
+    clock = FakeClock()
+    registry = RetryRegistry(breaker_threshold=2, breaker_cooldown=10.0, clock=clock)
+    bad = []
+    registry.on_breaker_open = bad.append
+    func = flaky(100, error=ConnectError)
+
+    with pytest.raises(ConnectError):
+        registry.call(func, max_attempts=3, serial="emulator-5554", sleep=lambda s: None)
+    assert bad == ["emulator-5554"]
+    assert len(func.calls) == 2
+
+    # 熔断期间直接失败，不再调用
+    with pytest.raises(DeviceUnavailableError):
+        registry.call(func, serial="emulator-5554", sleep=lambda s: None)
+    assert len(func.calls) == 2
+    assert registry.summary()["fast_failures"] == 1
+
+    # 其他设备不受影响
+    assert registry.call(flaky(0), serial="emulator-5556") == "ok"
+
+
+def test_breaker_half_open_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker("serial", threshold=1, cooldown=5.0, clock=clock)
+    breaker.record_failure(ConnectError())
+    assert breaker.state == CircuitBreaker.OPEN
+    breaker.record_failure(LookupError())
+    clock.now = 6.0
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_close_notifies_pool():
+    clock = FakeClock()
+    registry = RetryRegistry(breaker_threshold=1, breaker_cooldown=5.0, clock=clock)
+    events = []
+    registry.on_breaker_open = lambda serial: events.append(("bad", serial))
+    registry.on_breaker_close = lambda serial: events.append(("good", serial))
+    with pytest.raises(ConnectError):
+        registry.call(flaky(1, error=ConnectError), max_attempts=1, serial="A")
+    clock.now = 6.0
+    assert registry.call(flaky(0), serial="A") == "ok"
+    # 已关闭的熔断器再次成功不重复通知
+    assert registry.call(flaky(0), serial="A") == "ok"
+    assert events == [("bad", "A"), ("good", "A")]
+
+
+def test_merge_worker_stats():
+    worker = RetryRegistry(budget=0)
+    worker.call(flaky(1), max_attempts=2, policy=BackoffPolicy(initial=0.5, jitter=0), sleep=lambda s: None)
+    controller = RetryRegistry()
+    controller.merge(worker.to_dict())
+    assert controller.summary()["retries"] == 1
+    assert controller.summary()["retry_seconds"] == 0.5
@@ -0,0 +1,92 @@
+"""
+异步截图流水线测试用例
+使用替身图像对象，无需连接设备
+"""
+import threading
+import pytest
+from utils.screenshot import ScreenshotPipeline
+
+
+class FakeImage:
+    """save 时写入固定内容的图像替身，可用事件阻塞写盘"""
+
+    def __init__(self, gate: threading.Event = None):
+        self.gate = gate
+        self.started = threading.Event()
+
+    def save(self, path: str):
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        with open(path, "wb") as f:
+            f.write(b"png")
+
+
+class FakeDevice:
+    def screenshot(self):
+        return FakeImage()
+
+
+def test_capture_writes_after_flush(tmp_path):
+    pipeline = ScreenshotPipeline(workers=2)
+    paths = [str(tmp_path / "shots" / f"{i}.png") for i in range(5)]
+    for path in paths:
+        pipeline.capture(FakeDevice(), path)
+    assert pipeline.flush(timeout=5)
+    assert all((tmp_path / "shots" / f"{i}.png").exists() for i in range(5))
+    assert pipeline.get_stats() == {
+        "submitted": 5, "written": 5, "deduplicated": 0, "dropped": 0, "failed": 0, "pending": 0
+    }
+    pipeline.close()
+
+
+def test_drop_oldest_policy(tmp_path):
+    gate = threading.Event()
+    pipeline = ScreenshotPipeline(workers=1, max_pending=2, policy=ScreenshotPipeline.DROP_OLDEST)
+    # 第一张占住唯一的写盘线程
+    busy = FakeImage(gate)
+    pipeline.submit(busy, str(tmp_path / "busy.png"))
+    assert busy.started.wait(5)
+    for i in range(4):
+        pipeline.submit(FakeImage(), str(tmp_path / f"{i}.png"))
+    gate.set()
+    assert pipeline.close(timeout=5)
+    stats = pipeline.get_stats()
+    assert stats["dropped"] == 2 and stats["written"] == 3
+    assert not (tmp_path / "0.png").exists()
+    assert (tmp_path / "3.png").exists()
+
+
+def test_block_policy_waits_for_space(tmp_path):
+    gate = threading.Event()
+    pipeline = ScreenshotPipeline(workers=1, max_pending=1, policy=ScreenshotPipeline.BLOCK)
+    pipeline.submit(FakeImage(gate), str(tmp_path / "a.png"))
+    pipeline.submit(FakeImage(gate), str(tmp_path / "b.png"))
+    submitted = threading.Event()
+    thread = threading.Thread(
+        target=lambda: (pipeline.submit(FakeImage(), str(tmp_path / "c.png")), submitted.set())
+    )
+    thread.start()
+    assert not submitted.wait(0.2)
+    gate.set()
+    assert submitted.wait(5)
+    assert pipeline.close(timeout=5)
+    assert pipeline.get_stats()["written"] == 3
+
+
+def test_failed_write_is_counted(tmp_path):
+    class BrokenImage:
+        def save(self, path):
+            raise OSError("disk full")
+
+    pipeline = ScreenshotPipeline()
+    pipeline.submit(BrokenImage(), str(tmp_path / "x.png"))
+    assert pipeline.close(timeout=5)
+    assert pipeline.get_stats()["failed"] == 1
+    with pytest.raises(RuntimeError):
+        pipeline.submit(FakeImage(), str(tmp_path / "y.png"))
+
+
+def test_invalid_policy():
+    with pytest.raises(ValueError):
+        ScreenshotPipeline(policy="unbounded")
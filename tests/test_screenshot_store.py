@@ -0,0 +1,118 @@
+"""
+截图去重存储测试用例
+使用生成的图像，无需连接设备
+"""
+import json
+import numpy as np
+from PIL import Image
+from utils.screenshot import ScreenshotPipeline
+from utils.screenshot_store import ScreenshotStore, perceptual_hash, hamming_distances, index_file_name
+
+
+def make_image(seed: int, noise: int = 0) -> Image.Image:
+    """生成带随机色块的测试画面，noise 为额外改动的像素数"""
+    rng = np.random.RandomState(seed)
+    blocks = rng.randint(0, 255, (12, 6, 3), dtype=np.uint8)
+    pixels = np.kron(blocks, np.ones((40, 40, 1), dtype=np.uint8))
+    for y, x in zip(range(noise), range(noise)):
+        pixels[y, x] = 255 - pixels[y, x]
+    return Image.fromarray(pixels)
+
+
+def test_perceptual_hash_is_stable_for_near_duplicates():
+    base = perceptual_hash(make_image(1))
+    assert base.dtype == np.uint8 and base.size == 32
+    distances = hamming_distances(
+        np.vstack([perceptual_hash(make_image(1, noise=5)), perceptual_hash(make_image(2))]), base
+    )
+    assert distances[0] <= 2
+    assert distances[1] > 30
+
+
+def test_store_deduplicates_into_references(tmp_path):
+    store = ScreenshotStore(str(tmp_path))
+    first = str(tmp_path / "a.png")
+    assert store.save(make_image(1), first) == first
+    assert store.save(make_image(1, noise=5), str(tmp_path / "b.png")) == first
+    assert store.save(make_image(2), str(tmp_path / "c.png")) == str(tmp_path / "c.png")
+    assert not (tmp_path / "b.png").exists()
+    assert store.resolve(str(tmp_path / "b.png")) == first
+    assert store.get_stats()["stored"] == 2
+    assert store.get_stats()["deduplicated"] == 1
+
+    store.write_index()
+    index = json.loads((tmp_path / index_file_name()).read_text(encoding="utf-8"))
+    assert len(index["objects"]) == 2
+    assert index["entries"]["b.png"]["sha256"] == index["entries"]["a.png"]["sha256"]
+
+    # 新进程加载索引后继续去重
+    reloaded = ScreenshotStore(str(tmp_path))
+    assert reloaded.save(make_image(2), str(tmp_path / "d.png")) == str(tmp_path / "c.png")
+
+
+def test_negative_distance_only_removes_exact_duplicates(tmp_path):
+    store = ScreenshotStore(str(tmp_path), max_distance=-1)
+    store.save(make_image(1), str(tmp_path / "a.png"))
+    assert store.save(make_image(1, noise=5), str(tmp_path / "b.png")) == str(tmp_path / "b.png")
+    assert store.save(make_image(1), str(tmp_path / "c.png")) == str(tmp_path / "a.png")
+
+
+def test_compact_removes_existing_duplicates(tmp_path):
+    for name, image in (("a", make_image(1)), ("b", make_image(1, noise=3)), ("c", make_image(3))):
+        image.save(str(tmp_path / f"{name}.png"))
+    result = ScreenshotStore(str(tmp_path)).compact()
+    assert result["scanned"] == 3 and result["removed"] == 1
+    assert sorted(p.name for p in tmp_path.glob("*.png")) == ["a.png", "c.png"]
+    assert ScreenshotStore(str(tmp_path)).resolve(str(tmp_path / "b.png")) == str(tmp_path / "a.png")
+
+
+def test_pipeline_counts_deduplicated(tmp_path):
+    pipeline = ScreenshotPipeline(workers=1, store=ScreenshotStore(str(tmp_path)))
+    for i in range(4):
+        pipeline.submit(make_image(1, noise=i), str(tmp_path / f"{i}.png"))
+    assert pipeline.close(timeout=5)
+    stats = pipeline.get_stats()
+    assert stats["written"] == 1 and stats["deduplicated"] == 3
+    assert (tmp_path / index_file_name()).exists()
+
+
+def test_existing_object_is_never_overwritten(tmp_path):
+    store = ScreenshotStore(str(tmp_path))
+    a, b = str(tmp_path / "a.png"), str(tmp_path / "b.png")
+    store.save(make_image(1), a)
+    assert store.save(make_image(1, noise=5), b) == a
+    store.write_index()
+
+    # 新的存储实例把另一幅画面保存到已被占用的 a.png
+    reloaded = ScreenshotStore(str(tmp_path))
+    written = reloaded.save(make_image(2), a)
+    assert written != a and written.startswith(str(tmp_path / "a-"))
+    assert perceptual_hash(Image.open(a)).tobytes() == perceptual_hash(make_image(1)).tobytes()
+    assert reloaded.resolve(b) == a
+    assert reloaded.resolve(a) == written
+    paths = [obj["path"] for obj in reloaded.objects.values()]
+    assert len(paths) == len(set(paths))
+
+
+def test_pipeline_resolves_deduplicated_path(tmp_path):
+    pipeline = ScreenshotPipeline(workers=1, store=ScreenshotStore(str(tmp_path)))
+    first, second = str(tmp_path / "first.png"), str(tmp_path / "second.png")
+    pipeline.submit(make_image(1), first)
+    pipeline.submit(make_image(1, noise=2), second)
+    assert pipeline.resolve(second, timeout=5) == first
+    assert pipeline.resolve(first, timeout=5) == first
+    pipeline.close(timeout=5)
+
+
+def test_negative_distance_keeps_near_duplicates(tmp_path):
+    pipeline = ScreenshotPipeline(workers=1, store=ScreenshotStore(str(tmp_path)))
+    clean, failed = str(tmp_path / "clean.png"), str(tmp_path / "failed.png")
+    assert pipeline.submit(make_image(1), clean) == clean
+    # 失败截图只合并完全相同的画面
+    assert pipeline.submit(make_image(1, noise=2), failed, max_distance=-1) == failed
+    assert pipeline.submit(make_image(1), str(tmp_path / "same.png"), max_distance=-1)
+    assert pipeline.close(timeout=5)
+    assert (tmp_path / "failed.png").exists()
+    assert pipeline.store.resolve(str(tmp_path / "same.png")) == clean
+    stats = pipeline.get_stats()
+    assert stats["written"] == 2 and stats["deduplicated"] == 1
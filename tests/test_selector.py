@@ -0,0 +1,77 @@
+"""
+本地选择器求值测试用例
+使用固定的层级 XML，无需连接设备
+"""
+import pytest
+from utils.hierarchy import HierarchySnapshot
+
+
+LIST_XML = """<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>
+<hierarchy rotation="0">
+  <node index="0" text="" resource-id="android:id/list" class="android.widget.ListView" package="com.android.settings" content-desc="" scrollable="true" bounds="[0,200][1080,2000]">
+    <node index="0" text="" resource-id="com.android.settings:id/row" class="android.widget.LinearLayout" package="com.android.settings" content-desc="" clickable="true" bounds="[0,200][1080,400]">
+      <node index="0" text="网络和互联网" resource-id="android:id/title" class="android.widget.TextView" package="com.android.settings" content-desc="" bounds="[100,220][900,300]" />
+      <node index="1" text="WLAN、移动网络" resource-id="android:id/summary" class="android.widget.TextView" package="com.android.settings" content-desc="" bounds="[100,300][900,380]" />
+    </node>
+    <node index="1" text="" resource-id="com.android.settings:id/row" class="android.widget.LinearLayout" package="com.android.settings" content-desc="" clickable="true" bounds="[0,400][1080,600]">
+      <node index="0" text="显示" resource-id="android:id/title" class="android.widget.TextView" package="com.android.settings" content-desc="" bounds="[100,420][900,500]" />
+      <node index="1" text="深色主题、字体大小" resource-id="android:id/summary" class="android.widget.TextView" package="com.android.settings" content-desc="" bounds="[100,500][900,580]" />
+      <node index="2" text="" resource-id="" class="android.widget.Switch" package="com.android.settings" content-desc="深色主题" checkable="true" checked="true" bounds="[950,450][1050,550]" />
+    </node>
+  </node>
+</hierarchy>"""
+
+
+@pytest.fixture(scope="module")
+def snapshot():
+    return HierarchySnapshot(LIST_XML)
+
+
+def test_indexes_group_nodes_by_value(snapshot):
+    titles = snapshot.index.indexes["resourceId"]["android:id/title"]
+    assert [node.text for node in titles] == ["网络和互联网", "显示"]
+    assert len(snapshot.index.indexes["className"]["android.widget.TextView"]) == 4
+
+
+def test_suffix_variants(snapshot):
+    assert snapshot.texts({"textStartsWith": "WLAN"}) == ["WLAN、移动网络"]
+    assert snapshot.texts({"textContains": "主题"}) == ["深色主题、字体大小"]
+    assert snapshot.count({"resourceIdMatches": r"android:id/(title|summary)"}) == 4
+    assert snapshot.count({"classNameMatches": r".*TextView", "textMatches": "显.*"}) == 1
+    assert snapshot.find({"descriptionContains": "深色"}).info["checked"] is True
+
+
+def test_instance_and_index(snapshot):
+    title = {"resourceId": "android:id/title"}
+    assert snapshot.find(dict(title, instance=1)).text == "显示"
+    assert snapshot.texts({"className": "android.widget.TextView", "index": 1}) == [
+        "WLAN、移动网络", "深色主题、字体大小"
+    ]
+
+
+def test_child_selector(snapshot):
+    row = {"resourceId": "com.android.settings:id/row", "instance": 1}
+    assert snapshot.texts(dict(row, child={"resourceId": "android:id/summary"})) == [
+        "深色主题、字体大小"
+    ]
+    assert snapshot.count({"scrollable": True, "child": {"checkable": True}}) == 1
+
+
+def test_sibling_selector(snapshot):
+    selector = {"text": "显示", "sibling": {"className": "android.widget.Switch"}}
+    switch = snapshot.find(selector)
+    assert switch.description == "深色主题"
+    assert switch.info["bounds"] == {"left": 950, "top": 450, "right": 1050, "bottom": 550}
+    # 嵌套：找到“显示”所在行，再取行内的兄弟摘要
+    nested = {"resourceId": "com.android.settings:id/row",
+              "child": {"text": "显示", "sibling": {"resourceId": "android:id/summary"}}}
+    assert snapshot.texts(nested) == ["深色主题、字体大小"]
+
+
+def test_empty_bucket_short_circuits(snapshot):
+    assert snapshot.find_all({"text": "不存在", "className": "android.widget.TextView"}) == []
+
+
+def test_invalid_key_is_rejected(snapshot):
+    with pytest.raises(ValueError):
+        snapshot.find({"text": "不存在", "colour": "red"})
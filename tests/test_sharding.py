@@ -0,0 +1,65 @@
+"""
+按历史耗时分片测试用例
+无需连接设备
+"""
+import os
+import json
+from types import SimpleNamespace
+from utils.sharding import (
+    DurationSharding, strip_group, load_durations, update_duration_db, estimate, lpt_partition
+)
+
+
+def test_strip_group():
+    assert strip_group("tests/test_a.py::test_x@shard-1") == "tests/test_a.py::test_x"
+    assert strip_group("tests/test_a.py::test_x[a@b]") == "tests/test_a.py::test_x[a@b]"
+
+
+def test_lpt_balances_slow_tests():
+    weights = {"slow1": 10.0, "slow2": 9.0, "slow3": 8.0, "a": 4.0, "b": 4.0, "c": 3.0, "d": 2.0}
+    shards = lpt_partition(weights, 2)
+    loads = sorted(sum(weights[n] for n in shard) for shard in shards)
+    assert loads == [20.0, 20.0]
+    assert sorted(n for shard in shards for n in shard) == sorted(weights)
+    # 输入顺序不影响结果，保证各 worker 算出相同的分片
+    assert lpt_partition(dict(reversed(list(weights.items()))), 2) == shards
+
+
+def test_estimate_fallbacks():
+    durations = {"tests/a.py::t1": 2.0, "tests/a.py::t2": 4.0, "tests/b.py::t1": 10.0}
+    estimates = estimate(["tests/a.py::t1", "tests/a.py::new", "tests/c.py::new"], durations)
+    assert estimates == {"tests/a.py::t1": 2.0, "tests/a.py::new": 3.0, "tests/c.py::new": 4.0}
+    assert estimate(["x"], {}) == {"x": 1.0}
+
+
+def test_duration_db_overrides_report(tmp_path):
+    report = tmp_path / "report.json"
+    report.write_text(json.dumps({"tests": [
+        {"nodeid": "t::a@shard-0", "setup": {"duration": 0.5}, "call": {"duration": 1.5}},
+        {"nodeid": "t::b", "call": {"duration": 3.0}},
+    ]}), encoding="utf-8")
+    db = str(tmp_path / "durations.json")
+    assert load_durations(db, str(report)) == {"t::a": 2.0, "t::b": 3.0}
+
+    update_duration_db(db, {"t::b": 1.0})
+    update_duration_db(db, {"t::b": 3.0})
+    assert load_durations(db, str(report)) == {"t::a": 2.0, "t::b": 2.0}
+    assert json.loads(open(db, encoding="utf-8").read())["t::b"]["runs"] == 2
+
+
+def test_duration_db_written_only_after_device_tests(tmp_path):
+    db = str(tmp_path / "durations.json")
+    session = SimpleNamespace(config=None)
+
+    def run(*reports):
+        plugin = DurationSharding(SimpleNamespace(), db, device_fixture="device_manager")
+        for nodeid, properties in reports:
+            plugin.pytest_runtest_logreport(
+                SimpleNamespace(nodeid=nodeid, duration=0.5, user_properties=properties)
+            )
+        plugin.pytest_sessionfinish(session)
+
+    run(("tests/test_unit.py::t", []))
+    assert not os.path.exists(db)
+    run(("tests/test_unit.py::t", []), ("tests/test_device.py::t", [(DurationSharding.DEVICE_PROPERTY, True)]))
+    assert set(load_durations(db)) == {"tests/test_unit.py::t", "tests/test_device.py::t"}
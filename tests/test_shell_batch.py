@@ -0,0 +1,71 @@
+"""
+批量 shell 命令测试用例
+生成的脚本在本机 sh 中执行，无需连接设备
+"""
+import shutil
+import subprocess
+import pytest
+from utils.device_manager import DeviceManager
+from utils.fake_device import FakeDevice, ShellResponse
+from utils.shell_batch import parse_output, chunk_commands, run_batch
+
+pytestmark = pytest.mark.skipif(shutil.which("sh") is None, reason="需要 sh")
+
+
+class LocalShellDevice(FakeDevice):
+    """shell 命令在本机 sh 中执行的设备替身"""
+
+    def shell(self, cmdargs, timeout: int = 60) -> ShellResponse:
+        self._rpc("shell")
+        proc = subprocess.run(["sh", "-c", cmdargs], stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, timeout=timeout)
+        return ShellResponse(proc.stdout.decode("utf-8"), proc.returncode)
+
+
+def connected_manager() -> DeviceManager:
+    device = LocalShellDevice()
+    manager = DeviceManager({"serial": device.serial}, connect_func=lambda serial: device)
+    assert manager.connect() is device
+    device.reset_counters()
+    return manager
+
+
+def test_single_round_trip_with_exit_codes():
+    manager = connected_manager()
+    results = manager.shell_batch([
+        "echo level: 87",
+        "printf 'MemTotal: 1\\nMemFree: 2\\nCached: 3\\n'",
+        "exit 3",
+        "echo oops >&2; false",
+        "printf no-newline",
+    ])
+    assert manager.device.rpc_counts["shell"] == 1
+    assert [r.exit_code for r in results] == [0, 0, 3, 1, 0]
+    assert results[0].output == "level: 87\n"
+    assert results[1].output.splitlines() == ["MemTotal: 1", "MemFree: 2", "Cached: 3"]
+    assert results[3].output == "oops\n"
+    assert results[4].output == "no-newline"
+    assert results[0].ok and not results[2].ok
+
+
+def test_commands_are_isolated():
+    results = connected_manager().shell_batch(["cd /; x=1 # comment", "echo ${x:-unset}"])
+    assert results[1].output == "unset\n"
+
+
+def test_truncated_output_marks_unfinished():
+    commands = ["echo a", "echo b"]
+    token = "__t__"
+    output = "__t__:begin:0\na\n\n__t__:end:0:0\n__t__:begin:1\npartial"
+    results = parse_output(output, token, commands)
+    assert results[0].exit_code == 0 and results[0].output == "a\n"
+    assert results[1].exit_code is None and results[1].output == "partial"
+
+
+def test_long_batches_are_chunked():
+    commands = [f"echo {i}" for i in range(50)]
+    assert len(chunk_commands(commands, max_length=1000)) > 1
+    device = connected_manager().device
+    results = run_batch(device, commands, max_length=1000)
+    assert [r.output for r in results] == [f"{i}\n" for i in range(50)]
+    assert device.rpc_counts["shell"] == len(chunk_commands(commands, max_length=1000))
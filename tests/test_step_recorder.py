@@ -0,0 +1,65 @@
+"""
+失败步骤回放测试用例
+使用设备替身，无需连接设备
+"""
+from PIL import Image
+from base.base_test import BaseTest
+from utils.fake_device import FakeDevice
+from utils.step_recorder import StepRecorder, get_active_recorder, set_active_recorder
+
+
+def test_ring_buffer_is_bounded():
+    recorder = StepRecorder(FakeDevice(), frames=3, max_size=100)
+    for i in range(5):
+        recorder.capture_now(f"step{i}")
+    frames = recorder.frames
+    assert [frame.index for frame in frames] == [2, 3, 4]
+    assert all(max(frame.size) <= 100 for frame in frames)
+    assert recorder.get_stats()["bytes"] == recorder.memory_bytes() > 0
+
+
+def test_background_capture_coalesces_requests():
+    device = FakeDevice()
+    recorder = StepRecorder(device, frames=5)
+    for _ in range(20):
+        recorder.capture()
+    assert recorder.flush(timeout=5)
+    recorder.stop()
+    stats = recorder.get_stats()
+    assert stats["captured"] + stats["coalesced"] == stats["requested"] == 20
+    assert device.rpc_counts["takeScreenshot"] == stats["captured"] >= 1
+
+
+def test_base_test_actions_record_frames():
+    device = FakeDevice()
+    recorder = StepRecorder(device)
+    previous = set_active_recorder(recorder)
+    try:
+        test = BaseTest(device)
+        test.press_back()
+        recorder.flush(timeout=5)
+        test.swipe("up")
+        recorder.flush(timeout=5)
+    finally:
+        set_active_recorder(previous)
+        recorder.stop()
+    assert get_active_recorder() is previous
+    assert recorder.get_stats()["captured"] == 2
+
+
+def test_dump_only_writes_when_called(tmp_path):
+    device = FakeDevice()
+    # 动画 WebP 会合并相同的相邻帧，每次返回不同颜色的画面
+    colors = iter(["red", "green", "blue"])
+    device.screenshot = lambda: Image.new("RGB", (270, 585), next(colors))
+    recorder = StepRecorder(device, frames=3)
+    assert recorder.dump(str(tmp_path / "empty")) == []
+    assert not (tmp_path / "empty").exists()
+
+    for label in ("open", "tap button", "failure"):
+        recorder.capture_now(label)
+    [animation] = recorder.dump(str(tmp_path / "webp"))
+    assert Image.open(animation).n_frames == 3
+
+    paths = recorder.dump(str(tmp_path / "frames"), image_format="frames")
+    assert [p.rsplit("/", 1)[1] for p in paths] == ["000_open.jpg", "001_tap_button.jpg", "002_failure.jpg"]
@@ -0,0 +1,42 @@
+"""
+界面稳定检测测试用例
+使用设备替身，无需连接设备
+"""
+import pytest
+from base.base_test import BaseTest
+from utils.fake_device import FakeDevice, DEFAULT_HIERARCHY
+
+
+class AnimatingDevice(FakeDevice):
+    """前 frames 次 dump 返回不断变化的层级，之后保持不变"""
+
+    def __init__(self, frames: int):
+        super().__init__()
+        self.frames = frames
+
+    def dump_hierarchy(self, *args, **kwargs) -> str:
+        xml = super().dump_hierarchy()
+        count = self.rpc_counts["dumpWindowHierarchy"]
+        if count <= self.frames:
+            return xml.replace('text="显示"', f'text="显示{count}"')
+        return xml
+
+
+def test_returns_once_stable():
+    device = AnimatingDevice(frames=3)
+    assert BaseTest(device).wait_for_ui_idle(stable_for=0.1, timeout=2.0)
+    assert device.rpc_counts["dumpWindowHierarchy"] >= 5
+
+
+def test_times_out_while_animating():
+    device = AnimatingDevice(frames=10 ** 6)
+    base = BaseTest(device)
+    assert not base.wait_for_ui_idle(stable_for=0.1, timeout=0.3)
+    with pytest.raises(TimeoutError):
+        base.wait_for_ui_idle(stable_for=0.1, timeout=0.1, raise_exception=True)
+
+
+def test_screenshot_signature():
+    device = FakeDevice(hierarchy=DEFAULT_HIERARCHY)
+    assert BaseTest(device).wait_for_ui_idle(stable_for=0.05, timeout=1.0, use_screenshot=True)
+    assert device.rpc_counts["takeScreenshot"] == device.rpc_counts["dumpWindowHierarchy"]
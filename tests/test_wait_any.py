@@ -0,0 +1,46 @@
+"""
+多选择器等待测试用例
+使用设备替身，无需连接设备
+"""
+import time
+import pytest
+from base.base_test import BaseTest
+from page_objects.home_page import HomePage
+from utils.fake_device import FakeDevice
+
+
+def test_wait_any_returns_first_present_key():
+    device = FakeDevice()
+    base = BaseTest(device)
+    assert base.wait_any([{"text": "Settings"}, {"text": "显示"}], timeout=1.0) == 1
+    assert base.wait_any({"en": {"text": "Sound"}, "zh": {"text": "声音"}}, timeout=1.0) == "zh"
+    # 同一次检查中都出现时按给定顺序
+    assert base.wait_any({"a": {"text": "应用"}, "b": {"text": "显示"}}, timeout=1.0) == "a"
+    assert device.rpc_counts["dumpWindowHierarchy"] == 3
+
+
+def test_wait_any_costs_one_timeout():
+    device = FakeDevice()
+    base = BaseTest(device)
+    start = time.monotonic()
+    assert base.wait_any([{"text": "甲"}, {"text": "乙"}, {"text": "丙"}], timeout=0.3) is None
+    assert time.monotonic() - start < 0.6
+    with pytest.raises(TimeoutError):
+        base.wait_any([{"text": "甲"}], timeout=0, raise_exception=True)
+
+
+def test_wait_all():
+    base = BaseTest(FakeDevice())
+    assert base.wait_all([HomePage.SEARCH_BOX, HomePage.MENU_BUTTON], timeout=1.0)
+    assert not base.wait_all({"search": HomePage.SEARCH_BOX, "missing": {"text": "甲"}}, timeout=0.1)
+    with pytest.raises(TimeoutError, match="missing"):
+        base.wait_all({"missing": {"text": "甲"}}, timeout=0, raise_exception=True)
+
+
+def test_home_page_negative_check_costs_one_timeout():
+    device = FakeDevice(hierarchy='<hierarchy rotation="0"><node text="其他页面" bounds="[0,0][10,10]" /></hierarchy>')
+    page = HomePage(device)
+    start = time.monotonic()
+    assert not page.is_page_loaded(timeout=0.3)
+    assert time.monotonic() - start < 0.6
+    assert HomePage(FakeDevice()).is_page_loaded(timeout=0.1)
@@ -3,17 +3,20 @@
 测试各种等待场景
 """
 import pytest
-import uiautomator2 as u2
+from typing import TYPE_CHECKING
 import time
 from base.base_test import BaseTest
 from utils.helpers import wait_for
 
+if TYPE_CHECKING:
+    import uiautomator2 as u2
+
 
 class TestWaitOperations(BaseTest):
     """等待操作测试类"""
     
     @pytest.fixture(autouse=True)
-    def setup(self, device: u2.Device):
+    def setup(self, device: "u2.Device"):
         """测试设置"""
         super().__init__(device)
         self.setup_method()
@@ -22,13 +25,12 @@ class TestWaitOperations(BaseTest):
     
     @pytest.mark.smoke
     @pytest.mark.android
-    def test_wait_for_element(self, device: u2.Device):
+    def test_wait_for_element(self, device: "u2.Device", app_session):
         """
         测试等待元素出现
         """
-        device.app_start("com.android.settings")
-        device.app_wait("com.android.settings", timeout=10.0)
-        time.sleep(2)
+        app_session("com.android.settings")
+        self.wait_for_ui_idle()
         
         # 等待元素出现（不抛出异常）
         result = self.wait_for_element(
@@ -39,13 +41,12 @@ class TestWaitOperations(BaseTest):
         self.logger.info(f"元素等待结果: {result}")
     
     @pytest.mark.android
-    def test_wait_for_element_timeout(self, device: u2.Device):
+    def test_wait_for_element_timeout(self, device: "u2.Device", app_session):
         """
         测试等待元素超时
         """
-        device.app_start("com.android.settings")
-        device.app_wait("com.android.settings", timeout=10.0)
-        time.sleep(2)
+        app_session("com.android.settings")
+        self.wait_for_ui_idle()
         
         # 等待一个不存在的元素（应该超时）
         result = self.wait_for_element(
@@ -57,7 +58,7 @@ class TestWaitOperations(BaseTest):
         self.logger.info("等待超时测试通过")
     
     @pytest.mark.android
-    def test_wait_for_app(self, device: u2.Device):
+    def test_wait_for_app(self, device: "u2.Device"):
         """
         测试等待应用启动
         """
@@ -72,12 +73,11 @@ class TestWaitOperations(BaseTest):
         self.logger.info("应用启动等待成功")
     
     @pytest.mark.android
-    def test_wait_for_condition(self, device: u2.Device):
+    def test_wait_for_condition(self, device: "u2.Device", app_session):
         """
         测试等待自定义条件
         """
-        device.app_start("com.android.settings")
-        device.app_wait("com.android.settings", timeout=10.0)
+        app_session("com.android.settings")
         
         # 等待应用完全加载（通过检查当前应用包名）
         def app_loaded():
@@ -93,7 +93,7 @@ class TestWaitOperations(BaseTest):
         self.logger.info("自定义条件等待成功")
     
     @pytest.mark.android
-    def test_wait_with_retry(self, device: u2.Device):
+    def test_wait_with_retry(self, device: "u2.Device"):
         """
         测试带重试的等待
         """
@@ -103,11 +103,12 @@ class TestWaitOperations(BaseTest):
         def click_with_retry():
             device.app_start("com.android.settings")
             device.app_wait("com.android.settings", timeout=10.0)
-            time.sleep(2)
+            self.wait_for_ui_idle()
             # 尝试点击一个元素
-            element = device(text="设置") or device(text="Settings")
-            if element.exists:
-                element.click()
+            candidates = [{"text": "设置"}, {"text": "Settings"}]
+            matched = self.wait_any(candidates, timeout=5.0)
+            if matched is not None:
+                self.click_element(candidates[matched])
                 return True
             raise Exception("元素不存在")
         
@@ -118,12 +119,11 @@ class TestWaitOperations(BaseTest):
             self.logger.warning(f"重试等待失败: {e}")
     
     @pytest.mark.android
-    def test_implicit_wait(self, device: u2.Device):
+    def test_implicit_wait(self, device: "u2.Device", app_session):
         """
         测试隐式等待
         """
-        device.app_start("com.android.settings")
-        device.app_wait("com.android.settings", timeout=10.0)
+        app_session("com.android.settings")
         
         # 使用 uiautomator2 的隐式等待
         element = device(text="设置")
@@ -135,7 +135,7 @@ class TestWaitOperations(BaseTest):
             self.logger.warning("隐式等待超时")
     
     @pytest.mark.android
-    def test_sleep_wait(self, device: u2.Device):
+    def test_sleep_wait(self, device: "u2.Device"):
         """
         测试固定时间等待
         """
@@ -147,20 +147,20 @@ class TestWaitOperations(BaseTest):
         self.logger.info(f"固定等待完成，耗时: {elapsed:.2f}秒")
     
     @pytest.mark.android
-    def test_wait_until_gone(self, device: u2.Device):
+    def test_wait_until_gone(self, device: "u2.Device", app_session):
         """
         测试等待元素消失
         """
-        device.app_start("com.android.settings")
-        device.app_wait("com.android.settings", timeout=10.0)
-        time.sleep(2)
+        app_session("com.android.settings")
+        self.wait_for_ui_idle()
         
         # 等待某个元素消失（例如加载提示）
         try:
             # 如果存在加载提示，等待它消失
-            loading = device(text="加载中") or device(text="Loading")
-            if loading.exists:
-                loading.wait_gone(timeout=10.0)
+            candidates = [{"text": "加载中"}, {"text": "Loading"}]
+            matched = self.wait_any(candidates, timeout=0)
+            if matched is not None:
+                device(**candidates[matched]).wait_gone(timeout=10.0)
                 self.logger.info("元素已消失")
         except Exception as e:
             self.logger.warning(f"等待元素消失测试跳过: {e}")
@@ -0,0 +1,263 @@
+"""
+自适应超时
+按操作类型和设备序列号记录需要轮询才成功的等待所用的时间，超时取高百分位数乘以安全系数，
+且不超过 Config 中的超时；统计按设备持久化，跨会话累积，多个 xdist worker 在文件锁内合并写回
+"""
+import os
+import json
+import logging
+import threading
+from typing import Optional, Dict, Any, Iterable
+
+from utils.helpers import file_lock, serial_file_name
+from utils.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# 序列号未知时使用的键
+DEFAULT_SERIAL = "default"
+
+
+class AdaptiveTimeouts:
+    """
+    自适应超时服务
+
+    样本不足时返回调用方给出的默认超时（通常为 Config 中的值）；
+    样本足够后返回 clamp(p 分位 × safety_factor, 下限, 默认超时)，
+    下限为 minimum 与默认超时 × min_factor 中较大的一个（同样不超过默认超时）。
+    默认超时是上限，统计只会缩短等待：快设备上预期会超时的否定检查更快结束，
+    慢设备需要更长的等待时应调大 Config 中的超时
+    """
+
+    def __init__(
+        self,
+        stats_dir: Optional[str] = None,
+        percentile: float = 99.0,
+        safety_factor: float = 3.0,
+        min_samples: int = 20,
+        minimum: float = 2.0,
+        min_factor: float = 0.5,
+        max_samples: int = 2000,
+        enabled: bool = True
+    ):
+        """
+        初始化自适应超时服务
+
+        Args:
+            stats_dir: 统计持久化目录，每台设备一个文件；None 表示只在进程内统计
+            percentile: 计算超时使用的百分位 (0-100)
+            safety_factor: 百分位耗时的放大倍数
+            min_samples: 样本数达到该值后才使用统计结果
+            minimum: 超时下限（秒）
+            min_factor: 超时下限同时不低于默认超时的该倍数
+            max_samples: 加载历史统计时每个操作最多保留的样本数，超出时按比例缩减，让近期数据权重更高
+            enabled: False 时始终返回默认超时且不记录
+        """
+        self.stats_dir = stats_dir
+        self.percentile = percentile
+        self.safety_factor = safety_factor
+        self.min_samples = max(1, min_samples)
+        self.minimum = minimum
+        self.min_factor = max(0.0, min(1.0, min_factor))
+        self.max_samples = max(self.min_samples, max_samples)
+        self.enabled = enabled
+        # 序列号 -> 操作 -> 成功耗时直方图
+        self.histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+        # 上次 save() 之后新记录的样本，写回时与文件中（可能已被其他 worker 更新）的统计合并
+        self._unsaved: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self.stats = {"adaptive": 0, "fallback": 0, "timeouts": 0}
+        # 其他 xdist worker 的摘要（各设备的分布），由 merge() 填入
+        self.remote_devices: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, serial: str) -> Optional[str]:
+        return os.path.join(self.stats_dir, serial_file_name(serial)) if self.stats_dir else None
+
+    def _read(self, path: Optional[str]) -> Dict[str, LatencyHistogram]:
+        histograms: Dict[str, LatencyHistogram] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                for operation, item in data.get("operations", {}).items():
+                    histograms[operation] = self._decay(LatencyHistogram.from_dict(item))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"超时统计损坏，已忽略 {path}: {e}")
+                histograms = {}
+        return histograms
+
+    def _load(self, serial: str) -> Dict[str, LatencyHistogram]:
+        return self._read(self._path(serial))
+
+    def _decay(self, histogram: LatencyHistogram) -> LatencyHistogram:
+        """样本超过 max_samples 时按比例缩减各桶计数"""
+        if histogram.count <= self.max_samples:
+            return histogram
+        scale = self.max_samples / histogram.count
+        histogram.counts = [int(round(n * scale)) for n in histogram.counts]
+        histogram.total_ms *= scale
+        histogram.errors = int(round(histogram.errors * scale))
+        histogram.count = sum(histogram.counts)
+        return histogram
+
+    def _device(self, serial: Optional[str]) -> Dict[str, LatencyHistogram]:
+        serial = serial or DEFAULT_SERIAL
+        histograms = self.histograms.get(serial)
+        if histograms is None:
+            histograms = self.histograms[serial] = self._load(serial)
+        return histograms
+
+    def record(self, operation: str, seconds: float, serial: Optional[str] = None):
+        """
+        记录一次等待成功所用的时间
+
+        第一次检查就成功的等待不反映界面需要多久出现，调用方不应记录
+
+        Args:
+            operation: 操作类型，例如 find_element、wait_any
+            seconds: 从开始等待到成功的耗时（秒）
+            serial: 设备序列号
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            for histograms in (self._device(serial), self._unsaved.setdefault(serial or DEFAULT_SERIAL, {})):
+                histogram = histograms.get(operation)
+                if histogram is None:
+                    histogram = histograms[operation] = LatencyHistogram()
+                histogram.record(seconds)
+
+    def record_timeout(self):
+        """记录一次等待超时（不计入耗时分布，只用于统计）"""
+        with self._lock:
+            self.stats["timeouts"] += 1
+
+    def timeout(self, operation: str, default: float, serial: Optional[str] = None) -> float:
+        """
+        获取操作的超时时间
+
+        Args:
+            operation: 操作类型
+            default: 样本不足或未启用时的超时，同时是上限
+            serial: 设备序列号
+
+        Returns:
+            超时时间（秒）
+        """
+        if not self.enabled:
+            return default
+        with self._lock:
+            histogram = self._device(serial).get(operation)
+            if histogram is None or histogram.count < self.min_samples:
+                self.stats["fallback"] += 1
+                return default
+            observed = histogram.percentile(self.percentile) / 1000.0
+            self.stats["adaptive"] += 1
+        floor = min(default, max(self.minimum, default * self.min_factor))
+        return round(min(default, max(floor, observed * self.safety_factor)), 3)
+
+    def save(self, serials: Optional[Iterable[str]] = None):
+        """
+        把新记录的样本合并进 stats_dir 中各设备的统计
+
+        每台设备在文件锁内重新读取文件、加上本进程上次保存后的样本再原子替换，
+        并行的 xdist worker 不会互相覆盖
+
+        Args:
+            serials: 只保存这些设备，None 表示全部（例如不保存单元测试中替身设备的样本）
+        """
+        if not self.stats_dir or not self.enabled:
+            return
+        with self._lock:
+            wanted = None if serials is None else {serial or DEFAULT_SERIAL for serial in serials}
+            pending = {
+                serial: histograms for serial, histograms in self._unsaved.items()
+                if histograms and (wanted is None or serial in wanted)
+            }
+            for serial in pending:
+                del self._unsaved[serial]
+        for serial, histograms in pending.items():
+            path = self._path(serial)
+            try:
+                with file_lock(path + ".lock"):
+                    merged = self._read(path)
+                    for operation, histogram in histograms.items():
+                        merged.setdefault(operation, LatencyHistogram()).merge(histogram)
+                    operations = {operation: h.to_dict() for operation, h in merged.items()}
+                    tmp_file = f"{path}.{os.getpid()}.tmp"
+                    with open(tmp_file, "w", encoding="utf-8") as f:
+                        json.dump({"serial": serial, "operations": operations}, f, indent=2, sort_keys=True)
+                    os.replace(tmp_file, path)
+            except OSError as e:
+                logger.warning(f"写入超时统计失败 {path}: {e}")
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        生成写入报告的摘要
+
+        Returns:
+            包含采用统计/默认超时的次数、超时次数以及各设备各操作当前超时和耗时分布的字典
+        """
+        with self._lock:
+            devices = {}
+            for serial, histograms in self.histograms.items():
+                devices[serial] = {}
+                for operation, histogram in histograms.items():
+                    p = histogram.percentile(self.percentile)
+                    devices[serial][operation] = {
+                        "samples": histogram.count,
+                        f"p{self.percentile:g}_ms": round(p, 3) if p is not None else None,
+                        "max_ms": round(histogram.max_ms, 3) if histogram.max_ms is not None else None,
+                    }
+            for serial, operations in self.remote_devices.items():
+                devices.setdefault(serial, {}).update(operations)
+            return dict(self.stats, devices=devices)
+
+    def merge(self, summary: Dict[str, Any]):
+        """
+        合并另一个进程 summary() 的结果
+
+        Args:
+            summary: 其他 xdist worker 的摘要
+        """
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] += summary.get(key, 0)
+            for serial, operations in summary.get("devices", {}).items():
+                self.remote_devices.setdefault(serial, {}).update(operations)
+
+    def reset(self):
+        """清空进程内的统计（不影响已持久化的文件）"""
+        with self._lock:
+            self.histograms.clear()
+            self._unsaved.clear()
+            self.remote_devices.clear()
+            self.stats = {"adaptive": 0, "fallback": 0, "timeouts": 0}
+
+
+_service: Optional[AdaptiveTimeouts] = None
+_service_lock = threading.Lock()
+
+
+def get_adaptive_timeouts() -> AdaptiveTimeouts:
+    """
+    获取进程内共享的自适应超时服务
+
+    Returns:
+        AdaptiveTimeouts 对象
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            from config.config import Config
+
+            _service = AdaptiveTimeouts(
+                stats_dir=Config.ADAPTIVE_TIMEOUT_DIR or None,
+                percentile=Config.ADAPTIVE_TIMEOUT_PERCENTILE,
+                safety_factor=Config.ADAPTIVE_TIMEOUT_FACTOR,
+                min_samples=Config.ADAPTIVE_TIMEOUT_MIN_SAMPLES,
+                minimum=Config.ADAPTIVE_TIMEOUT_MIN,
+                min_factor=Config.ADAPTIVE_TIMEOUT_MIN_FACTOR,
+                enabled=Config.ADAPTIVE_TIMEOUT,
+            )
+        return _service
@@ -0,0 +1,138 @@
+"""
+应用前台状态跟踪
+应用已在前台时直接复用，在后台时用 intent 回到主界面，只有要求全新状态时才冷启动
+"""
+import time
+import logging
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# FLAG_ACTIVITY_NEW_TASK | FLAG_ACTIVITY_CLEAR_TOP | FLAG_ACTIVITY_SINGLE_TOP：
+# 复用已有任务栈并清除主界面之上的页面，进程不重启
+RESET_FLAGS = "0x34000000"
+
+
+class AppStateTracker:
+    """会话级的应用前台状态跟踪"""
+
+    COLD = "cold"
+    RESET = "reset"
+    REUSED = "reused"
+
+    def __init__(self, device, timeout: float = 10.0):
+        """
+        初始化状态跟踪
+
+        Args:
+            device: uiautomator2 设备对象
+            timeout: 等待应用进入前台的超时时间
+        """
+        self.device = device
+        self.timeout = timeout
+        self.foreground: Optional[Dict[str, Any]] = None
+        self._launchers: Dict[str, Optional[str]] = {}
+        self.stats = {self.COLD: 0, self.RESET: 0, self.REUSED: 0, "seconds": 0.0}
+
+    def current(self) -> Dict[str, Any]:
+        """
+        查询当前前台应用（一次 RPC）
+
+        Returns:
+            包含 package 和 activity 的字典，查询失败时为空字典
+        """
+        try:
+            self.foreground = self.device.app_current()
+        except Exception as e:
+            logger.warning(f"获取前台应用失败: {e}")
+            self.foreground = {}
+        return self.foreground
+
+    def launcher_activity(self, package: str) -> Optional[str]:
+        """
+        解析并缓存应用的启动 Activity
+
+        Args:
+            package: 应用包名
+
+        Returns:
+            完整的 Activity 名称，无法解析时返回 None
+        """
+        if package not in self._launchers:
+            activity = None
+            try:
+                output = self.device.shell(
+                    ["cmd", "package", "resolve-activity", "--brief",
+                     "-c", "android.intent.category.LAUNCHER", package]
+                ).output
+                component = output.strip().splitlines()[-1] if output.strip() else ""
+                if component.startswith(package + "/"):
+                    activity = component.split("/", 1)[1]
+                    if activity.startswith("."):
+                        activity = package + activity
+            except Exception as e:
+                logger.debug(f"解析启动 Activity 失败 {package}: {e}")
+            self._launchers[package] = activity
+        return self._launchers[package]
+
+    def ensure(self, package: str, activity: Optional[str] = None, fresh: bool = False) -> str:
+        """
+        让应用处于前台的主界面
+
+        Args:
+            package: 应用包名
+            activity: 目标 Activity，默认解析启动 Activity
+            fresh: 是否先停止应用再冷启动
+
+        Returns:
+            本次使用的方式: cold、reset 或 reused
+        """
+        start = time.perf_counter()
+        activity = activity or self.launcher_activity(package)
+
+        if fresh:
+            self.device.app_start(package, activity, stop=True)
+            mode = self.COLD
+        else:
+            current = self.current()
+            if current.get("package") == package and (
+                activity is None or self._same_activity(package, current.get("activity"), activity)
+            ):
+                mode = self.REUSED
+            elif activity:
+                self.device.shell(
+                    ["am", "start", "-n", f"{package}/{activity}", "-f", RESET_FLAGS]
+                )
+                mode = self.RESET
+            else:
+                self.device.app_start(package)
+                mode = self.RESET
+
+        if mode != self.REUSED and not self.device.app_wait(package, timeout=self.timeout, front=True):
+            raise RuntimeError(f"应用 {package} 未能在 {self.timeout} 秒内进入前台")
+        self.foreground = {"package": package, "activity": activity}
+        elapsed = time.perf_counter() - start
+        self.stats[mode] += 1
+        self.stats["seconds"] += elapsed
+        logger.info(f"应用 {package} 已就绪 ({mode}, {elapsed:.2f}秒)")
+        return mode
+
+    @staticmethod
+    def _same_activity(package: str, current: Optional[str], target: str) -> bool:
+        """比较 Activity 名称，兼容 .Main 和 包名.Main 两种写法"""
+        if not current:
+            return False
+
+        def normalize(name: str) -> str:
+            return package + name if name.startswith(".") else name
+
+        return normalize(current) == normalize(target)
+
+    def stop_all(self):
+        """停止所有应用并清空前台状态"""
+        self.device.app_stop_all()
+        self.foreground = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """返回各启动方式的次数和总耗时"""
+        return dict(self.stats, seconds=round(self.stats["seconds"], 3))
@@ -0,0 +1,234 @@
+"""
+批量操作脚本
+收集一串操作，选择器统一从一份层级快照解析，坐标操作连续下发
+"""
+import time
+import logging
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+from utils.helpers import poll_until, BackoffPolicy
+from utils.hierarchy import HierarchySnapshot
+from utils.metrics import get_metrics_registry, device_serial
+
+logger = logging.getLogger(__name__)
+
+
+class StepResult:
+    """单个步骤的执行结果"""
+
+    def __init__(self, index: int, action: str, target: Any):
+        """
+        初始化步骤结果
+
+        Args:
+            index: 步骤序号
+            action: 操作名称
+            target: 操作对象（选择器、按键或坐标）
+        """
+        self.index = index
+        self.action = action
+        self.target = target
+        self.ok = False
+        self.skipped = False
+        self.elapsed = 0.0
+        self.wait = 0.0
+        self.error: Optional[BaseException] = None
+        self.point: Optional[Tuple[int, int]] = None
+
+    def __repr__(self) -> str:
+        state = "skipped" if self.skipped else ("ok" if self.ok else f"error={self.error!r}")
+        return f"StepResult({self.index}, {self.action}, {self.target}, {state}, {self.elapsed:.3f}s)"
+
+
+class ActionBatch:
+    """
+    批量操作脚本
+
+    用法::
+
+        with self.batch() as batch:
+            batch.tap({"text": "登录"})
+            batch.set_text({"resourceId": "app:id/user"}, "admin")
+            batch.press("enter")
+        batch.results
+
+    两次 sync() 之间的所有选择器从同一份层级快照解析（每次轮询一次 dump）。
+    若某一步会切换页面，后续步骤的选择器需要在 sync() 之后添加
+    """
+
+    def __init__(
+        self,
+        device,
+        timeout: float = 10.0,
+        stop_on_error: bool = True,
+        raise_on_error: bool = True,
+        policy: Optional[BackoffPolicy] = None,
+        on_done: Optional[Callable[[], None]] = None
+    ):
+        """
+        初始化批量操作
+
+        Args:
+            device: uiautomator2 设备对象
+            timeout: 每段等待选择器出现的超时时间
+            stop_on_error: 某一步失败后是否跳过剩余步骤
+            raise_on_error: 执行结束后若有失败步骤，是否抛出第一个异常
+            policy: 等待选择器时的轮询策略
+            on_done: 所有步骤执行完（包括失败）后调用，例如让页面缓存失效
+        """
+        self.device = device
+        self.timeout = timeout
+        self.stop_on_error = stop_on_error
+        self.raise_on_error = raise_on_error
+        self.policy = policy
+        self.on_done = on_done
+        self.steps: List[Dict[str, Any]] = []
+        self.results: List[StepResult] = []
+        self.dumps = 0
+
+    def _add(self, action: str, **params) -> "ActionBatch":
+        self.steps.append(dict(params, action=action))
+        return self
+
+    def tap(self, selector: Dict[str, Any]) -> "ActionBatch":
+        """点击选择器匹配元素的中心"""
+        return self._add("tap", selector=selector)
+
+    def set_text(self, selector: Dict[str, Any], text: str, clear: bool = True) -> "ActionBatch":
+        """点击输入框获取焦点后输入文本"""
+        return self._add("set_text", selector=selector, text=text, clear=clear)
+
+    def click(self, x: int, y: int) -> "ActionBatch":
+        """点击坐标"""
+        return self._add("click", point=(x, y))
+
+    def press(self, key: Any) -> "ActionBatch":
+        """按键，key 为按键名或键码"""
+        return self._add("press", key=key)
+
+    def swipe(self, fx: int, fy: int, tx: int, ty: int, duration: float = 0.1) -> "ActionBatch":
+        """从 (fx, fy) 滑动到 (tx, ty)"""
+        return self._add("swipe", points=(fx, fy, tx, ty), duration=duration)
+
+    def sync(self) -> "ActionBatch":
+        """之后的选择器使用新的层级快照解析"""
+        return self._add("sync")
+
+    def __enter__(self) -> "ActionBatch":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.run()
+        return False
+
+    def _segments(self) -> List[List[int]]:
+        """按 sync() 把步骤切分为若干段"""
+        segments, current = [], []
+        for i, step in enumerate(self.steps):
+            if step["action"] == "sync":
+                if current:
+                    segments.append(current)
+                current = []
+            else:
+                current.append(i)
+        if current:
+            segments.append(current)
+        return segments
+
+    def _resolve(self, steps: List[Dict[str, Any]]) -> Optional[HierarchySnapshot]:
+        """等待段内所有选择器出现，返回满足条件的快照"""
+        selectors = [step["selector"] for step in steps if "selector" in step]
+        if not selectors:
+            return None
+
+        def all_present():
+            self.dumps += 1
+            snapshot = HierarchySnapshot.capture(self.device)
+            return snapshot if all(snapshot.exists(s) for s in selectors) else None
+
+        result = poll_until(all_present, timeout=self.timeout, policy=self.policy)
+        if result:
+            return result.value
+        # 超时后用最后一次快照定位具体缺失的元素
+        self.dumps += 1
+        return HierarchySnapshot.capture(self.device)
+
+    def _execute(self, step: Dict[str, Any], result: StepResult, snapshot: Optional[HierarchySnapshot]):
+        action = step["action"]
+        if "selector" in step:
+            node = snapshot.find(step["selector"]) if snapshot else None
+            if node is None:
+                raise TimeoutError(f"元素未出现: {step['selector']}")
+            result.point = node.center
+        if action == "tap":
+            self.device.click(*result.point)
+        elif action == "set_text":
+            self.device.click(*result.point)
+            self.device.send_keys(step["text"], clear=step["clear"])
+        elif action == "click":
+            result.point = step["point"]
+            self.device.click(*result.point)
+        elif action == "press":
+            self.device.press(step["key"])
+        elif action == "swipe":
+            self.device.swipe(*step["points"], duration=step["duration"])
+
+    def run(self) -> List[StepResult]:
+        """
+        执行所有步骤
+
+        Returns:
+            每个步骤的结果列表（不含 sync）
+
+        Raises:
+            第一个失败步骤的异常（raise_on_error 为 True 时）
+        """
+        self.results = []
+        registry = get_metrics_registry()
+        serial = device_serial(self.device)
+        failed = False
+
+        for segment in self._segments():
+            steps = [self.steps[i] for i in segment]
+            wait_start = time.perf_counter()
+            snapshot = None if failed and self.stop_on_error else self._resolve(steps)
+            wait = time.perf_counter() - wait_start
+            for step in steps:
+                result = StepResult(len(self.results), step["action"], self._target(step))
+                # 段首步骤记录等待选择器出现的耗时
+                result.wait, wait = wait, 0.0
+                self.results.append(result)
+                if failed and self.stop_on_error:
+                    result.skipped = True
+                    continue
+                start = time.perf_counter()
+                try:
+                    self._execute(step, result, snapshot)
+                    result.ok = True
+                except Exception as e:
+                    result.error = e
+                    failed = True
+                    logger.error(f"批量操作第 {result.index} 步失败 {result.action} {result.target}: {e}")
+                result.elapsed = time.perf_counter() - start
+                registry.record(
+                    f"batch.{result.action}", result.elapsed,
+                    selector=step.get("selector"), device=serial, error=not result.ok,
+                )
+
+        logger.info(
+            f"批量操作完成: {sum(r.ok for r in self.results)}/{len(self.results)} 步成功, "
+            f"层级 dump {self.dumps} 次"
+        )
+        if self.on_done is not None:
+            self.on_done()
+        if failed and self.raise_on_error:
+            raise next(r.error for r in self.results if r.error is not None)
+        return self.results
+
+    @staticmethod
+    def _target(step: Dict[str, Any]) -> Any:
+        for key in ("selector", "key", "point", "points"):
+            if key in step:
+                return step[key]
+        return None
@@ -2,29 +2,65 @@
 设备管理工具类
 负责设备的连接、信息获取等操作
 """
-import uiautomator2 as u2
 import logging
-from typing import Optional, Dict, Any
+from typing import TYPE_CHECKING, Optional, Dict, Any, Callable, List, Sequence
+
+from utils.device_profile import DeviceProfileCache
+from utils.liveness import LivenessTracker
+from utils.metrics import device_serial
+from utils.shell_batch import ShellResult, run_batch
+
+if TYPE_CHECKING:
+    import uiautomator2 as u2
 
 logger = logging.getLogger(__name__)
 
 
+def _u2_connect(serial: Optional[str]):
+    """默认连接函数，首次连接时才导入 uiautomator2"""
+    import uiautomator2 as u2
+    
+    return u2.connect(serial)
+
+
 class DeviceManager:
     """设备管理器"""
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        connect_func: Optional[Callable[[Optional[str]], Any]] = None
+    ):
         """
         初始化设备管理器
         
         Args:
-            config: 设备配置字典，包含 serial, timeout 等
+            config: 设备配置字典，包含 serial, timeout, heartbeat_ttl, suspect_after, profile_dir 等
+            connect_func: 连接函数，接收序列号返回设备对象，默认 u2.connect
         """
         self.config = config
-        self.device: Optional[u2.Device] = None
+        self.device: Optional["u2.Device"] = None
         self.serial = config.get("serial")
         self.timeout = config.get("timeout", 10.0)
+        self.connect_func = connect_func or _u2_connect
+        self.liveness = LivenessTracker(
+            self._probe,
+            ttl=config.get("heartbeat_ttl", 5.0),
+            suspect_after=config.get("suspect_after", 2),
+        )
+        # 静态信息缓存，profile_dir 为空时只在进程内缓存
+        self.profiles = DeviceProfileCache(config.get("profile_dir"))
+        self._profile: Optional[Dict[str, Any]] = None
+        # suspect 状态下下一次允许重连的时间，每个心跳 TTL 最多重连一次
+        self._next_reconnect: Optional[float] = None
     
-    def connect(self) -> Optional[u2.Device]:
+    def _probe(self) -> Dict[str, Any]:
+        """心跳探测：读取一次 device.info"""
+        if not self.device:
+            raise ConnectionError("设备未连接")
+        return self.device.info
+    
+    def connect(self) -> Optional["u2.Device"]:
         """
         连接到设备
         
@@ -34,67 +70,153 @@ class DeviceManager:
         try:
             if self.serial:
                 logger.info(f"正在连接到设备: {self.serial}")
-                self.device = u2.connect(self.serial)
             else:
                 logger.info("正在连接到默认设备（通过 adb devices 获取）")
-                self.device = u2.connect()
+            self.device = self.connect_func(self.serial)
+            self._profile = None
             
             # 验证连接
             if self.device:
                 info = self.device.info
+                self.liveness.record_success(info)
                 logger.info(f"设备连接成功: {info.get('productName', 'Unknown')}")
                 return self.device
             else:
                 logger.error("设备连接失败")
+                self.liveness.record_failure(ConnectionError("连接函数未返回设备"))
                 return None
                 
         except Exception as e:
             logger.error(f"连接设备时发生错误: {e}")
+            self.liveness.record_failure(e)
             return None
     
-    def get_device_info(self) -> Dict[str, Any]:
+    def get_profile(self) -> Dict[str, Any]:
+        """
+        获取设备静态信息（品牌、型号、系统版本、屏幕参数等）
+        
+        按序列号缓存在磁盘上，构建指纹变化时重新读取；读取失败时返回空字典，本次连接内不再重试
+        
+        Returns:
+            静态信息字典
+        """
+        if not self.device:
+            return {}
+        if self._profile is None:
+            try:
+                self._profile = self.profiles.get(self.device, self.serial or device_serial(self.device))
+            except Exception as e:
+                logger.warning(f"读取设备静态信息失败: {e}")
+                self._profile = {}
+        return self._profile
+    
+    def get_device_info(self, dynamic: bool = True) -> Dict[str, Any]:
         """
         获取设备信息
         
+        静态字段来自 get_profile()，动态字段（屏幕状态、前台应用）来自心跳缓存，过期时才刷新
+        
+        Args:
+            dynamic: 是否包含动态字段，False 时不会触发 device.info
+        
         Returns:
             设备信息字典
         """
         if not self.device:
             return {}
         
-        try:
-            info = self.device.info
-            return {
-                "serial": self.device.serial,
-                "version": info.get("version", "Unknown"),
-                "sdk": info.get("sdk", "Unknown"),
-                "product_name": info.get("productName", "Unknown"),
-                "brand": info.get("brand", "Unknown"),
-                "model": info.get("model", "Unknown"),
-                "display": info.get("display", {}),
-            }
-        except Exception as e:
-            logger.error(f"获取设备信息失败: {e}")
-            return {}
+        profile = self.get_profile()
+        info: Dict[str, Any] = {}
+        if dynamic or not profile:
+            # 心跳 TTL 内复用缓存的信息，探测失败时退回最近一次成功的信息
+            if not (self.liveness.is_fresh() and self.liveness.last_info) and not self.liveness.beat():
+                if not self.liveness.last_info and not profile:
+                    logger.error("获取设备信息失败")
+                    return {}
+                logger.warning("获取设备信息失败，使用最近一次成功的信息")
+            info = self.liveness.last_info
+        
+        result = {
+            "serial": self.serial or device_serial(self.device),
+            "version": profile.get("version") or info.get("version", "Unknown"),
+            "sdk": profile.get("sdk") or info.get("sdk", info.get("sdkInt", "Unknown")),
+            "product_name": profile.get("product_name") or info.get("productName", "Unknown"),
+            "brand": profile.get("brand") or info.get("brand", "Unknown"),
+            "model": profile.get("model") or info.get("model", "Unknown"),
+            "display": profile.get("display") or info.get("display", {}),
+        }
+        if dynamic:
+            result["screen_on"] = info.get("screenOn")
+            result["current_package"] = info.get("currentPackageName")
+        return result
+    
+    def shell_batch(self, commands: Sequence[str], timeout: int = 60) -> List[ShellResult]:
+        """
+        在一次 shell 调用中执行多条命令
+        
+        每条命令在独立的子 shell 中执行，输出按唯一分隔符切分，支持多行输出；
+        脚本超长时自动拆成多次调用
+        
+        Args:
+            commands: 命令列表
+            timeout: 每次 shell 调用的超时时间（秒）
+        
+        Returns:
+            与 commands 一一对应的 ShellResult 列表（output、exit_code）
+        """
+        if not self.device:
+            raise ConnectionError("设备未连接")
+        if not commands:
+            return []
+        return run_batch(self.device, commands, timeout=timeout)
     
     def is_connected(self) -> bool:
         """
         检查设备是否已连接
         
+        心跳 TTL 内直接返回缓存结果，不产生 RPC；最近一次心跳失败时返回 False，
+        连续失败进入 suspect 状态后每个 TTL 最多尝试重新连接一次，其余调用直接返回 False
+        
         Returns:
             True 如果设备已连接，否则 False
         """
         if not self.device:
             return False
         
-        try:
-            self.device.info
+        if self.liveness.is_alive():
+            self._next_reconnect = None
             return True
-        except Exception:
+        if not self.liveness.needs_reconnect():
+            return False
+        now = self.liveness.clock()
+        if self._next_reconnect is not None and now < self._next_reconnect:
             return False
+        self._next_reconnect = now + self.liveness.ttl
+        logger.warning("设备心跳连续失败，尝试重新连接")
+        previous = self.device
+        if self.connect() is not None:
+            self._next_reconnect = None
+            return True
+        # 保留原设备对象，下一个窗口还能继续探测和重连
+        self.device = self.device or previous
+        return False
+    
+    def start_heartbeat(self, interval: Optional[float] = None):
+        """
+        启动后台心跳线程，使 is_connected() 始终命中缓存
+        
+        Args:
+            interval: 探测间隔（秒），默认为 TTL 的一半
+        """
+        self.liveness.start(interval)
+    
+    def stop_heartbeat(self):
+        """停止后台心跳线程"""
+        self.liveness.stop()
     
     def disconnect(self):
         """断开设备连接"""
+        self.stop_heartbeat()
         if self.device:
             try:
                 self.device = None
@@ -0,0 +1,297 @@
+"""
+多设备租约池
+为每个 pytest-xdist worker 独占分配一台设备，租约通过加锁的 JSON 文件跨进程共享
+"""
+import os
+import json
+import time
+import logging
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Callable
+
+from utils.device_manager import DeviceManager
+from utils.helpers import file_lock
+
+logger = logging.getLogger(__name__)
+
+# adb 未发现设备时租用的占位序列号，连接时交给 u2.connect() 选择默认设备
+DEFAULT_DEVICE = "default"
+
+
+def current_worker_id() -> str:
+    """当前 xdist worker 编号，非分布式运行时为 master"""
+    return os.getenv("PYTEST_XDIST_WORKER", "master")
+
+
+def discover_serials() -> List[str]:
+    """
+    通过 adb 发现已连接的设备
+
+    Returns:
+        状态为 device 的序列号列表，adb 不可用时返回空列表
+    """
+    try:
+        import adbutils
+        return [d.serial for d in adbutils.adb.device_list()]
+    except Exception as e:
+        logger.warning(f"获取 adb 设备列表失败: {e}")
+        return []
+
+
+def pid_alive(pid: int) -> bool:
+    """
+    检查进程是否存活
+
+    Args:
+        pid: 进程号
+
+    Returns:
+        True 如果进程仍在运行
+    """
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        import ctypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class DevicePool:
+    """多设备租约池"""
+
+    def __init__(
+        self,
+        lease_file: str,
+        serials: Optional[List[str]] = None,
+        timeout: float = 10.0,
+        connect_func: Optional[Callable[[Optional[str]], Any]] = None,
+        discover_func: Callable[[], List[str]] = discover_serials,
+        manager_options: Optional[Dict[str, Any]] = None,
+        session: Optional[str] = None
+    ):
+        """
+        初始化设备池
+
+        Args:
+            lease_file: 租约文件路径，同一会话的所有 worker 必须相同
+            serials: 设备序列号列表，None 表示通过 adb 自动发现
+            timeout: 设备操作超时时间
+            connect_func: 传给 DeviceManager 的连接函数，测试时可替换
+            discover_func: 设备发现函数
+            manager_options: 传给 DeviceManager 的其他配置，如 heartbeat_ttl
+            session: 会话标识，租约文件记录的会话与之不同（上一次运行留下的）时先清空状态
+        """
+        self.lease_file = lease_file
+        self.lock_file = lease_file + ".lock"
+        self.serials = serials
+        self.timeout = timeout
+        self.connect_func = connect_func
+        self.discover_func = discover_func
+        self.manager_options = manager_options or {}
+        self.session = session
+
+    @contextmanager
+    def _locked_state(self, write: bool = True):
+        """加跨进程锁读取租约状态，write 为 True 时退出时写回"""
+        with file_lock(self.lock_file):
+            state = self._read_state()
+            yield state
+            if write:
+                tmp_file = self.lease_file + ".tmp"
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    json.dump(state, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_file, self.lease_file)
+
+    def _read_state(self) -> Dict[str, Any]:
+        state = {}
+        if os.path.exists(self.lease_file):
+            try:
+                with open(self.lease_file, encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"租约文件损坏，已重置: {e}")
+        state.setdefault("started_at", time.time())
+        state.setdefault("leases", {})
+        state.setdefault("stats", {})
+        state.setdefault("bad", [])
+        if self.session and state.get("session") != self.session:
+            state.update(session=self.session, started_at=time.time(), leases={}, stats={}, bad=[])
+        return state
+
+    def reset(self):
+        """清空租约状态（会话之间的清理由 session 标识完成，此方法供手动重置和测试使用）"""
+        with self._locked_state() as state:
+            state["started_at"] = time.time()
+            state["leases"] = {}
+            state["stats"] = {}
+            state["bad"] = []
+
+    def _available_serials(self) -> List[str]:
+        if self.serials is not None:
+            return [serial for serial in self.serials if serial]
+        # adb 发现失败时与单设备时一样交给 u2.connect() 连接默认设备
+        return [serial for serial in self.discover_func() if serial] or [DEFAULT_DEVICE]
+
+    @staticmethod
+    def _close_lease(state: Dict[str, Any], serial: str):
+        lease = state["leases"].pop(serial, None)
+        if lease is None:
+            return
+        stats = state["stats"].setdefault(serial, {"leases": 0, "busy_seconds": 0.0})
+        stats["busy_seconds"] += max(0.0, time.time() - lease["since"])
+
+    @staticmethod
+    def _open_lease(state: Dict[str, Any], serial: str, worker_id: str):
+        state["leases"][serial] = {
+            "worker": worker_id,
+            "pid": os.getpid(),
+            "since": time.time(),
+        }
+        stats = state["stats"].setdefault(serial, {"leases": 0, "busy_seconds": 0.0})
+        stats["leases"] += 1
+
+    def _reap_stale(self, state: Dict[str, Any]):
+        """释放已崩溃 worker 持有的租约"""
+        for serial, lease in list(state["leases"].items()):
+            if not pid_alive(lease["pid"]):
+                logger.warning(
+                    f"worker {lease['worker']} (pid {lease['pid']}) 已退出，回收设备 {serial}"
+                )
+                self._close_lease(state, serial)
+
+    def _lease(self, worker_id: str) -> Optional[str]:
+        """在锁内为 worker 选择一台空闲设备"""
+        with self._locked_state() as state:
+            self._reap_stale(state)
+            for serial, lease in state["leases"].items():
+                if lease["worker"] == worker_id and lease["pid"] == os.getpid():
+                    return serial
+
+            free = [
+                serial for serial in self._available_serials()
+                if serial not in state["leases"] and serial not in state["bad"]
+            ]
+            if not free:
+                return None
+            # 优先分配累计占用时间最少的设备
+            free.sort(key=lambda s: state["stats"].get(s, {}).get("busy_seconds", 0.0))
+            serial = free[0]
+            self._open_lease(state, serial, worker_id)
+            return serial
+
+    def acquire(self, worker_id: Optional[str] = None) -> Optional[DeviceManager]:
+        """
+        为 worker 租用并连接一台设备
+
+        连接失败的设备会被标记为不可用，随后自动租用下一台
+
+        Args:
+            worker_id: worker 编号，默认取 PYTEST_XDIST_WORKER
+
+        Returns:
+            已连接的 DeviceManager，没有可用设备时返回 None
+        """
+        worker_id = worker_id or current_worker_id()
+        while True:
+            serial = self._lease(worker_id)
+            if serial is None:
+                logger.error(f"设备池中没有可分配给 {worker_id} 的空闲设备")
+                return None
+
+            manager = DeviceManager(
+                dict(
+                    self.manager_options,
+                    serial=None if serial == DEFAULT_DEVICE else serial,
+                    timeout=self.timeout
+                ),
+                connect_func=self.connect_func
+            )
+            if manager.connect() is not None:
+                logger.info(f"设备 {serial} 已租给 {worker_id}")
+                return manager
+
+            logger.warning(f"设备 {serial} 连接失败，标记为不可用并重新分配")
+            self.mark_bad(serial)
+
+    def release(self, worker_id: Optional[str] = None):
+        """
+        释放 worker 持有的租约
+
+        Args:
+            worker_id: worker 编号，默认取 PYTEST_XDIST_WORKER
+        """
+        worker_id = worker_id or current_worker_id()
+        with self._locked_state() as state:
+            for serial, lease in list(state["leases"].items()):
+                if lease["worker"] == worker_id and lease["pid"] == os.getpid():
+                    self._close_lease(state, serial)
+                    logger.info(f"设备 {serial} 已由 {worker_id} 释放")
+
+    def mark_bad(self, serial: str):
+        """
+        将设备标记为不可用并释放其租约
+
+        Args:
+            serial: 设备序列号
+        """
+        with self._locked_state() as state:
+            self._close_lease(state, serial)
+            if serial not in state["bad"]:
+                state["bad"].append(serial)
+
+    def mark_good(self, serial: str, worker_id: Optional[str] = None):
+        """
+        清除设备的不可用标记（例如熔断器恢复后），并把租约交还给仍在使用它的 worker
+
+        Args:
+            serial: 设备序列号
+            worker_id: 重新持有租约的 worker 编号，默认取 PYTEST_XDIST_WORKER
+        """
+        worker_id = worker_id or current_worker_id()
+        with self._locked_state() as state:
+            if serial not in state["bad"]:
+                return
+            state["bad"].remove(serial)
+            if serial in state["leases"]:
+                logger.warning(f"设备 {serial} 已被 {state['leases'][serial]['worker']} 租用")
+                return
+            self._open_lease(state, serial, worker_id)
+        logger.info(f"设备 {serial} 已恢复，重新租给 {worker_id}")
+
+    def utilization(self) -> Dict[str, Any]:
+        """
+        统计设备池使用情况
+
+        Returns:
+            包含会话时长、各设备租用次数、占用时间和利用率的字典
+        """
+        if not os.path.exists(self.lease_file):
+            return {"wall_seconds": 0.0, "devices": {}}
+        with self._locked_state(write=False) as state:
+            now = time.time()
+            wall = max(1e-9, now - state["started_at"])
+            devices = {}
+            for serial in sorted(set(state["stats"]) | set(state["leases"])):
+                stats = state["stats"].get(serial, {"leases": 0, "busy_seconds": 0.0})
+                busy = stats["busy_seconds"]
+                lease = state["leases"].get(serial)
+                if lease:
+                    busy += max(0.0, now - lease["since"])
+                devices[serial] = {
+                    "leases": stats["leases"],
+                    "busy_seconds": round(busy, 3),
+                    "utilization": round(min(1.0, busy / wall), 4),
+                    "holder": lease["worker"] if lease else None,
+                    "bad": serial in state["bad"],
+                }
+            return {"wall_seconds": round(wall, 3), "devices": devices}
@@ -0,0 +1,203 @@
+"""
+设备静态信息缓存
+品牌、型号、系统版本、屏幕尺寸等在设备刷机前不会变化，按序列号保存在磁盘上跨会话复用，
+构建指纹（ro.build.fingerprint）变化时重新读取
+"""
+import os
+import re
+import json
+import time
+import logging
+import threading
+from typing import Optional, Dict, Any
+
+from utils.helpers import serial_file_name
+from utils.shell_batch import run_batch
+
+logger = logging.getLogger(__name__)
+
+# 字段 -> 系统属性
+STATIC_PROPS = {
+    "version": "ro.build.version.release",
+    "sdk": "ro.build.version.sdk",
+    "brand": "ro.product.brand",
+    "model": "ro.product.model",
+    "manufacturer": "ro.product.manufacturer",
+    "product_name": "ro.product.name",
+    "abi": "ro.product.cpu.abi",
+    "fingerprint": "ro.build.fingerprint",
+}
+FINGERPRINT_PROP = STATIC_PROPS["fingerprint"]
+
+_GETPROP_LINE = re.compile(r"^\[([^\]]+)\]: \[(.*)\]$")
+_WM_SIZE = re.compile(r"(Physical|Override) size: (\d+)x(\d+)")
+_WM_DENSITY = re.compile(r"(Physical|Override) density: (\d+)")
+
+
+def parse_getprop(output: str) -> Dict[str, str]:
+    """
+    解析 getprop 的完整输出
+
+    Args:
+        output: 形如 [ro.product.model]: [Pixel 7] 的多行文本
+
+    Returns:
+        属性名 -> 值
+    """
+    props = {}
+    for line in output.splitlines():
+        match = _GETPROP_LINE.match(line.strip())
+        if match:
+            props[match.group(1)] = match.group(2)
+    return props
+
+
+def parse_display(size_output: str, density_output: str) -> Dict[str, int]:
+    """
+    解析 wm size / wm density 的输出，有 Override 时以其为准
+
+    Args:
+        size_output: wm size 的输出
+        density_output: wm density 的输出
+
+    Returns:
+        包含 width、height、density 的字典，缺失的字段省略
+    """
+    display: Dict[str, int] = {}
+    for kind, width, height in _WM_SIZE.findall(size_output):
+        if kind == "Override" or "width" not in display:
+            display["width"], display["height"] = int(width), int(height)
+    for kind, density in _WM_DENSITY.findall(density_output):
+        if kind == "Override" or "density" not in display:
+            display["density"] = int(density)
+    return display
+
+
+class DeviceProfileCache:
+    """
+    按序列号缓存设备静态信息
+
+    进程内每台设备只校验一次构建指纹（一次 shell 调用）；
+    指纹与磁盘缓存一致时直接复用，否则用一次批量 shell 读取全部属性和屏幕参数
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录，None 表示只在进程内缓存
+        """
+        self.cache_dir = cache_dir
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _path(self, serial: str) -> Optional[str]:
+        return os.path.join(self.cache_dir, serial_file_name(serial)) if self.cache_dir else None
+
+    def load(self, serial: str) -> Optional[Dict[str, Any]]:
+        """
+        读取磁盘缓存
+
+        Args:
+            serial: 设备序列号
+
+        Returns:
+            缓存的静态信息，不存在或损坏时返回 None
+        """
+        path = self._path(serial)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"设备信息缓存损坏，已忽略 {path}: {e}")
+            return None
+
+    def save(self, serial: str, profile: Dict[str, Any]):
+        """
+        写入磁盘缓存
+
+        Args:
+            serial: 设备序列号
+            profile: 静态信息
+        """
+        path = self._path(serial)
+        if not path:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # 多个 worker 可能同时写同一台设备的缓存，临时文件按进程区分
+            tmp_file = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(profile, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp_file, path)
+        except OSError as e:
+            logger.warning(f"写入设备信息缓存失败 {path}: {e}")
+
+    @staticmethod
+    def fetch(device) -> Dict[str, Any]:
+        """
+        从设备读取全部静态信息（一次批量 shell 调用）
+
+        Args:
+            device: uiautomator2 设备对象
+
+        Returns:
+            静态信息字典
+        """
+        props_result, size_result, density_result = run_batch(device, ["getprop", "wm size", "wm density"])
+        props = parse_getprop(props_result.output)
+        if not props:
+            raise RuntimeError(f"getprop 没有输出: {props_result.output[:200]!r}")
+        profile: Dict[str, Any] = {field: props.get(prop, "") for field, prop in STATIC_PROPS.items()}
+        if profile["sdk"].isdigit():
+            profile["sdk"] = int(profile["sdk"])
+        profile["display"] = parse_display(size_result.output, density_result.output)
+        profile["fetched_at"] = time.time()
+        return profile
+
+    def get(self, device, serial: str) -> Dict[str, Any]:
+        """
+        获取设备静态信息
+
+        Args:
+            device: uiautomator2 设备对象
+            serial: 设备序列号
+
+        Returns:
+            静态信息字典
+        """
+        with self._lock:
+            if serial in self._profiles:
+                return self._profiles[serial]
+
+        cached = self.load(serial)
+        if cached is not None:
+            fingerprint = device.shell(["getprop", FINGERPRINT_PROP]).output.strip()
+            if fingerprint and fingerprint == cached.get("fingerprint"):
+                profile = cached
+                self.stats["hits"] += 1
+            else:
+                logger.info(f"设备 {serial} 构建指纹已变化，重新读取设备信息")
+                self.stats["invalidations"] += 1
+                cached = None
+
+        if cached is None:
+            profile = self.fetch(device)
+            self.stats["misses"] += 1
+            self.save(serial, profile)
+
+        with self._lock:
+            self._profiles[serial] = profile
+        return profile
+
+    def invalidate(self, serial: str):
+        """丢弃某台设备的进程内和磁盘缓存"""
+        with self._lock:
+            self._profiles.pop(serial, None)
+        path = self._path(serial)
+        if path and os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,87 @@
+"""
+页面元素缓存
+按层级指纹缓存已解析的元素，界面未变化时跳过重复解析和查找
+"""
+import logging
+from typing import Optional, Dict, Any
+
+from utils.hierarchy import HierarchySnapshot, UiNode, hierarchy_fingerprint
+from utils.selector import selector_key
+
+logger = logging.getLogger(__name__)
+
+
+class ElementCache:
+    """
+    按层级指纹缓存已解析元素
+
+    每次查找仍然 dump 一次层级（界面可能被任何途径改变：启动应用、直接调用设备、异步加载），
+    指纹与缓存一致时复用已解析的快照和已查找过的元素，不一致时清空
+    """
+
+    def __init__(self):
+        """初始化元素缓存"""
+        self.snapshot: Optional[HierarchySnapshot] = None
+        self.elements: Dict[str, UiNode] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def lookup(self, selector: Dict[str, Any]) -> Optional[UiNode]:
+        """
+        在最近一次 update() 的快照上查找缓存的元素，同时计入命中或未命中
+
+        Args:
+            selector: 元素选择器字典
+
+        Returns:
+            该选择器已在当前快照上解析过时返回节点，否则返回 None
+        """
+        node = self.elements.get(selector_key(selector))
+        if node is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return node
+
+    def store(self, selector: Dict[str, Any], node: UiNode):
+        """记录在当前快照上解析出的元素"""
+        self.elements[selector_key(selector)] = node
+
+    def update(self, xml: str) -> HierarchySnapshot:
+        """
+        用新 dump 的层级刷新缓存
+
+        Args:
+            xml: dump_hierarchy() 返回的 XML 文本
+
+        Returns:
+            指纹未变化时返回缓存的快照（不重新解析），否则返回新快照
+        """
+        fingerprint = hierarchy_fingerprint(xml)
+        if self.snapshot is None or self.snapshot.fingerprint != fingerprint:
+            if self.elements:
+                self.invalidations += 1
+                logger.debug(f"界面层级已变化，清空 {len(self.elements)} 个缓存元素")
+            self.elements = {}
+            self.snapshot = HierarchySnapshot(xml)
+            self.snapshot._fingerprint = fingerprint
+        return self.snapshot
+
+    def clear(self):
+        """清空缓存"""
+        if self.elements:
+            self.invalidations += 1
+        self.snapshot = None
+        self.elements = {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """返回命中、未命中、失效次数和命中率"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "cached": len(self.elements),
+        }
@@ -0,0 +1,332 @@
+"""
+进程内的 uiautomator2 设备替身
+提供固定的界面层级、截图和设备信息，可注入 RPC 延迟，用于在没有真机时测量框架自身开销
+"""
+import re
+import time
+import threading
+from collections import Counter
+from typing import Optional, Dict, Any, List, Tuple, Union
+
+from utils.hierarchy import HierarchySnapshot
+
+# 默认界面：包含 HomePage 的示例元素和一个设置列表
+DEFAULT_HIERARCHY = """<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>
+<hierarchy rotation="0">
+  <node index="0" text="" resource-id="" class="android.widget.FrameLayout" package="com.example.app" content-desc="" clickable="false" enabled="true" focusable="false" focused="false" scrollable="false" bounds="[0,0][1080,2340]">
+    <node index="0" text="" resource-id="com.example.app:id/search_box" class="android.widget.EditText" package="com.example.app" content-desc="" clickable="true" enabled="true" focusable="true" focused="false" scrollable="false" bounds="[40,120][900,240]" />
+    <node index="1" text="" resource-id="com.example.app:id/menu_button" class="android.widget.ImageButton" package="com.example.app" content-desc="菜单" clickable="true" enabled="true" focusable="true" focused="false" scrollable="false" bounds="[920,120][1040,240]" />
+    <node index="2" text="" resource-id="android:id/list" class="androidx.recyclerview.widget.RecyclerView" package="com.example.app" content-desc="" clickable="false" enabled="true" focusable="true" focused="false" scrollable="true" bounds="[0,260][1080,2200]">
+      <node index="0" text="网络和互联网" resource-id="android:id/title" class="android.widget.TextView" package="com.example.app" content-desc="" clickable="true" enabled="true" focusable="false" focused="false" scrollable="false" bounds="[0,260][1080,420]" />
+      <node index="1" text="已连接的设备" resource-id="android:id/title" class="android.widget.TextView" package="com.example.app" content-desc="" clickable="true" enabled="true" focusable="false" focused="false" scrollable="false" bounds="[0,420][1080,580]" />
+      <node index="2" text="应用" resource-id="android:id/title" class="android.widget.TextView" package="com.example.app" content-desc="" clickable="true" enabled="true" focusable="false" focused="false" scrollable="false" bounds="[0,580][1080,740]" />
+      <node index="3" text="显示" resource-id="android:id/title" class="android.widget.TextView" package="com.example.app" content-desc="" clickable="true" enabled="true" focusable="false" focused="false" scrollable="false" bounds="[0,740][1080,900]" />
+      <node index="4" text="声音" resource-id="android:id/title" class="android.widget.TextView" package="com.example.app" content-desc="" clickable="true" enabled="true" focusable="false" focused="false" scrollable="false" bounds="[0,900][1080,1060]" />
+    </node>
+    <node index="3" text="" resource-id="com.example.app:id/settings" class="android.widget.ImageButton" package="com.example.app" content-desc="设置" clickable="true" enabled="true" focusable="true" focused="false" scrollable="false" bounds="[900,2200][1080,2340]" />
+  </node>
+</hierarchy>"""
+
+DEFAULT_INFO = {
+    "currentPackageName": "com.example.app",
+    "displayHeight": 2340,
+    "displayWidth": 1080,
+    "displayRotation": 0,
+    "displaySizeDpX": 411,
+    "displaySizeDpY": 891,
+    "naturalOrientation": True,
+    "productName": "fake_phone",
+    "screenOn": True,
+    "sdkInt": 33,
+}
+
+
+# set_orientation 的方向名 -> displayRotation
+ORIENTATIONS = {"natural": 0, "n": 0, "left": 1, "l": 1, "upsidedown": 2, "u": 2, "right": 3, "r": 3}
+
+
+DEFAULT_PROPS = {
+    "ro.build.fingerprint": "fake/fake_phone/fake:13/TQ3A.230805.001/1:user/release-keys",
+    "ro.build.version.release": "13",
+    "ro.build.version.sdk": "33",
+    "ro.product.brand": "fake",
+    "ro.product.cpu.abi": "arm64-v8a",
+    "ro.product.manufacturer": "Fake",
+    "ro.product.model": "Fake Phone",
+    "ro.product.name": "fake_phone",
+    "ro.serialno": "fake-serial",
+}
+
+# utils.shell_batch 生成的单条命令包装
+_BATCH_COMMAND = re.compile(r"echo '([^']+):begin:(\d+)'; \( (.*?)\n\) 2>&1; ", re.S)
+
+
+class ShellResponse:
+    """与 uiautomator2 ShellResponse 字段一致的 shell 结果"""
+
+    def __init__(self, output: str, exit_code: int = 0):
+        self.output = output
+        self.exit_code = exit_code
+
+    def __iter__(self):
+        return iter((self.output, self.exit_code))
+
+
+class _Exists:
+    """与 UiObject.exists 一致：可直接当布尔值，也可带 timeout 调用"""
+
+    def __init__(self, obj: "FakeUiObject"):
+        self.obj = obj
+
+    def __bool__(self) -> bool:
+        return self.obj._find() is not None
+
+    def __call__(self, timeout: float = 0) -> bool:
+        return self.obj.wait(timeout=timeout)
+
+
+class FakeUiObject:
+    """与 UiObject 常用接口一致的元素替身，在当前层级上本地求值"""
+
+    def __init__(self, device: "FakeDevice", selector: Dict[str, Any]):
+        self.device = device
+        self.selector = selector
+
+    def _find(self):
+        self.device._rpc("objInfo")
+        return self.device.snapshot.find(self.selector)
+
+    def _must_find(self):
+        node = self._find()
+        if node is None:
+            raise LookupError(f"UiObjectNotFoundError: {self.selector}")
+        return node
+
+    @property
+    def exists(self) -> _Exists:
+        return _Exists(self)
+
+    @property
+    def count(self) -> int:
+        self.device._rpc("count")
+        return self.device.snapshot.count(self.selector)
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        return self._must_find().info
+
+    def wait(self, exists: bool = True, timeout: Optional[float] = None) -> bool:
+        self.device._rpc("waitForExists" if exists else "waitUntilGone")
+        return (self.device.snapshot.find(self.selector) is not None) == exists
+
+    def wait_gone(self, timeout: Optional[float] = None) -> bool:
+        return self.wait(exists=False, timeout=timeout)
+
+    def click(self, timeout: Optional[float] = None):
+        node = self._must_find()
+        self.device.click(*node.center)
+
+    def long_click(self, duration: float = 0.5):
+        node = self._must_find()
+        self.device.long_click(*node.center, duration=duration)
+
+    def get_text(self) -> str:
+        return self._must_find().text
+
+    def set_text(self, text: str):
+        self._must_find()
+        self.device.actions.append(("set_text", self.selector, text))
+
+    def clear_text(self):
+        self._must_find()
+        self.device.actions.append(("clear_text", self.selector))
+
+    def gesture(self, start1, start2, end1, end2, steps: int = 100):
+        self._must_find()
+        self.device._rpc("gesture")
+        self.device.actions.append(("gesture", tuple(start1), tuple(start2), tuple(end1), tuple(end2), steps))
+
+
+class FakeDevice:
+    """
+    uiautomator2 设备替身
+
+    每次公开方法调用都视为一次 RPC：计数并按配置休眠，
+    latency 为默认延迟（秒），latencies 可按方法名单独指定
+    """
+
+    def __init__(
+        self,
+        serial: str = "fake-serial",
+        hierarchy: str = DEFAULT_HIERARCHY,
+        info: Optional[Dict[str, Any]] = None,
+        latency: float = 0.0,
+        latencies: Optional[Dict[str, float]] = None,
+        shell_outputs: Optional[Dict[str, Union[str, Tuple[str, int]]]] = None,
+        props: Optional[Dict[str, str]] = None
+    ):
+        """
+        初始化设备替身
+
+        Args:
+            serial: 设备序列号
+            hierarchy: dump_hierarchy() 返回的层级 XML
+            info: device.info 返回的信息
+            latency: 每次 RPC 注入的默认延迟（秒）
+            latencies: 方法名 -> 延迟，覆盖默认值
+            shell_outputs: shell 命令 -> 输出，或 (输出, 退出码)
+            props: getprop 返回的系统属性，覆盖 DEFAULT_PROPS
+        """
+        self.serial = serial
+        self._info = dict(DEFAULT_INFO, **(info or {}))
+        self.latency = latency
+        self.latencies = latencies or {}
+        self.shell_outputs = shell_outputs or {}
+        self.props = dict(DEFAULT_PROPS, **(props or {}))
+        self.rpc_counts: Counter = Counter()
+        self.actions: List[Tuple] = []
+        self.current_app = {"package": self._info["currentPackageName"], "activity": ".MainActivity"}
+        self._lock = threading.Lock()
+        self.set_hierarchy(hierarchy)
+
+    def _rpc(self, name: str):
+        with self._lock:
+            self.rpc_counts[name] += 1
+        delay = self.latencies.get(name, self.latency)
+        if delay:
+            time.sleep(delay)
+
+    @property
+    def rpc_total(self) -> int:
+        """累计 RPC 次数"""
+        return sum(self.rpc_counts.values())
+
+    def reset_counters(self):
+        """清空 RPC 计数和操作记录"""
+        self.rpc_counts.clear()
+        self.actions.clear()
+
+    def set_hierarchy(self, xml: str):
+        """切换当前界面层级"""
+        self.hierarchy = xml
+        self.snapshot = HierarchySnapshot(xml)
+
+    def __call__(self, **selector) -> FakeUiObject:
+        return FakeUiObject(self, selector)
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        self._rpc("deviceInfo")
+        return dict(self._info)
+
+    def set_orientation(self, orientation: str):
+        self._rpc("setOrientation")
+        rotation = ORIENTATIONS[orientation]
+        if rotation % 2 != self._info["displayRotation"] % 2:
+            self._info["displayWidth"], self._info["displayHeight"] = (
+                self._info["displayHeight"], self._info["displayWidth"]
+            )
+        self._info["displayRotation"] = rotation
+        self.set_hierarchy(re.sub(r'rotation="\d"', f'rotation="{rotation}"', self.hierarchy, count=1))
+
+    def window_size(self) -> Tuple[int, int]:
+        self._rpc("window_size")
+        return self._info["displayWidth"], self._info["displayHeight"]
+
+    def dump_hierarchy(self, compressed: bool = False, pretty: bool = False, max_depth: Optional[int] = None) -> str:
+        self._rpc("dumpWindowHierarchy")
+        return self.hierarchy
+
+    def screenshot(self, filename: Optional[str] = None, format: str = "pillow"):
+        self._rpc("takeScreenshot")
+        from PIL import Image
+        image = Image.new("RGB", (self._info["displayWidth"] // 4, self._info["displayHeight"] // 4))
+        if filename:
+            image.save(filename)
+            return None
+        return image
+
+    def click(self, x: int, y: int):
+        self._rpc("click")
+        self.actions.append(("click", x, y))
+
+    def long_click(self, x: int, y: int, duration: float = 0.5):
+        self._rpc("click")
+        self.actions.append(("long_click", x, y, duration))
+
+    def swipe(self, fx, fy, tx, ty, duration: Optional[float] = None, steps: Optional[int] = None):
+        self._rpc("swipe")
+        self.actions.append(("swipe", fx, fy, tx, ty, duration))
+
+    def swipe_points(self, points: List[Tuple[int, int]], duration: float = 0.5):
+        self._rpc("swipePoints")
+        self.actions.append(("swipe_points", [tuple(p) for p in points], duration))
+
+    def drag(self, sx, sy, ex, ey, duration: float = 0.5):
+        self._rpc("drag")
+        self.actions.append(("drag", sx, sy, ex, ey, duration))
+
+    def press(self, key: Union[int, str], meta=None):
+        self._rpc("pressKey")
+        self.actions.append(("press", key))
+
+    def send_keys(self, text: str, clear: bool = False):
+        self._rpc("send_keys")
+        self.actions.append(("send_keys", text, clear))
+
+    def shell(self, cmdargs: Union[str, List[str]], timeout: int = 60) -> ShellResponse:
+        self._rpc("shell")
+        command = cmdargs if isinstance(cmdargs, str) else " ".join(cmdargs)
+        self.actions.append(("shell", command))
+        batch = _BATCH_COMMAND.findall(command)
+        if batch:
+            # 批量脚本：逐条应答并按 shell_batch 的格式输出标记
+            output = ""
+            for token, index, single in batch:
+                text, code = self._respond(single)
+                output += f"{token}:begin:{index}\n{text}\n{token}:end:{index}:{code}\n"
+            return ShellResponse(output)
+        return ShellResponse(*self._respond(command))
+
+    def _respond(self, command: str) -> Tuple[str, int]:
+        """单条 shell 命令的输出和退出码"""
+        parts = command.split()
+        if parts[:2] == ["am", "start"] and "-n" in parts:
+            package, _, activity = parts[parts.index("-n") + 1].partition("/")
+            self.current_app = {"package": package, "activity": activity}
+        if command in self.shell_outputs:
+            output = self.shell_outputs[command]
+            return output if isinstance(output, tuple) else (output, 0)
+        if parts == ["getprop"]:
+            return "".join(f"[{key}]: [{value}]\n" for key, value in sorted(self.props.items())), 0
+        if parts[:1] == ["getprop"] and len(parts) == 2:
+            return self.props.get(parts[1], "") + "\n", 0
+        if parts == ["wm", "size"]:
+            return f"Physical size: {self._info['displayWidth']}x{self._info['displayHeight']}\n", 0
+        if parts == ["wm", "density"]:
+            return "Physical density: 420\n", 0
+        return "", 0
+
+    def app_start(self, package_name: str, activity: Optional[str] = None, wait: bool = False,
+                  stop: bool = False, use_monkey: bool = False):
+        self._rpc("app_start")
+        self.actions.append(("app_start", package_name, activity, stop))
+        self.current_app = {"package": package_name, "activity": activity or ".MainActivity"}
+
+    def app_stop(self, package_name: str):
+        self._rpc("app_stop")
+        self.actions.append(("app_stop", package_name))
+        if self.current_app.get("package") == package_name:
+            self.current_app = {"package": "com.android.launcher", "activity": ".Launcher"}
+
+    def app_stop_all(self, excludes: Optional[List[str]] = None):
+        self._rpc("app_stop_all")
+        self.current_app = {"package": "com.android.launcher", "activity": ".Launcher"}
+
+    def app_current(self) -> Dict[str, Any]:
+        self._rpc("app_current")
+        return dict(self.current_app)
+
+    def app_wait(self, package_name: str, timeout: float = 20.0, front: bool = False) -> int:
+        self._rpc("app_wait")
+        return 1234 if self.current_app.get("package") == package_name else 0
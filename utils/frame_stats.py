@@ -0,0 +1,308 @@
+"""
+帧耗时统计
+在一段手势前后重置并读取 dumpsys gfxinfo <package> framestats，
+用 numpy 计算帧耗时分位数、卡顿帧比例和错过的 vsync 数
+"""
+import re
+import logging
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MARKER = "---PROFILEDATA---"
+# 60Hz 下一帧的时间预算（纳秒）
+DEFAULT_FRAME_INTERVAL_NS = 16_666_667
+
+_TOTAL_FRAMES = re.compile(r"Total frames rendered:\s*(\d+)")
+_JANKY_FRAMES = re.compile(r"Janky frames:\s*(\d+)")
+_MISSED_VSYNC = re.compile(r"Number Missed Vsync:\s*(\d+)")
+_FRAME_INTERVAL = re.compile(r"Frame interval:\s*([\d.]+)\s*ms", re.I)
+
+
+class FrameThresholdError(AssertionError):
+    """帧耗时指标超过阈值"""
+
+
+def parse_framestats(text: str) -> Dict[str, np.ndarray]:
+    """
+    解析 framestats 的 PROFILEDATA 段
+
+    可能有多个窗口，各段的列相同时合并；每一行是一帧，数值为纳秒时间戳
+
+    Args:
+        text: dumpsys gfxinfo <package> framestats 输出
+
+    Returns:
+        列名 -> int64 数组，没有数据时返回空字典
+    """
+    header: Optional[List[str]] = None
+    rows: List[List[str]] = []
+    inside = False
+    for line in text.splitlines():
+        line = line.strip()
+        if line == PROFILE_MARKER:
+            inside = not inside
+            continue
+        if not inside or not line:
+            continue
+        fields = line.rstrip(",").split(",")
+        if fields[0] == "Flags":
+            if header is not None and fields != header:
+                logger.debug("framestats 各段的列不一致，只保留第一段的列")
+                inside = False
+                continue
+            header = fields
+        elif header is not None and len(fields) == len(header):
+            rows.append(fields)
+    if header is None or not rows:
+        return {}
+    matrix = np.array(rows, dtype=np.int64)
+    return {name: matrix[:, i] for i, name in enumerate(header)}
+
+
+def parse_counters(text: str) -> Dict[str, Any]:
+    """
+    解析 gfxinfo 摘要中的累计计数（覆盖 reset 之后的全部帧，不受 framestats 只保留最近 120 帧的限制）
+
+    Args:
+        text: dumpsys gfxinfo 输出
+
+    Returns:
+        包含 total_frames、janky_frames、missed_vsync 以及可选 frame_interval_ms 的字典
+    """
+    counters: Dict[str, Any] = {}
+    for key, pattern in (("total_frames", _TOTAL_FRAMES), ("janky_frames", _JANKY_FRAMES),
+                         ("missed_vsync", _MISSED_VSYNC)):
+        match = pattern.search(text)
+        if match:
+            counters[key] = int(match.group(1))
+    interval = _FRAME_INTERVAL.search(text)
+    if interval:
+        counters["frame_interval_ms"] = float(interval.group(1))
+    return counters
+
+
+class FrameStats:
+    """一段时间内的帧耗时统计"""
+
+    def __init__(
+        self,
+        columns: Dict[str, np.ndarray],
+        counters: Optional[Dict[str, Any]] = None,
+        frame_interval_ns: Optional[int] = None
+    ):
+        """
+        初始化帧耗时统计
+
+        Args:
+            columns: parse_framestats() 的结果
+            counters: parse_counters() 的结果
+            frame_interval_ns: 一帧的时间预算，默认取输出中的 Frame interval，没有则按 60Hz
+        """
+        self.counters = counters or {}
+        if frame_interval_ns is None:
+            interval_ms = self.counters.get("frame_interval_ms")
+            frame_interval_ns = int(interval_ms * 1e6) if interval_ms else DEFAULT_FRAME_INTERVAL_NS
+        self.frame_interval_ns = frame_interval_ns
+
+        if columns:
+            # Flags 非零的帧（窗口首帧、跳过的帧等）不计入
+            valid = columns["Flags"] == 0
+            intended = columns["IntendedVsync"][valid]
+            completed = columns["FrameCompleted"][valid]
+            self.durations_ms = (completed - intended) / 1e6
+            if "FrameDeadline" in columns:
+                self.janky = completed > columns["FrameDeadline"][valid]
+            else:
+                self.janky = (completed - intended) > frame_interval_ns
+            self.missed_vsync = np.maximum(
+                (columns["Vsync"][valid] - intended) // frame_interval_ns, 0
+            )
+        else:
+            self.durations_ms = np.zeros(0)
+            self.janky = np.zeros(0, dtype=bool)
+            self.missed_vsync = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def from_output(cls, text: str, frame_interval_ns: Optional[int] = None) -> "FrameStats":
+        """从 dumpsys gfxinfo <package> framestats 的输出创建"""
+        return cls(parse_framestats(text), parse_counters(text), frame_interval_ns)
+
+    @property
+    def frames(self) -> int:
+        return int(self.durations_ms.size)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        帧耗时分位数
+
+        Args:
+            p: 分位 (0-100)
+
+        Returns:
+            毫秒，没有帧时返回 None
+        """
+        if not self.frames:
+            return None
+        return float(np.percentile(self.durations_ms, p))
+
+    @property
+    def jank_ratio(self) -> float:
+        """卡顿帧比例，优先使用 gfxinfo 的累计计数"""
+        total = self.counters.get("total_frames")
+        if total and "janky_frames" in self.counters:
+            return self.counters["janky_frames"] / total
+        return float(self.janky.mean()) if self.frames else 0.0
+
+    @property
+    def missed_vsync_count(self) -> int:
+        """错过的 vsync 数，优先使用 gfxinfo 的累计计数"""
+        if "missed_vsync" in self.counters:
+            return self.counters["missed_vsync"]
+        return int(self.missed_vsync.sum())
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        生成写入报告的摘要
+
+        Returns:
+            包含帧数、p50/p90/p95/p99、最大帧耗时、卡顿比例和错过 vsync 数的字典
+        """
+        def rounded(value):
+            return round(value, 3) if value is not None else None
+
+        return {
+            "frames": self.frames,
+            "total_frames": self.counters.get("total_frames", self.frames),
+            "p50_ms": rounded(self.percentile(50)),
+            "p90_ms": rounded(self.percentile(90)),
+            "p95_ms": rounded(self.percentile(95)),
+            "p99_ms": rounded(self.percentile(99)),
+            "max_ms": rounded(float(self.durations_ms.max())) if self.frames else None,
+            "jank_ratio": round(self.jank_ratio, 4),
+            "missed_vsync": self.missed_vsync_count,
+        }
+
+    def violations(
+        self,
+        max_p95_ms: Optional[float] = None,
+        max_jank_ratio: Optional[float] = None,
+        max_missed_vsync: Optional[int] = None
+    ) -> List[str]:
+        """
+        检查阈值
+
+        Args:
+            max_p95_ms: p95 帧耗时上限（毫秒）
+            max_jank_ratio: 卡顿帧比例上限 (0.0-1.0)
+            max_missed_vsync: 错过 vsync 数上限
+
+        Returns:
+            超出阈值的说明列表，全部满足时为空
+        """
+        problems = []
+        p95 = self.percentile(95)
+        if max_p95_ms is not None and p95 is not None and p95 > max_p95_ms:
+            problems.append(f"p95 帧耗时 {p95:.1f}ms 超过 {max_p95_ms}ms")
+        if max_jank_ratio is not None and self.jank_ratio > max_jank_ratio:
+            problems.append(f"卡顿帧比例 {self.jank_ratio:.1%} 超过 {max_jank_ratio:.1%}")
+        if max_missed_vsync is not None and self.missed_vsync_count > max_missed_vsync:
+            problems.append(f"错过 vsync {self.missed_vsync_count} 次，超过 {max_missed_vsync} 次")
+        return problems
+
+    def assert_smooth(self, **thresholds):
+        """
+        阈值断言，参数同 violations()，未给出时使用 Config 中的默认阈值
+
+        Raises:
+            FrameThresholdError: 任一指标超过阈值
+        """
+        from config.config import Config
+
+        thresholds.setdefault("max_p95_ms", Config.FRAME_MAX_P95_MS)
+        thresholds.setdefault("max_jank_ratio", Config.FRAME_MAX_JANK_RATIO)
+        problems = self.violations(**thresholds)
+        if problems:
+            raise FrameThresholdError("; ".join(problems))
+
+
+class FrameStatsCollector:
+    """
+    帧耗时采集
+
+    用作上下文管理器：进入时重置 gfxinfo，退出时读取 framestats；
+    framestats 只保留最近 120 帧，长时间的手势可在中途调用 sample() 避免丢帧。
+    退出时读取失败，stats 为空的 FrameStats：with 块正常结束时抛出 RuntimeError 说明原因，
+    with 块本身抛出异常时只记录日志，不掩盖原异常
+    """
+
+    def __init__(self, device, package: str, frame_interval_ns: Optional[int] = None):
+        """
+        初始化采集器
+
+        Args:
+            device: uiautomator2 设备对象
+            package: 被测应用包名
+            frame_interval_ns: 一帧的时间预算，默认从输出中解析
+        """
+        self.device = device
+        self.package = package
+        self.frame_interval_ns = frame_interval_ns
+        self._rows: Dict[int, np.ndarray] = {}
+        self._header: Optional[List[str]] = None
+        self._last_output = ""
+        self.stats: Optional[FrameStats] = None
+
+    def reset(self):
+        """清空设备上和本地累计的帧数据"""
+        self.device.shell(["dumpsys", "gfxinfo", self.package, "reset"])
+        self._rows.clear()
+        self._header = None
+        self.stats = None
+
+    def sample(self):
+        """读取一次 framestats 并按 IntendedVsync 去重累计"""
+        output = self.device.shell(["dumpsys", "gfxinfo", self.package, "framestats"]).output
+        self._last_output = output
+        columns = parse_framestats(output)
+        if not columns:
+            return
+        header = list(columns)
+        if self._header is None:
+            self._header = header
+        elif header != self._header:
+            return
+        matrix = np.column_stack([columns[name] for name in header])
+        intended = columns["IntendedVsync"]
+        for i, key in enumerate(intended.tolist()):
+            self._rows[key] = matrix[i]
+
+    def collect(self) -> FrameStats:
+        """
+        读取最后一次 framestats 并生成统计
+
+        Returns:
+            FrameStats 对象
+        """
+        self.sample()
+        columns: Dict[str, np.ndarray] = {}
+        if self._rows and self._header:
+            matrix = np.vstack([self._rows[key] for key in sorted(self._rows)])
+            columns = {name: matrix[:, i] for i, name in enumerate(self._header)}
+        self.stats = FrameStats(columns, parse_counters(self._last_output), self.frame_interval_ns)
+        return self.stats
+
+    def __enter__(self) -> "FrameStatsCollector":
+        self.reset()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.collect()
+        except Exception as e:
+            self.stats = FrameStats({}, frame_interval_ns=self.frame_interval_ns)
+            if exc_type is None:
+                raise RuntimeError(f"读取 {self.package} 的帧耗时失败: {e}") from e
+            logger.warning(f"读取帧耗时失败: {e}")
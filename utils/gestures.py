@@ -0,0 +1,298 @@
+"""
+手势引擎
+缓存屏幕尺寸（层级快照中的旋转角度变化或经框架旋转屏幕时失效），预先计算滑动轨迹，支持多指缩放、折线、元素内手势和单次调用注入多段滑动
+"""
+import logging
+from typing import Optional, Dict, Any, List, Tuple, Callable, Sequence
+
+logger = logging.getLogger(__name__)
+
+Point = Tuple[int, int]
+Box = Tuple[int, int, int, int]
+
+# 方向 -> 起点和终点在区域内的相对位置（沿滑动方向）
+DIRECTIONS = {
+    "up": ((0.5, 1.0), (0.5, 0.0)),
+    "down": ((0.5, 0.0), (0.5, 1.0)),
+    "left": ((1.0, 0.5), (0.0, 0.5)),
+    "right": ((0.0, 0.5), (1.0, 0.5)),
+}
+
+# 快速滑动的持续时间（秒）
+FLING_DURATION = 0.05
+
+
+def direction_points(box: Box, direction: str, distance: float = 0.5) -> Tuple[Point, Point]:
+    """
+    计算在区域内沿某方向滑动的起点和终点
+
+    滑动以区域中心为中点，长度为区域边长的 distance 倍
+
+    Args:
+        box: (left, top, right, bottom)
+        direction: 'up'、'down'、'left' 或 'right'
+        distance: 滑动距离比例 (0.0-1.0)
+
+    Returns:
+        (起点, 终点)
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"不支持的滑动方向: {direction}")
+    left, top, right, bottom = box
+    width, height = right - left, bottom - top
+    distance = min(max(distance, 0.0), 1.0)
+
+    def point(rx: float, ry: float) -> Point:
+        # 相对中心缩放 distance 倍
+        x = left + width * (0.5 + (rx - 0.5) * distance)
+        y = top + height * (0.5 + (ry - 0.5) * distance)
+        return round(x), round(y)
+
+    start, end = DIRECTIONS[direction]
+    return point(*start), point(*end)
+
+
+def interpolate(points: Sequence[Point], steps: int) -> List[Point]:
+    """
+    把折线按长度均匀插值为 steps + 1 个点
+
+    Args:
+        points: 折线顶点，至少两个
+        steps: 插值段数
+
+    Returns:
+        插值后的点列表，包含首尾顶点
+    """
+    if len(points) < 2:
+        raise ValueError("折线至少需要两个点")
+    lengths = [
+        ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
+        for (x1, y1), (x2, y2) in zip(points, points[1:])
+    ]
+    total = sum(lengths) or 1.0
+    result = []
+    for i in range(steps + 1):
+        target = total * i / steps
+        segment = 0
+        while segment < len(lengths) - 1 and target > lengths[segment]:
+            target -= lengths[segment]
+            segment += 1
+        ratio = target / lengths[segment] if lengths[segment] else 0.0
+        (x1, y1), (x2, y2) = points[segment], points[segment + 1]
+        result.append((round(x1 + (x2 - x1) * ratio), round(y1 + (y2 - y1) * ratio)))
+    return result
+
+
+def pinch_points(center: Point, start_radius: float, end_radius: float, angle_vertical: bool = False):
+    """
+    计算双指缩放的两个起点和两个终点
+
+    Args:
+        center: 缩放中心
+        start_radius: 手指到中心的起始距离
+        end_radius: 手指到中心的结束距离
+        angle_vertical: 是否沿竖直方向，默认水平
+
+    Returns:
+        (起点1, 起点2, 终点1, 终点2)
+    """
+    cx, cy = center
+
+    def pair(radius: float) -> Tuple[Point, Point]:
+        r = int(radius)
+        if angle_vertical:
+            return (cx, cy - r), (cx, cy + r)
+        return (cx - r, cy), (cx + r, cy)
+
+    (s1, s2), (e1, e2) = pair(start_radius), pair(end_radius)
+    return s1, s2, e1, e2
+
+
+class GestureEngine:
+    """
+    带屏幕尺寸缓存的手势引擎
+
+    屏幕尺寸只在首次使用、invalidate() 或发现旋转后重新获取；旋转角度在每次整屏手势前
+    通过 device.info 读取（一次 RPC，比 window_size() 的两次 adb shell 便宜），
+    也会从层级快照中顺带获得。相同方向、距离、区域的轨迹只计算一次
+    """
+
+    def __init__(self, device, on_action: Optional[Callable[[], None]] = None):
+        """
+        初始化手势引擎
+
+        Args:
+            device: uiautomator2 设备对象
+            on_action: 每次手势之后的回调，用于让元素缓存失效
+        """
+        self.device = device
+        self.on_action = on_action
+        self._size: Optional[Tuple[int, int]] = None
+        self._rotation: Optional[int] = None
+        self._trajectories: Dict[Tuple, Tuple[Point, Point]] = {}
+        self.stats = {"geometry_fetches": 0, "gestures": 0}
+
+    def screen_size(self) -> Tuple[int, int]:
+        """
+        获取屏幕尺寸（带缓存）
+
+        Returns:
+            (width, height)
+        """
+        if self._size is None:
+            self._size = tuple(self.device.window_size())
+            self.stats["geometry_fetches"] += 1
+        return self._size
+
+    def screen_box(self) -> Box:
+        """整屏区域（使用缓存的屏幕尺寸）"""
+        width, height = self.screen_size()
+        return 0, 0, width, height
+
+    def set_orientation(self, orientation: str):
+        """
+        旋转屏幕并丢弃缓存的几何信息
+
+        绕过框架直接调用 device.set_orientation 时，缓存要等下一次层级快照才会刷新，
+        此时需要手动调用 invalidate()
+
+        Args:
+            orientation: 'natural'、'left'、'right' 或 'upsidedown'
+        """
+        self.device.set_orientation(orientation)
+        self.invalidate()
+        # 实际旋转角度以下一次层级快照为准
+        self._rotation = None
+
+    def invalidate(self):
+        """丢弃缓存的屏幕尺寸和轨迹，屏幕分辨率变化后调用"""
+        self._size = None
+        self._trajectories.clear()
+
+    def observe_rotation(self, rotation: int):
+        """
+        根据层级快照中的旋转角度判断是否需要刷新屏幕尺寸
+
+        Args:
+            rotation: HierarchySnapshot.rotation
+        """
+        if self._rotation is not None and rotation != self._rotation:
+            logger.debug(f"屏幕旋转 {self._rotation} -> {rotation}，刷新屏幕尺寸")
+            self.invalidate()
+        self._rotation = rotation
+
+    def _done(self):
+        self.stats["gestures"] += 1
+        if self.on_action is not None:
+            self.on_action()
+
+    def trajectory(self, direction: str, distance: float = 0.5, box: Optional[Box] = None) -> Tuple[Point, Point]:
+        """
+        获取（缓存的）滑动起点和终点
+
+        Args:
+            direction: 滑动方向
+            distance: 滑动距离比例
+            box: 滑动区域，默认整个屏幕
+
+        Returns:
+            (起点, 终点)
+        """
+        box = box or self.screen_box()
+        key = (direction, distance, box)
+        if key not in self._trajectories:
+            self._trajectories[key] = direction_points(box, direction, distance)
+        return self._trajectories[key]
+
+    def swipe(self, direction: str, distance: float = 0.5, duration: float = 0.5, box: Optional[Box] = None):
+        """
+        沿方向滑动
+
+        Args:
+            direction: 'up'、'down'、'left' 或 'right'
+            distance: 滑动距离比例 (0.0-1.0)
+            duration: 持续时间（秒）
+            box: 滑动区域，默认整个屏幕
+        """
+        (sx, sy), (ex, ey) = self.trajectory(direction, distance, box)
+        self.device.swipe(sx, sy, ex, ey, duration=duration)
+        self._done()
+
+    def fling(self, direction: str, distance: float = 0.7, box: Optional[Box] = None):
+        """快速滑动"""
+        self.swipe(direction, distance, duration=FLING_DURATION, box=box)
+
+    def drag(self, start: Point, end: Point, duration: float = 0.5):
+        """
+        长按起点后拖到终点
+
+        Args:
+            start: 起点
+            end: 终点
+            duration: 持续时间（秒）
+        """
+        self.device.drag(start[0], start[1], end[0], end[1], duration=duration)
+        self._done()
+
+    def polyline(self, points: Sequence[Point], duration: float = 0.5, steps: Optional[int] = None):
+        """
+        沿折线滑动（一次 RPC）
+
+        Args:
+            points: 折线顶点
+            duration: 相邻两点之间的注入时间（秒）
+            steps: 插值段数，给出时先按长度均匀插值
+        """
+        path = interpolate(points, steps) if steps else [tuple(p) for p in points]
+        self.device.swipe_points(path, duration=duration)
+        self._done()
+
+    def pinch(
+        self,
+        scale: float,
+        center: Optional[Point] = None,
+        radius: Optional[float] = None,
+        steps: int = 20,
+        selector: Optional[Dict[str, Any]] = None,
+        vertical: bool = False
+    ):
+        """
+        双指缩放
+
+        Args:
+            scale: 结束距离与起始距离之比，小于 1 为捏合，大于 1 为放大
+            center: 缩放中心，默认屏幕中心
+            radius: 较大一侧手指到中心的距离，默认屏幕短边的 0.3 倍
+            steps: 注入步数
+            selector: 执行手势的元素选择器，默认根节点
+            vertical: 是否沿竖直方向
+        """
+        _, _, width, height = self.screen_box()
+        center = center or (width // 2, height // 2)
+        radius = radius or min(width, height) * 0.3
+        if scale < 1:
+            start_radius, end_radius = radius, radius * scale
+        else:
+            start_radius, end_radius = radius / scale, radius
+        s1, s2, e1, e2 = pinch_points(center, start_radius, end_radius, vertical)
+        self.device(**(selector or {})).gesture(s1, s2, e1, e2, steps=steps)
+        self._done()
+
+    def strokes(self, strokes: Sequence[Tuple[Point, Point]], duration: float = 0.2):
+        """
+        在一次 shell 调用中依次注入多段直线滑动
+
+        Args:
+            strokes: (起点, 终点) 列表
+            duration: 每段的持续时间（秒）
+        """
+        if not strokes:
+            return
+        millis = max(1, int(duration * 1000))
+        command = "; ".join(
+            f"input swipe {sx} {sy} {ex} {ey} {millis}" for (sx, sy), (ex, ey) in strokes
+        )
+        response = self.device.shell(command)
+        if getattr(response, "exit_code", 0):
+            raise RuntimeError(f"注入多段滑动失败: {getattr(response, 'output', '')}")
+        self._done()
@@ -1,17 +1,140 @@
 """
 辅助工具函数
 """
+import os
+import re
 import time
+import random
 import logging
+from contextlib import contextmanager
 from typing import Optional, Callable, Any
-from functools import wraps
 
 logger = logging.getLogger(__name__)
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class BackoffPolicy:
+    """
+    轮询间隔策略
+
+    第 n 次检查后的间隔为 initial * factor ** n，不超过 maximum，
+    并叠加 ±jitter 比例的随机抖动，避免多个等待同步轮询
+    """
+
+    def __init__(
+        self,
+        initial: float = 0.05,
+        factor: float = 1.5,
+        maximum: float = 0.5,
+        jitter: float = 0.1
+    ):
+        """
+        初始化轮询间隔策略
+
+        Args:
+            initial: 首次检查后的间隔（秒）
+            factor: 每次检查后间隔的增长倍数
+            maximum: 最大间隔（秒）
+            jitter: 随机抖动比例 (0.0-1.0)
+        """
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+        self.jitter = jitter
+
+    def interval(self, attempt: int) -> float:
+        """
+        计算第 attempt 次检查（从 0 开始）之后的等待间隔
+
+        Args:
+            attempt: 已完成的检查次数减一
+
+        Returns:
+            间隔秒数
+        """
+        base = min(self.maximum, self.initial * self.factor ** attempt)
+        if self.jitter:
+            base *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(0.0, base)
+
+
+class PollResult:
+    """轮询结果及统计信息"""
+
+    def __init__(self, success: bool, value: Any, polls: int, elapsed: float):
+        """
+        初始化轮询结果
+
+        Args:
+            success: 条件是否满足
+            value: 条件最后一次返回的真值，超时为 None
+            polls: 条件检查次数
+            elapsed: 从开始到成功（或超时）的秒数
+        """
+        self.success = success
+        self.value = value
+        self.polls = polls
+        self.elapsed = elapsed
+
+    def __bool__(self) -> bool:
+        return self.success
+
+    def __repr__(self) -> str:
+        return (f"PollResult(success={self.success}, polls={self.polls}, "
+                f"elapsed={self.elapsed:.3f})")
+
+
+def poll_until(
+    condition: Callable[[], Any],
+    timeout: float = 10.0,
+    policy: Optional[BackoffPolicy] = None,
+    clock: Callable[[], float] = time.monotonic,
+    sleep: Callable[[float], None] = time.sleep
+) -> PollResult:
+    """
+    按自适应间隔轮询条件，直到返回真值或到达截止时间
+
+    使用单调时钟计算截止时间；最后一次等待会被截断到截止时间，
+    保证在截止时刻再检查一次，且不会超出截止时间一个完整间隔
+
+    Args:
+        condition: 返回真值表示满足的函数，抛出的异常视为不满足
+        timeout: 超时时间（秒）
+        policy: 轮询间隔策略，默认使用 BackoffPolicy()
+        clock: 单调时钟函数
+        sleep: 休眠函数
+
+    Returns:
+        PollResult 对象
+    """
+    policy = policy or BackoffPolicy()
+    start = clock()
+    deadline = start + timeout
+    polls = 0
+
+    while True:
+        polls += 1
+        try:
+            value = condition()
+            if value:
+                return PollResult(True, value, polls, clock() - start)
+        except Exception as e:
+            logger.debug(f"等待条件检查时出错: {e}")
+
+        remaining = deadline - clock()
+        if remaining <= 0:
+            return PollResult(False, None, polls, clock() - start)
+        sleep(min(policy.interval(polls - 1), remaining))
+
 
 def wait_for(
     condition: Callable[[], bool],
-    timeout: float = 10.0,
+    timeout: Optional[float] = None,
     interval: float = 0.5,
     error_message: str = "等待条件超时"
 ) -> bool:
@@ -20,60 +143,78 @@ def wait_for(
     
     Args:
         condition: 返回布尔值的函数
-        timeout: 超时时间（秒）
-        interval: 检查间隔（秒）
+        timeout: 超时时间（秒），None 表示 Config.EXPLICIT_WAIT
+        interval: 最大检查间隔（秒），间隔从更短的值开始逐步增长
         error_message: 超时时的错误消息
     
     Returns:
         True 如果条件满足，否则 False
     """
-    start_time = time.time()
+    if timeout is None:
+        from config.config import Config
+        timeout = Config.EXPLICIT_WAIT
+    policy = BackoffPolicy(initial=min(interval, 0.05), maximum=interval)
+    result = poll_until(condition, timeout=timeout, policy=policy)
     
-    while time.time() - start_time < timeout:
-        try:
-            if condition():
-                return True
-        except Exception as e:
-            logger.debug(f"等待条件检查时出错: {e}")
-        
-        time.sleep(interval)
-    
-    logger.warning(f"{error_message} (超时: {timeout}秒)")
-    return False
+    if not result:
+        logger.warning(f"{error_message} (超时: {timeout}秒, 检查次数: {result.polls})")
+    return result.success
 
 
 def retry(max_attempts: int = 3, delay: float = 1.0, exceptions: tuple = (Exception,)):
     """
     重试装饰器
     
+    等待时间按指数退避增长并叠加随机抖动，致命错误不重试，
+    重试等待计入会话预算，设备错误计入设备熔断器，详见 utils.retry
+    
     Args:
         max_attempts: 最大尝试次数
-        delay: 重试延迟（秒）
+        delay: 首次重试前的等待时间（秒）
         exceptions: 需要重试的异常类型
     """
-    def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        def wrapper(*args, **kwargs) -> Any:
-            last_exception = None
-            
-            for attempt in range(1, max_attempts + 1):
-                try:
-                    return func(*args, **kwargs)
-                except exceptions as e:
-                    last_exception = e
-                    if attempt < max_attempts:
-                        logger.warning(
-                            f"{func.__name__} 第 {attempt} 次尝试失败: {e}, "
-                            f"{delay} 秒后重试..."
-                        )
-                        time.sleep(delay)
-                    else:
-                        logger.error(f"{func.__name__} 所有尝试均失败")
-            
-            raise last_exception
-        
-        return wrapper
-    return decorator
+    from utils.retry import retrying
+    return retrying(max_attempts=max_attempts, delay=delay, exceptions=exceptions)
+
+
+def serial_file_name(serial: str) -> str:
+    """
+    设备序列号转为按设备保存的文件名
+
+    网络设备的 host:port 中的冒号等字符替换为下划线
+
+    Args:
+        serial: 设备序列号
+
+    Returns:
+        <序列号>.json
+    """
+    return re.sub(r"[^\w.-]", "_", serial) + ".json"
+
+
+@contextmanager
+def file_lock(lock_file: str):
+    """
+    跨进程独占文件锁（xdist worker 之间共享文件时使用）
+
+    Args:
+        lock_file: 锁文件路径，所在目录不存在时自动创建
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(lock_file)), exist_ok=True)
+    with open(lock_file, "a+") as lock:
+        if fcntl:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        else:
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+            else:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
 
 
 def safe_execute(func: Callable, default_value: Any = None, *args, **kwargs) -> Any:
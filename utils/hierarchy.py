@@ -0,0 +1,208 @@
+"""
+界面层级快照工具
+一次 dump_hierarchy() 抓取整个界面，在本地对任意数量的选择器求值
+"""
+import re
+import time
+import hashlib
+import logging
+import xml.etree.ElementTree as ET
+from typing import Optional, Dict, Any, List, Tuple
+
+from utils.selector import SelectorIndex, BOOLEAN_ATTRIBUTES
+
+logger = logging.getLogger(__name__)
+
+_BOUNDS_PATTERN = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+
+
+def parse_bounds(value: str) -> Tuple[int, int, int, int]:
+    """
+    解析 bounds 属性
+
+    Args:
+        value: 形如 "[0,0][1080,1920]" 的字符串
+
+    Returns:
+        (left, top, right, bottom)，无法解析时返回全 0
+    """
+    match = _BOUNDS_PATTERN.match(value or "")
+    if not match:
+        return 0, 0, 0, 0
+    return tuple(int(v) for v in match.groups())
+
+
+def hierarchy_fingerprint(xml: str) -> str:
+    """
+    计算层级 XML 的指纹
+
+    界面任一节点的属性变化（文本、坐标、焦点等）都会改变指纹
+
+    Args:
+        xml: dump_hierarchy() 返回的 XML 文本
+
+    Returns:
+        16 位十六进制字符串
+    """
+    return hashlib.blake2b(xml.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class UiNode:
+    """层级中的一个节点"""
+
+    def __init__(self, attrib: Dict[str, str], order: int, parent: Optional["UiNode"] = None):
+        """
+        初始化节点
+
+        Args:
+            attrib: XML 节点属性
+            order: 节点在文档中的先序序号
+            parent: 父节点，根节点为 None
+        """
+        self.attrib = attrib
+        self.order = order
+        self.parent = parent
+        self.children: List["UiNode"] = []
+        self.bounds = parse_bounds(attrib.get("bounds", ""))
+
+    @property
+    def text(self) -> str:
+        return self.attrib.get("text", "")
+
+    @property
+    def description(self) -> str:
+        return self.attrib.get("content-desc", "")
+
+    @property
+    def resource_id(self) -> str:
+        return self.attrib.get("resource-id", "")
+
+    @property
+    def class_name(self) -> str:
+        return self.attrib.get("class", "")
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        left, top, right, bottom = self.bounds
+        return (left + right) // 2, (top + bottom) // 2
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        """与 UiObject.info 字段一致的元素信息"""
+        left, top, right, bottom = self.bounds
+        info = {
+            "text": self.text,
+            "contentDescription": self.description,
+            "resourceName": self.resource_id,
+            "className": self.class_name,
+            "packageName": self.get("package"),
+            "bounds": {"left": left, "top": top, "right": right, "bottom": bottom},
+        }
+        for key, attribute in BOOLEAN_ATTRIBUTES.items():
+            info[key] = self.get(attribute) == "true"
+        return info
+
+    def get(self, name: str, default: str = "") -> str:
+        """按 XML 属性名取值"""
+        return self.attrib.get(name, default)
+
+    def __repr__(self) -> str:
+        return f"UiNode(class={self.class_name!r}, text={self.text!r}, bounds={self.bounds})"
+
+
+class HierarchySnapshot:
+    """一次层级 dump 的本地副本"""
+
+    def __init__(self, xml: str, captured_at: Optional[float] = None):
+        """
+        初始化快照
+
+        Args:
+            xml: dump_hierarchy() 返回的 XML 文本
+            captured_at: 抓取时间（time.monotonic()），默认当前时间
+        """
+        self.xml = xml
+        self.captured_at = time.monotonic() if captured_at is None else captured_at
+        root = ET.fromstring(xml.encode("utf-8"))
+        self.rotation = int(root.get("rotation", "0") or 0)
+        self.nodes: List[UiNode] = []
+        stack = [(element, None) for element in reversed(root.findall("node"))]
+        while stack:
+            element, parent = stack.pop()
+            node = UiNode(dict(element.attrib), len(self.nodes), parent)
+            if parent is not None:
+                parent.children.append(node)
+            self.nodes.append(node)
+            stack.extend((child, node) for child in reversed(element.findall("node")))
+        self.index = SelectorIndex(self.nodes)
+        self._fingerprint: Optional[str] = None
+
+    @classmethod
+    def capture(cls, device) -> "HierarchySnapshot":
+        """
+        抓取设备当前界面层级（一次 RPC）
+
+        Args:
+            device: uiautomator2 设备对象
+
+        Returns:
+            HierarchySnapshot 对象
+        """
+        return cls(device.dump_hierarchy())
+
+    @property
+    def fingerprint(self) -> str:
+        """层级指纹，见 hierarchy_fingerprint()"""
+        if self._fingerprint is None:
+            self._fingerprint = hierarchy_fingerprint(self.xml)
+        return self._fingerprint
+
+    @property
+    def age(self) -> float:
+        """快照距今的秒数"""
+        return time.monotonic() - self.captured_at
+
+    def find_all(self, selector: Dict[str, Any]) -> List[UiNode]:
+        """
+        查找所有匹配的节点
+
+        Args:
+            selector: uiautomator 选择器字典
+
+        Returns:
+            按文档顺序排列的节点列表；指定 instance 时最多一个
+        """
+        return self.index.find_all(selector)
+
+    def find(self, selector: Dict[str, Any]) -> Optional[UiNode]:
+        """查找第一个匹配的节点，不存在返回 None"""
+        matches = self.find_all(selector)
+        return matches[0] if matches else None
+
+    def exists(self, selector: Dict[str, Any]) -> bool:
+        """元素是否存在"""
+        return self.find(selector) is not None
+
+    def count(self, selector: Dict[str, Any]) -> int:
+        """匹配元素数量"""
+        return len(self.find_all(selector))
+
+    def texts(self, selector: Dict[str, Any]) -> List[str]:
+        """所有匹配元素的文本"""
+        return [node.text for node in self.find_all(selector)]
+
+    def bounds(self, selector: Dict[str, Any]) -> List[Tuple[int, int, int, int]]:
+        """所有匹配元素的坐标范围"""
+        return [node.bounds for node in self.find_all(selector)]
+
+    def exists_many(self, selectors: Dict[str, Dict[str, Any]]) -> Dict[str, bool]:
+        """
+        在同一份快照上检查多个选择器
+
+        Args:
+            selectors: 名称 -> 选择器字典
+
+        Returns:
+            名称 -> 是否存在
+        """
+        return {name: self.exists(selector) for name, selector in selectors.items()}
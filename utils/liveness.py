@@ -0,0 +1,153 @@
+"""
+设备存活状态跟踪
+带 TTL 缓存的心跳，热路径上判断设备是否存活不再产生 RPC
+"""
+import time
+import logging
+import threading
+from typing import Optional, Dict, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class LivenessTracker:
+    """设备心跳与存活状态"""
+
+    UNKNOWN = "unknown"
+    ALIVE = "alive"
+    SUSPECT = "suspect"
+
+    def __init__(
+        self,
+        probe: Callable[[], Dict[str, Any]],
+        ttl: float = 5.0,
+        suspect_after: int = 2,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        初始化存活状态跟踪
+
+        Args:
+            probe: 探测函数，成功时返回设备信息，失败时抛出异常
+            ttl: 心跳结果的有效期（秒），有效期内不再探测
+            suspect_after: 连续失败多少次后进入 suspect 状态（需要重连）
+            clock: 单调时钟函数
+        """
+        self.probe = probe
+        self.ttl = ttl
+        self.suspect_after = max(1, suspect_after)
+        self.clock = clock
+        self.state = self.UNKNOWN
+        self.last_info: Dict[str, Any] = {}
+        self.last_success: Optional[float] = None
+        self.last_beat: Optional[float] = None
+        self.consecutive_failures = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record_success(self, info: Dict[str, Any]):
+        """
+        记录一次成功的心跳
+
+        Args:
+            info: 最新的设备信息
+        """
+        with self._lock:
+            now = self.clock()
+            self.last_info = info or self.last_info
+            self.last_success = now
+            self.last_beat = now
+            if self.state == self.SUSPECT:
+                logger.info("设备心跳恢复")
+            self.consecutive_failures = 0
+            self.state = self.ALIVE
+
+    def record_failure(self, error: Exception):
+        """
+        记录一次失败的心跳
+
+        Args:
+            error: 探测时抛出的异常
+        """
+        with self._lock:
+            self.last_beat = self.clock()
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.suspect_after and self.state != self.SUSPECT:
+                logger.warning(
+                    f"设备连续 {self.consecutive_failures} 次心跳失败，标记为 suspect: {error}"
+                )
+                self.state = self.SUSPECT
+
+    def beat(self) -> bool:
+        """
+        立即探测一次
+
+        Returns:
+            True 如果探测成功
+        """
+        try:
+            info = self.probe()
+        except Exception as e:
+            self.record_failure(e)
+            return False
+        self.record_success(info)
+        return True
+
+    def is_fresh(self) -> bool:
+        """最近一次心跳是否仍在 TTL 内"""
+        return self.last_beat is not None and self.clock() - self.last_beat < self.ttl
+
+    def is_alive(self) -> bool:
+        """
+        设备是否存活
+
+        TTL 内直接返回缓存结果，过期后才探测一次
+
+        Returns:
+            True 如果最近一次心跳成功，任何一次失败都返回 False
+        """
+        if not self.is_fresh():
+            self.beat()
+        return self.state == self.ALIVE and self.consecutive_failures == 0
+
+    def needs_reconnect(self) -> bool:
+        """连续失败次数是否已达到 suspect_after，需要重新连接"""
+        return self.state == self.SUSPECT
+
+    def start(self, interval: Optional[float] = None):
+        """
+        启动后台探测线程
+
+        Args:
+            interval: 探测间隔（秒），默认为 TTL 的一半，保证缓存始终新鲜
+        """
+        if self._thread is not None:
+            return
+        interval = interval or self.ttl / 2
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self.beat()
+
+        self._thread = threading.Thread(target=run, name="device-heartbeat", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台探测线程"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(self.ttl)
+        self._thread = None
+
+    def get_status(self) -> Dict[str, Any]:
+        """返回状态、连续失败次数和最近一次成功距今的秒数"""
+        with self._lock:
+            since = None if self.last_success is None else self.clock() - self.last_success
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "seconds_since_success": since,
+            }
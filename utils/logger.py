@@ -1,19 +1,65 @@
 """
 日志工具模块
 """
+import atexit
 import logging
 import os
+import queue
+import threading
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from typing import Optional, Dict, List
 
+# 框架日志记录器名称；模块导入时只取 Logger，处理器由 setup_logger() 在首次使用设备时添加
+LOGGER_NAME = "uiautomator2_test"
 
-def setup_logger(name: str = "uiautomator2_test", level: int = logging.INFO) -> logging.Logger:
+
+class CountingQueueHandler(QueueHandler):
+    """非阻塞的队列处理器，队列满时丢弃记录并计数"""
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.queued = 0
+        self.dropped = 0
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            self.queued += 1
+        except queue.Full:
+            self.dropped += 1
+
+
+class _QueuedLogger:
+    """队列模式下一个 Logger 的处理器和监听线程"""
+    
+    def __init__(self, logger: logging.Logger, handler: CountingQueueHandler,
+                 listener: QueueListener, targets: List[logging.Handler]):
+        self.logger = logger
+        self.handler = handler
+        self.listener = listener
+        self.targets = targets
+
+
+_queued_loggers: Dict[str, _QueuedLogger] = {}
+_queued_lock = threading.Lock()
+
+
+def setup_logger(
+    name: str = LOGGER_NAME,
+    level: int = logging.INFO,
+    use_queue: Optional[bool] = None
+) -> logging.Logger:
     """
     设置日志记录器
     
+    队列模式下测试线程只把日志记录放入内存队列，由单独的监听线程
+    负责控制台和轮转文件的写入
+    
     Args:
         name: 日志记录器名称
         level: 日志级别
+        use_queue: 是否使用队列模式，None 时读取环境变量 LOG_QUEUE
     
     Returns:
         配置好的 Logger 对象
@@ -53,9 +99,73 @@ def setup_logger(name: str = "uiautomator2_test", level: int = logging.INFO) ->
     )
     file_handler.setFormatter(file_format)
     
-    # 添加处理器
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    if use_queue is None:
+        use_queue = os.getenv("LOG_QUEUE", "false").lower() == "true"
+    
+    if not use_queue:
+        # 添加处理器
+        logger.addHandler(console_handler)
+        logger.addHandler(file_handler)
+        return logger
+    
+    # 队列模式：测试线程只入队，监听线程负责实际 I/O
+    log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+    queue_handler = CountingQueueHandler(log_queue)
+    queue_handler.setLevel(level)
+    listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    listener.start()
+    logger.addHandler(queue_handler)
+    
+    with _queued_lock:
+        _queued_loggers[name] = _QueuedLogger(
+            logger, queue_handler, listener, [console_handler, file_handler]
+        )
     
     return logger
 
+
+def get_log_stats() -> Dict[str, Dict[str, int]]:
+    """
+    获取队列模式下各 Logger 的计数
+    
+    Returns:
+        Logger 名称 -> {queued, dropped, pending}
+    """
+    with _queued_lock:
+        return {
+            name: {
+                "queued": entry.handler.queued,
+                "dropped": entry.handler.dropped,
+                "pending": entry.handler.queue.qsize(),
+            }
+            for name, entry in _queued_loggers.items()
+        }
+
+
+def shutdown_logging() -> Dict[str, Dict[str, int]]:
+    """
+    写完队列中剩余的日志并停止监听线程
+    
+    之后该 Logger 的处理器直接挂回 Logger，会话结束后的日志仍能正常输出
+    
+    Returns:
+        停止前各 Logger 的计数
+    """
+    stats = get_log_stats()
+    with _queued_lock:
+        entries = list(_queued_loggers.values())
+        _queued_loggers.clear()
+    
+    for entry in entries:
+        entry.logger.removeHandler(entry.handler)
+        # stop() 会等待监听线程处理完队列中已有的记录
+        entry.listener.stop()
+        for handler in entry.targets:
+            handler.flush()
+            entry.logger.addHandler(handler)
+    
+    return stats
+
+
+atexit.register(shutdown_logging)
+
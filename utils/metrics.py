@@ -0,0 +1,280 @@
+"""
+操作耗时统计
+固定分桶的延迟直方图，按操作、选择器、设备三个维度累计，开销足够低，可在正式运行中常开
+"""
+import math
+import time
+import bisect
+import logging
+import threading
+import weakref
+from functools import wraps
+from typing import Optional, Dict, Any, List, Callable
+
+from utils.selector import selector_key
+
+logger = logging.getLogger(__name__)
+
+# 分桶上界（毫秒）：0.5ms 到约 2 分钟按 1.25 倍等比增长，最后一个桶收纳更大的值
+BUCKET_BOUNDS_MS: List[float] = [round(0.5 * 1.25 ** i, 3) for i in range(56)]
+
+
+class LatencyHistogram:
+    """固定分桶的延迟直方图"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.min_ms: Optional[float] = None
+        self.max_ms: Optional[float] = None
+
+    def record(self, seconds: float, error: bool = False):
+        """
+        记录一次耗时
+
+        Args:
+            seconds: 耗时（秒）
+            error: 该次操作是否抛出异常
+        """
+        ms = seconds * 1000.0
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if error:
+            self.errors += 1
+        if self.min_ms is None or ms < self.min_ms:
+            self.min_ms = ms
+        if self.max_ms is None or ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        估算百分位数
+
+        Args:
+            p: 百分位 (0-100)
+
+        Returns:
+            所在桶的上界（毫秒），不超过观测到的最大值；无数据时返回 None
+        """
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(p / 100.0 * self.count))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                bound = BUCKET_BOUNDS_MS[i] if i < len(BUCKET_BOUNDS_MS) else self.max_ms
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def merge(self, other: "LatencyHistogram"):
+        """合并另一个直方图"""
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.errors += other.errors
+        self.total_ms += other.total_ms
+        if other.min_ms is not None and (self.min_ms is None or other.min_ms < self.min_ms):
+            self.min_ms = other.min_ms
+        if other.max_ms is not None and (self.max_ms is None or other.max_ms > self.max_ms):
+            self.max_ms = other.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化为可合并的字典（只保存非空桶）"""
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": self.total_ms,
+            "min_ms": self.min_ms,
+            "max_ms": self.max_ms,
+            "buckets": {str(i): n for i, n in enumerate(self.counts) if n},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        """从 to_dict() 的结果恢复直方图"""
+        histogram = cls()
+        for i, n in data.get("buckets", {}).items():
+            histogram.counts[int(i)] = n
+        histogram.count = data.get("count", 0)
+        histogram.errors = data.get("errors", 0)
+        histogram.total_ms = data.get("total_ms", 0.0)
+        histogram.min_ms = data.get("min_ms")
+        histogram.max_ms = data.get("max_ms")
+        return histogram
+
+    def summary(self) -> Dict[str, Any]:
+        """计数、均值与 p50/p95/p99 摘要"""
+        def rounded(value):
+            return None if value is None else round(value, 3)
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": rounded(self.total_ms / self.count) if self.count else None,
+            "p50_ms": rounded(self.percentile(50)),
+            "p95_ms": rounded(self.percentile(95)),
+            "p99_ms": rounded(self.percentile(99)),
+            "max_ms": rounded(self.max_ms),
+        }
+
+
+class MetricsRegistry:
+    """按操作、选择器、设备三个维度累计直方图"""
+
+    DIMENSIONS = ("operations", "selectors", "devices")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, Dict[str, LatencyHistogram]] = {d: {} for d in self.DIMENSIONS}
+
+    def _histogram(self, dimension: str, key: str) -> LatencyHistogram:
+        histograms = self.histograms[dimension]
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = LatencyHistogram()
+        return histogram
+
+    def record(
+        self,
+        operation: str,
+        seconds: float,
+        selector: Optional[Dict[str, Any]] = None,
+        device: Optional[str] = None,
+        error: bool = False
+    ):
+        """
+        记录一次操作耗时
+
+        Args:
+            operation: 操作名称，如 click_element
+            seconds: 耗时（秒）
+            selector: 元素选择器字典
+            device: 设备序列号
+            error: 该次操作是否抛出异常
+        """
+        with self._lock:
+            self._histogram("operations", operation).record(seconds, error)
+            if selector is not None:
+                key = f"{operation} {selector_key(selector)}"
+                self._histogram("selectors", key).record(seconds, error)
+            if device is not None:
+                self._histogram("devices", f"{operation} @{device}").record(seconds, error)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化所有直方图，用于在 xdist worker 与主进程之间传递"""
+        with self._lock:
+            return {
+                dimension: {key: h.to_dict() for key, h in histograms.items()}
+                for dimension, histograms in self.histograms.items()
+            }
+
+    def merge(self, data: Dict[str, Any]):
+        """
+        合并 to_dict() 的结果
+
+        Args:
+            data: 其他进程导出的直方图数据
+        """
+        with self._lock:
+            for dimension in self.DIMENSIONS:
+                for key, value in data.get(dimension, {}).items():
+                    self._histogram(dimension, key).merge(LatencyHistogram.from_dict(value))
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        生成写入报告的摘要
+
+        Returns:
+            每个维度下各键的 count/mean/p50/p95/p99/max 以及原始分桶
+        """
+        with self._lock:
+            return {
+                "bucket_bounds_ms": BUCKET_BOUNDS_MS,
+                **{
+                    dimension: {
+                        key: dict(h.summary(), histogram=h.to_dict()["buckets"])
+                        for key, h in sorted(histograms.items())
+                    }
+                    for dimension, histograms in self.histograms.items()
+                },
+            }
+
+    def reset(self):
+        """清空所有直方图"""
+        with self._lock:
+            self.histograms = {d: {} for d in self.DIMENSIONS}
+
+
+_registry = MetricsRegistry()
+# 设备对象 -> 序列号；u2.Device.serial 在未缓存时会触发 shell 调用，这里只取一次
+_device_serials: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """获取进程内共享的统计注册表"""
+    return _registry
+
+
+def device_serial(device: Any) -> Optional[str]:
+    """
+    获取并缓存设备序列号
+
+    Args:
+        device: uiautomator2 设备对象
+
+    Returns:
+        序列号，获取失败返回 None
+    """
+    if device is None:
+        return None
+    try:
+        return _device_serials[device]
+    except KeyError:
+        pass
+    except TypeError:
+        return None
+    try:
+        serial = device.serial
+    except Exception:
+        serial = None
+    _device_serials[device] = serial
+    return serial
+
+
+def timed(operation: Optional[str] = None) -> Callable:
+    """
+    为 BaseTest 方法记录耗时的装饰器
+
+    第一个参数为字典时作为选择器维度，self.device.serial 作为设备维度
+
+    Args:
+        operation: 操作名称，默认使用函数名
+    """
+    def decorator(func: Callable) -> Callable:
+        name = operation or func.__name__
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs) -> Any:
+            start = time.perf_counter()
+            error = False
+            try:
+                return func(self, *args, **kwargs)
+            except BaseException:
+                error = True
+                raise
+            finally:
+                selector = args[0] if args and isinstance(args[0], dict) else kwargs.get("selector")
+                _registry.record(
+                    name,
+                    time.perf_counter() - start,
+                    selector=selector,
+                    device=device_serial(self.device),
+                    error=error,
+                )
+
+        return wrapper
+    return decorator
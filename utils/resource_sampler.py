@@ -0,0 +1,311 @@
+"""
+设备资源采样
+后台线程按固定间隔读取 /proc/stat、/proc/<pid>/stat、dumpsys meminfo 和 dumpsys battery，
+每次采样只有一次批量 shell 调用，数据保存在 array 支持的定长时间序列中
+"""
+import re
+import time
+import logging
+import threading
+from array import array
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+from utils.shell_batch import run_batch
+
+logger = logging.getLogger(__name__)
+
+# 采样的指标及单位
+METRICS = {
+    "cpu_total": "%",      # 整机 CPU 使用率
+    "cpu_app": "%",        # 被测应用占整机 CPU 的比例
+    "pss_mb": "MB",        # 被测应用 PSS 内存
+    "battery_level": "%",  # 电量
+    "battery_temp": "°C",  # 电池温度
+}
+
+_PSS_TOTAL = re.compile(r"TOTAL PSS:\s+(\d+)")
+_PSS_TABLE = re.compile(r"^\s*TOTAL\s+(\d+)", re.M)
+_BATTERY_LEVEL = re.compile(r"^\s*level:\s*(\d+)", re.M)
+_BATTERY_SCALE = re.compile(r"^\s*scale:\s*(\d+)", re.M)
+_BATTERY_TEMP = re.compile(r"^\s*temperature:\s*(-?\d+)", re.M)
+
+
+def parse_proc_stat(text: str) -> Optional[Tuple[int, int]]:
+    """
+    解析 /proc/stat 的汇总 cpu 行
+
+    Args:
+        text: /proc/stat 内容（至少包含第一行）
+
+    Returns:
+        (总 jiffies, 空闲 jiffies)，空闲包含 iowait；无法解析时返回 None
+    """
+    for line in text.splitlines():
+        if line.startswith("cpu "):
+            fields = [int(value) for value in line.split()[1:9]]
+            idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+            return sum(fields), idle
+    return None
+
+
+def parse_pid_stat(text: str) -> Optional[int]:
+    """
+    解析 /proc/<pid>/stat 中进程累计的 CPU 时间
+
+    进程名可能包含空格和括号，从最后一个右括号之后开始按字段切分
+
+    Args:
+        text: /proc/<pid>/stat 内容
+
+    Returns:
+        utime + stime（jiffies），无法解析时返回 None
+    """
+    end = text.rfind(")")
+    if end < 0:
+        return None
+    fields = text[end + 2:].split()
+    # 右括号之后依次是 state(3)、ppid(4)…，utime 和 stime 为第 14、15 个字段
+    if len(fields) < 13:
+        return None
+    return int(fields[11]) + int(fields[12])
+
+
+def parse_meminfo_pss(text: str) -> Optional[int]:
+    """
+    解析 dumpsys meminfo <package> 的总 PSS
+
+    兼容新版的 "TOTAL PSS:" 摘要行和旧版表格中的 TOTAL 行
+
+    Args:
+        text: dumpsys meminfo 输出
+
+    Returns:
+        总 PSS（KB），无法解析时返回 None
+    """
+    match = _PSS_TOTAL.search(text) or _PSS_TABLE.search(text)
+    return int(match.group(1)) if match else None
+
+
+def parse_battery(text: str) -> Dict[str, float]:
+    """
+    解析 dumpsys battery
+
+    Args:
+        text: dumpsys battery 输出
+
+    Returns:
+        包含 level（百分比）和 temperature（摄氏度）的字典，缺失的字段省略
+    """
+    result: Dict[str, float] = {}
+    level = _BATTERY_LEVEL.search(text)
+    if level:
+        scale = _BATTERY_SCALE.search(text)
+        result["level"] = int(level.group(1)) * 100.0 / (int(scale.group(1)) if scale else 100)
+    temperature = _BATTERY_TEMP.search(text)
+    if temperature:
+        result["temperature"] = int(temperature.group(1)) / 10.0
+    return result
+
+
+class TimeSeries:
+    """
+    定长时间序列
+
+    数据存放在 array('d') 中；写满 capacity 后丢弃一半（隔一个保留一个）并把记录步长加倍，
+    内存固定，同时始终覆盖从开始到现在的整个时间段
+    """
+
+    def __init__(self, capacity: int = 600):
+        """
+        初始化时间序列
+
+        Args:
+            capacity: 最多保存的点数
+        """
+        self.capacity = max(2, capacity)
+        self.times = array("d")
+        self.values = array("d")
+        self.stride = 1
+        self._pending = 0
+
+    def append(self, t: float, value: float):
+        """
+        追加一个点
+
+        Args:
+            t: 时间（秒）
+            value: 数值
+        """
+        self._pending += 1
+        if self._pending < self.stride:
+            return
+        self._pending = 0
+        self.times.append(t)
+        self.values.append(value)
+        if len(self.values) >= self.capacity:
+            self.times = self.times[::2]
+            self.values = self.values[::2]
+            self.stride *= 2
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def summary(self) -> Optional[Dict[str, float]]:
+        """
+        统计最小值、平均值、最大值和最小二乘斜率
+
+        Returns:
+            包含 count、min、mean、max、slope_per_s 的字典，没有数据时返回 None
+        """
+        n = len(self.values)
+        if not n:
+            return None
+        mean = sum(self.values) / n
+        slope = 0.0
+        if n > 1:
+            mean_t = sum(self.times) / n
+            var_t = sum((t - mean_t) ** 2 for t in self.times)
+            if var_t:
+                slope = sum((t - mean_t) * (v - mean) for t, v in zip(self.times, self.values)) / var_t
+        return {
+            "count": n,
+            "min": round(min(self.values), 3),
+            "mean": round(mean, 3),
+            "max": round(max(self.values), 3),
+            "slope_per_s": round(slope, 5),
+        }
+
+
+class ResourceSampler:
+    """
+    被测应用资源采样器
+
+    start() 后在后台线程中每 interval 秒采样一次，stop() 后通过 summary() 获取统计
+    """
+
+    def __init__(
+        self,
+        device,
+        package: str,
+        interval: float = 1.0,
+        capacity: int = 600,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        初始化采样器
+
+        Args:
+            device: uiautomator2 设备对象
+            package: 被测应用包名
+            interval: 采样间隔（秒）
+            capacity: 每个指标最多保存的点数
+            clock: 单调时钟函数
+        """
+        self.device = device
+        self.package = package
+        self.interval = interval
+        self.clock = clock
+        self.series: Dict[str, TimeSeries] = {name: TimeSeries(capacity) for name in METRICS}
+        self.samples = 0
+        self.errors = 0
+        self._start: Optional[float] = None
+        self._last_cpu: Optional[Tuple[int, int]] = None
+        self._last_app: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def commands(self) -> List[str]:
+        """一次采样执行的 shell 命令"""
+        return [
+            "head -1 /proc/stat",
+            f"cat /proc/$(pidof -s {self.package})/stat",
+            f"dumpsys meminfo {self.package}",
+            "dumpsys battery",
+        ]
+
+    def record(self, t: float, outputs: List[str]):
+        """
+        解析一次采样的命令输出并写入时间序列
+
+        Args:
+            t: 采样时间（秒，相对开始）
+            outputs: 与 commands() 一一对应的输出，失败的命令为空字符串
+        """
+        stat_text, pid_text, meminfo_text, battery_text = outputs
+        cpu = parse_proc_stat(stat_text)
+        app = parse_pid_stat(pid_text) if pid_text else None
+
+        if cpu and self._last_cpu:
+            total = cpu[0] - self._last_cpu[0]
+            if total > 0:
+                self.series["cpu_total"].append(t, 100.0 * (total - (cpu[1] - self._last_cpu[1])) / total)
+                if app is not None and self._last_app is not None and app >= self._last_app:
+                    self.series["cpu_app"].append(t, 100.0 * (app - self._last_app) / total)
+        self._last_cpu = cpu or self._last_cpu
+        # 应用重启后进程 CPU 时间从零开始，下一次重新计算差值
+        self._last_app = app
+
+        pss = parse_meminfo_pss(meminfo_text)
+        if pss is not None:
+            self.series["pss_mb"].append(t, pss / 1024.0)
+        battery = parse_battery(battery_text)
+        if "level" in battery:
+            self.series["battery_level"].append(t, battery["level"])
+        if "temperature" in battery:
+            self.series["battery_temp"].append(t, battery["temperature"])
+        self.samples += 1
+
+    def sample_once(self):
+        """采样一次（一次批量 shell 调用）"""
+        if self._start is None:
+            self._start = self.clock()
+        t = self.clock() - self._start
+        try:
+            results = run_batch(self.device, self.commands(), timeout=max(10, int(self.interval * 5)))
+        except Exception as e:
+            self.errors += 1
+            logger.debug(f"资源采样失败: {e}")
+            return
+        self.record(t, [r.output if r.ok else "" for r in results])
+
+    def _run(self):
+        self.sample_once()
+        while not self._stop.wait(self.interval):
+            self.sample_once()
+
+    def start(self):
+        """启动后台采样线程"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台采样线程"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=self.interval * 5 + 10)
+        self._thread = None
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        生成写入报告的摘要
+
+        Returns:
+            包含包名、采样次数、失败次数、时长以及各指标 min/mean/max/slope 的字典
+        """
+        duration = (self.clock() - self._start) if self._start is not None else 0.0
+        metrics = {}
+        for name, series in self.series.items():
+            stats = series.summary()
+            if stats:
+                metrics[name] = dict(stats, unit=METRICS[name])
+        return {
+            "package": self.package,
+            "samples": self.samples,
+            "errors": self.errors,
+            "duration": round(duration, 3),
+            "metrics": metrics,
+        }
@@ -0,0 +1,444 @@
+"""
+带预算的重试
+指数退避加随机抖动，按异常类型区分可重试与致命错误，整个会话共享重试时间预算，
+并为每台设备维护熔断器：设备确认失联后快速失败并通知设备池
+"""
+import time
+import logging
+import threading
+from collections import defaultdict
+from functools import wraps
+from typing import Optional, Dict, Any, Callable, Tuple
+
+from utils.helpers import BackoffPolicy
+from utils.metrics import device_serial
+
+logger = logging.getLogger(__name__)
+
+# 异常分类
+TRANSIENT = "transient"
+DEVICE = "device"
+FATAL = "fatal"
+
+# 按类名匹配，避免为了分类导入 uiautomator2 / adbutils
+DEVICE_ERROR_NAMES = frozenset({
+    "ConnectError", "HTTPError", "HTTPTimeoutError", "UiAutomationNotConnectedError",
+    "AdbError", "AdbTimeout", "AdbConnectionError", "ConnectionError",
+})
+FATAL_ERROR_NAMES = frozenset({
+    "AppNotFoundError", "InjectPermissionError", "APKSignatureError", "AdbInstallError",
+    "DeviceUnavailableError",
+    "TypeError", "NameError", "AttributeError", "ImportError", "SyntaxError", "NotImplementedError",
+})
+
+
+class DeviceUnavailableError(RuntimeError):
+    """设备熔断器处于打开状态，操作未执行"""
+
+
+def classify(error: BaseException) -> str:
+    """
+    判断异常是否值得重试
+
+    Args:
+        error: 捕获的异常
+
+    Returns:
+        transient（可重试）、device（可重试，且计入设备熔断器）或 fatal（不重试）
+    """
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & FATAL_ERROR_NAMES:
+        return FATAL
+    if names & DEVICE_ERROR_NAMES:
+        return DEVICE
+    return TRANSIENT
+
+
+class CircuitBreaker:
+    """
+    单台设备的熔断器
+
+    连续 threshold 次设备错误后打开，打开期间的调用直接抛出 DeviceUnavailableError；
+    cooldown 秒后进入半开状态放行一次调用，成功则关闭（通知 on_close），失败则重新打开
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        serial: str,
+        threshold: int = 3,
+        cooldown: float = 30.0,
+        on_open: Optional[Callable[[str], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        on_close: Optional[Callable[[str], None]] = None
+    ):
+        """
+        初始化熔断器
+
+        Args:
+            serial: 设备序列号
+            threshold: 连续多少次设备错误后打开
+            cooldown: 打开后多少秒进入半开状态
+            on_open: 打开时的回调，参数为序列号，用于通知设备池
+            clock: 单调时钟函数
+            on_close: 打开后重新关闭时的回调，参数为序列号，用于让设备池恢复该设备
+        """
+        self.serial = serial
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.on_open = on_open
+        self.on_close = on_close
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """调用前检查，熔断时抛出 DeviceUnavailableError"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.clock() - self.opened_at < self.cooldown:
+                    raise DeviceUnavailableError(f"设备 {self.serial} 已熔断，跳过调用")
+                self.state = self.HALF_OPEN
+                logger.info(f"设备 {self.serial} 熔断冷却结束，放行一次试探调用")
+
+    def record_success(self):
+        with self._lock:
+            recovered = self.state != self.CLOSED
+            self.state = self.CLOSED
+            self.failures = 0
+        if not recovered:
+            return
+        logger.info(f"设备 {self.serial} 恢复，熔断器关闭")
+        if self.on_close is not None:
+            try:
+                self.on_close(self.serial)
+            except Exception as e:
+                logger.warning(f"通知设备池失败: {e}")
+
+    def record_failure(self, error: BaseException):
+        """
+        记录一次失败，只有设备错误计数
+
+        Args:
+            error: 捕获的异常
+        """
+        if classify(error) != DEVICE:
+            return
+        with self._lock:
+            self.failures += 1
+            if self.state == self.OPEN:
+                return
+            if self.state != self.HALF_OPEN and self.failures < self.threshold:
+                return
+            self.state = self.OPEN
+            self.opened_at = self.clock()
+            self.trips += 1
+        logger.error(f"设备 {self.serial} 连续 {self.failures} 次设备错误，熔断器打开: {error}")
+        if self.on_open is not None:
+            try:
+                self.on_open(self.serial)
+            except Exception as e:
+                logger.warning(f"通知设备池失败: {e}")
+
+
+class RetryRegistry:
+    """
+    进程内共享的重试预算、熔断器和统计
+    """
+
+    def __init__(
+        self,
+        budget: float = 120.0,
+        breaker_threshold: int = 3,
+        breaker_cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        初始化重试注册表
+
+        Args:
+            budget: 整个会话允许花在重试等待上的总秒数，0 表示不限制
+            breaker_threshold: 熔断器打开前允许的连续设备错误次数
+            breaker_cooldown: 熔断器冷却时间（秒）
+            clock: 单调时钟函数
+        """
+        self.budget = budget
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.clock = clock
+        self.default_serial: Optional[str] = None
+        self.on_breaker_open: Optional[Callable[[str], None]] = None
+        self.on_breaker_close: Optional[Callable[[str], None]] = None
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """清空统计和已用预算"""
+        with self._lock:
+            self.spent = 0.0
+            self.stats: Dict[str, Dict[str, Any]] = defaultdict(
+                lambda: {"calls": 0, "retries": 0, "retry_seconds": 0.0, "failures": 0, "fatal": 0}
+            )
+            self.budget_exhausted = 0
+            self.fast_failures = 0
+            # 其他 xdist worker 上报的熔断器状态
+            self.remote_breakers: Dict[str, Dict[str, Any]] = {}
+
+    def breaker(self, serial: Optional[str]) -> Optional[CircuitBreaker]:
+        """
+        获取设备的熔断器
+
+        Args:
+            serial: 设备序列号，None 时使用 default_serial
+
+        Returns:
+            CircuitBreaker，无法确定设备时返回 None
+        """
+        serial = serial or self.default_serial
+        if not serial:
+            return None
+        with self._lock:
+            breaker = self.breakers.get(serial)
+            if breaker is None:
+                breaker = self.breakers[serial] = CircuitBreaker(
+                    serial,
+                    threshold=self.breaker_threshold,
+                    cooldown=self.breaker_cooldown,
+                    on_open=self._notify_open,
+                    clock=self.clock,
+                    on_close=self._notify_close,
+                )
+            return breaker
+
+    def _notify_open(self, serial: str):
+        if self.on_breaker_open is not None:
+            self.on_breaker_open(serial)
+
+    def _notify_close(self, serial: str):
+        if self.on_breaker_close is not None:
+            self.on_breaker_close(serial)
+
+    def reserve(self, seconds: float) -> bool:
+        """
+        从会话预算中预留一次重试等待
+
+        Args:
+            seconds: 计划等待的秒数
+
+        Returns:
+            True 如果预算足够
+        """
+        with self._lock:
+            if self.budget and self.spent + seconds > self.budget:
+                self.budget_exhausted += 1
+                return False
+            self.spent += seconds
+            return True
+
+    def call(
+        self,
+        func: Callable,
+        args: tuple = (),
+        kwargs: Optional[Dict[str, Any]] = None,
+        name: Optional[str] = None,
+        max_attempts: int = 3,
+        policy: Optional[BackoffPolicy] = None,
+        exceptions: Tuple[type, ...] = (Exception,),
+        serial: Optional[str] = None,
+        sleep: Callable[[float], None] = time.sleep
+    ) -> Any:
+        """
+        按重试策略调用函数
+
+        Args:
+            func: 被调用的函数
+            args: 位置参数
+            kwargs: 关键字参数
+            name: 统计中使用的名称，默认函数名
+            max_attempts: 最大尝试次数
+            policy: 退避策略
+            exceptions: 允许重试的异常类型，其中被分类为 fatal 的仍然立即抛出
+            serial: 设备序列号，用于熔断
+            sleep: 休眠函数
+
+        Returns:
+            函数返回值
+        """
+        kwargs = kwargs or {}
+        name = name or getattr(func, "__name__", "call")
+        policy = policy or BackoffPolicy(initial=1.0, factor=2.0, maximum=8.0, jitter=0.5)
+        breaker = self.breaker(serial)
+        with self._lock:
+            stats = self.stats[name]
+            stats["calls"] += 1
+
+        for attempt in range(1, max_attempts + 1):
+            if breaker is not None:
+                try:
+                    breaker.before_call()
+                except DeviceUnavailableError:
+                    with self._lock:
+                        self.fast_failures += 1
+                    raise
+            try:
+                result = func(*args, **kwargs)
+            except exceptions as e:
+                kind = classify(e)
+                if breaker is not None:
+                    breaker.record_failure(e)
+                if kind == FATAL:
+                    with self._lock:
+                        stats["fatal"] += 1
+                    raise
+                if breaker is not None and breaker.state == CircuitBreaker.OPEN:
+                    # 本次失败触发了熔断，不再等待重试
+                    with self._lock:
+                        stats["failures"] += 1
+                    raise
+                if attempt >= max_attempts:
+                    with self._lock:
+                        stats["failures"] += 1
+                    logger.error(f"{name} 所有尝试均失败")
+                    raise
+                delay = policy.interval(attempt - 1)
+                if not self.reserve(delay):
+                    with self._lock:
+                        stats["failures"] += 1
+                    logger.error(f"{name} 第 {attempt} 次尝试失败，会话重试预算已用完: {e}")
+                    raise
+                logger.warning(f"{name} 第 {attempt} 次尝试失败: {e}, {delay:.2f} 秒后重试...")
+                sleep(delay)
+                with self._lock:
+                    stats["retries"] += 1
+                    stats["retry_seconds"] += delay
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化统计，用于在 xdist worker 与主进程之间传递"""
+        with self._lock:
+            return {
+                "spent": self.spent,
+                "budget_exhausted": self.budget_exhausted,
+                "fast_failures": self.fast_failures,
+                "operations": {name: dict(stats) for name, stats in self.stats.items()},
+                "breakers": {
+                    serial: {"state": b.state, "trips": b.trips} for serial, b in self.breakers.items()
+                },
+            }
+
+    def merge(self, data: Dict[str, Any]):
+        """
+        合并 to_dict() 的结果
+
+        Args:
+            data: 其他进程导出的统计
+        """
+        with self._lock:
+            self.spent += data.get("spent", 0.0)
+            self.budget_exhausted += data.get("budget_exhausted", 0)
+            self.fast_failures += data.get("fast_failures", 0)
+            for name, stats in data.get("operations", {}).items():
+                for key, value in stats.items():
+                    self.stats[name][key] += value
+            self.remote_breakers.update(data.get("breakers", {}))
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        生成写入报告的摘要
+
+        Returns:
+            包含总重试次数、重试耗时、预算使用和各操作、各设备熔断情况的字典
+        """
+        data = self.to_dict()
+        data["breakers"].update(self.remote_breakers)
+        operations = {
+            name: dict(stats, retry_seconds=round(stats["retry_seconds"], 3))
+            for name, stats in sorted(data["operations"].items())
+        }
+        return {
+            "budget_seconds": self.budget,
+            "budget_spent": round(data["spent"], 3),
+            "budget_exhausted": data["budget_exhausted"],
+            "fast_failures": data["fast_failures"],
+            "retries": sum(stats["retries"] for stats in operations.values()),
+            "retry_seconds": round(sum(stats["retry_seconds"] for stats in operations.values()), 3),
+            "operations": operations,
+            "breakers": data["breakers"],
+        }
+
+
+_registry: Optional[RetryRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_retry_registry() -> RetryRegistry:
+    """获取进程内共享的重试注册表，预算和熔断参数取自 Config"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            from config.config import Config
+            _registry = RetryRegistry(
+                budget=Config.RETRY_BUDGET,
+                breaker_threshold=Config.BREAKER_THRESHOLD,
+                breaker_cooldown=Config.BREAKER_COOLDOWN,
+            )
+        return _registry
+
+
+def retrying(
+    max_attempts: int = 3,
+    delay: float = 1.0,
+    exceptions: Tuple[type, ...] = (Exception,),
+    max_delay: Optional[float] = None,
+    jitter: float = 0.5,
+    serial: Optional[str] = None
+) -> Callable:
+    """
+    带预算和熔断的重试装饰器
+
+    第 n 次失败后等待 delay * 2 ** (n - 1) 秒（不超过 max_delay，叠加 ±jitter 抖动）；
+    未指定 serial 时，若第一个参数带有 device 属性则以其序列号熔断
+
+    Args:
+        max_attempts: 最大尝试次数
+        delay: 首次重试前的等待时间（秒）
+        exceptions: 允许重试的异常类型
+        max_delay: 最大等待时间，默认 Config.RETRY_MAX_DELAY
+        jitter: 随机抖动比例 (0.0-1.0)
+        serial: 设备序列号
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            registry = get_retry_registry()
+            from config.config import Config
+            policy = BackoffPolicy(
+                initial=delay,
+                factor=2.0,
+                maximum=max_delay if max_delay is not None else max(delay, Config.RETRY_MAX_DELAY),
+                jitter=jitter,
+            )
+            target = serial
+            if target is None and args and hasattr(args[0], "device"):
+                target = device_serial(args[0].device)
+            return registry.call(
+                func, args, kwargs,
+                name=func.__name__,
+                max_attempts=max_attempts,
+                policy=policy,
+                exceptions=exceptions,
+                serial=target,
+            )
+
+        return wrapper
+    return decorator
@@ -0,0 +1,264 @@
+"""
+异步截图流水线
+测试线程只负责抓取图像，编码和写盘交给后台线程池
+"""
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Optional, Dict, Any
+
+from config.config import Config
+
+if TYPE_CHECKING:
+    from utils.screenshot_store import ScreenshotStore
+
+logger = logging.getLogger(__name__)
+
+
+class ScreenshotPipeline:
+    """后台截图写入流水线"""
+
+    # 队列满时的背压策略
+    DROP_OLDEST = "drop_oldest"
+    BLOCK = "block"
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_pending: int = 16,
+        policy: str = BLOCK,
+        store: Optional["ScreenshotStore"] = None
+    ):
+        """
+        初始化截图流水线
+
+        Args:
+            workers: 编码写盘线程数
+            max_pending: 等待写盘的最大截图数
+            policy: 队列满时的策略，drop_oldest 丢弃最旧的截图，block 阻塞测试线程
+            store: 去重存储，近似重复的截图只记录引用；None 表示每张都写盘
+        """
+        if policy not in (self.DROP_OLDEST, self.BLOCK):
+            raise ValueError(f"不支持的背压策略: {policy}")
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.policy = policy
+        self.store = store
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        # 尚未写完的目标路径 -> 提交次数，供 resolve() 等待
+        self._pending: Dict[str, int] = {}
+        self._threads = []
+        self._closed = False
+        self.stats = {"submitted": 0, "written": 0, "deduplicated": 0, "dropped": 0, "failed": 0}
+
+    def _ensure_workers(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker, name=f"screenshot-writer-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, image: Any, path: str, max_distance: Optional[int] = None) -> str:
+        """
+        提交一张已抓取的图像等待写盘
+
+        Args:
+            image: 支持 save(path) 的图像对象（PIL.Image）
+            path: 目标文件路径
+            max_distance: 本张截图的去重阈值，None 使用存储的默认值，-1 表示只去除完全相同的截图
+
+        Returns:
+            目标文件路径
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("截图流水线已关闭")
+            self._ensure_workers()
+            while len(self._queue) >= self.max_pending:
+                if self.policy == self.DROP_OLDEST:
+                    _, dropped_path, _ = self._queue.popleft()
+                    self._done(dropped_path)
+                    self.stats["dropped"] += 1
+                    logger.warning(f"截图队列已满，丢弃: {dropped_path}")
+                else:
+                    self._cond.wait()
+            self._queue.append((image, path, max_distance))
+            self._pending[path] = self._pending.get(path, 0) + 1
+            self.stats["submitted"] += 1
+            self._cond.notify_all()
+        return path
+
+    def capture(self, device, path: str, max_distance: Optional[int] = None) -> str:
+        """
+        抓取设备截图并异步写盘
+
+        Args:
+            device: uiautomator2 设备对象
+            path: 目标文件路径
+            max_distance: 本张截图的去重阈值，含义同 submit()
+
+        Returns:
+            目标文件路径（flush 之后由去重索引映射到实际文件）
+        """
+        return self.submit(device.screenshot(), path, max_distance)
+
+    def _done(self, path: str):
+        """在锁内登记一张截图已处理完"""
+        count = self._pending.get(path, 0) - 1
+        if count > 0:
+            self._pending[path] = count
+        else:
+            self._pending.pop(path, None)
+
+    def resolve(self, path: str, timeout: Optional[float] = None) -> str:
+        """
+        等待某张截图处理完，返回实际保存它的文件
+
+        启用去重时近似重复的截图不写盘，实际文件是已有的截图；
+        会阻塞调用线程，只在确实需要实际文件的地方（如报告附件）使用
+
+        Args:
+            path: 提交时的目标文件路径
+            timeout: 最长等待秒数，None 表示一直等待
+
+        Returns:
+            实际文件路径；未启用去重或等待超时时返回 path
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while path in self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return path
+                self._cond.wait(remaining)
+        if self.store is None:
+            return path
+        return self.store.resolve(path) or path
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                image, path, max_distance = self._queue.popleft()
+                self._in_flight += 1
+                self._cond.notify_all()
+            try:
+                if self.store is not None:
+                    self.store.save(image, path, max_distance)
+                    result = "deduplicated" if self.store.is_reference(path) else "written"
+                else:
+                    directory = os.path.dirname(path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    image.save(path)
+                    result = "written"
+            except Exception as e:
+                logger.error(f"写入截图失败 {path}: {e}")
+                result = "failed"
+            with self._cond:
+                self._in_flight -= 1
+                self._done(path)
+                self.stats[result] += 1
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待所有已提交的截图写盘完成
+
+        Args:
+            timeout: 最长等待秒数，None 表示一直等待
+
+        Returns:
+            True 如果全部写入完成
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        if self.store is not None:
+            self.store.write_index()
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        写完剩余截图并停止后台线程
+
+        Args:
+            timeout: 最长等待秒数
+
+        Returns:
+            True 如果全部写入完成
+        """
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        return flushed
+
+    def get_stats(self) -> Dict[str, int]:
+        """返回提交、写入、去重、丢弃、失败的截图计数"""
+        with self._cond:
+            return dict(self.stats, pending=len(self._queue) + self._in_flight)
+
+
+_pipeline: Optional[ScreenshotPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_screenshot_pipeline() -> ScreenshotPipeline:
+    """
+    获取进程内共享的截图流水线
+
+    Returns:
+        ScreenshotPipeline 对象
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            # 去重存储依赖 numpy，首次截图时才导入
+            from utils.screenshot_store import ScreenshotStore
+
+            _pipeline = ScreenshotPipeline(
+                workers=Config.SCREENSHOT_WORKERS,
+                max_pending=Config.SCREENSHOT_QUEUE_SIZE,
+                policy=Config.SCREENSHOT_QUEUE_POLICY,
+                store=ScreenshotStore(
+                    Config.SCREENSHOT_DIR, max_distance=Config.SCREENSHOT_DEDUP_DISTANCE
+                ) if Config.SCREENSHOT_DEDUP else None,
+            )
+        return _pipeline
+
+
+def shutdown_screenshot_pipeline(timeout: Optional[float] = None) -> Optional[Dict[str, int]]:
+    """
+    会话结束时写完所有截图并关闭流水线
+
+    Args:
+        timeout: 最长等待秒数
+
+    Returns:
+        流水线统计信息，未创建流水线时返回 None
+    """
+    global _pipeline
+    with _pipeline_lock:
+        pipeline, _pipeline = _pipeline, None
+    if pipeline is None:
+        return None
+    if not pipeline.close(timeout):
+        logger.warning("截图流水线未能在超时前写完所有截图")
+    return pipeline.get_stats()
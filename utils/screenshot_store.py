@@ -0,0 +1,308 @@
+"""
+截图去重存储
+为每张截图计算感知哈希，近似重复的截图不再写盘，只在内容寻址的索引中记录引用
+"""
+import io
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 差值哈希的边长，哈希位数为 HASH_SIZE * HASH_SIZE
+HASH_SIZE = 16
+
+
+def perceptual_hash(image: Any, hash_size: int = HASH_SIZE) -> np.ndarray:
+    """
+    计算图像的差值哈希（dHash）
+
+    图像缩放为 (hash_size + 1) x hash_size 的灰度图，比较水平相邻像素的明暗，
+    对缩放、压缩和细微的渲染差异不敏感
+
+    Args:
+        image: PIL.Image 对象
+        hash_size: 哈希边长
+
+    Returns:
+        按位打包的 uint8 数组，长度为 hash_size * hash_size / 8
+    """
+    from PIL import Image
+
+    gray = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = np.asarray(gray, dtype=np.int16)
+    return np.packbits(pixels[:, 1:] > pixels[:, :-1])
+
+
+def hamming_distances(hashes: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """
+    计算一组哈希与目标哈希的汉明距离
+
+    Args:
+        hashes: 形状为 (n, k) 的 uint8 数组
+        target: 长度为 k 的 uint8 数组
+
+    Returns:
+        长度为 n 的距离数组
+    """
+    return np.unpackbits(np.bitwise_xor(hashes, target), axis=1).sum(axis=1)
+
+
+def index_file_name() -> str:
+    """当前进程的索引文件名，xdist worker 各写一份，避免并发覆盖"""
+    worker = os.getenv("PYTEST_XDIST_WORKER")
+    return f"index-{worker}.json" if worker else "index.json"
+
+
+class ScreenshotStore:
+    """
+    截图去重存储
+
+    与已保存截图的感知哈希距离不超过 max_distance 的截图不写盘，
+    索引中该路径引用已有文件；其余截图按原路径写入 PNG，并以内容 SHA-256 登记。
+    已有文件（可能被其他引用或其他 worker 的索引指向）从不覆盖，原路径被占用时
+    新画面写到同目录下带内容哈希后缀的文件
+    """
+
+    def __init__(self, root: str, max_distance: int = 4, index_name: Optional[str] = None):
+        """
+        初始化截图存储
+
+        Args:
+            root: 截图根目录，索引文件保存在此目录下
+            max_distance: 视为重复的最大汉明距离（共 HASH_SIZE * HASH_SIZE 位），负数表示只去除完全相同的截图
+            index_name: 索引文件名，默认按 xdist worker 区分
+        """
+        self.root = root
+        self.max_distance = max_distance
+        self.index_path = os.path.join(root, index_name or index_file_name())
+        self.objects: Dict[str, Dict[str, Any]] = {}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._keys: List[str] = []
+        self._hashes = np.zeros((0, HASH_SIZE * HASH_SIZE // 8), dtype=np.uint8)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.stats = {"stored": 0, "deduplicated": 0, "bytes_saved": 0}
+        self._load()
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(self.root)).replace(os.sep, "/")
+
+    def _absolute(self, relative: str) -> str:
+        return os.path.join(self.root, *relative.split("/"))
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"截图索引损坏，已忽略: {e}")
+            return
+        for digest, obj in data.get("objects", {}).items():
+            if os.path.exists(self._absolute(obj["path"])):
+                self._add_object(digest, obj)
+        self.entries = {
+            path: entry for path, entry in data.get("entries", {}).items()
+            if entry.get("sha256") in self.objects
+        }
+
+    def _add_object(self, digest: str, obj: Dict[str, Any]):
+        self.objects[digest] = obj
+        self._keys.append(digest)
+        phash = np.frombuffer(bytes.fromhex(obj["phash"]), dtype=np.uint8)
+        self._hashes = np.vstack([self._hashes, phash[np.newaxis, :]])
+
+    def _nearest(self, phash: np.ndarray, max_distance: int) -> Optional[Tuple[str, int]]:
+        """查找距离最近且不超过阈值的已保存截图"""
+        if max_distance < 0 or not self._keys:
+            return None
+        distances = hamming_distances(self._hashes, phash)
+        best = int(np.argmin(distances))
+        if distances[best] > max_distance:
+            return None
+        return self._keys[best], int(distances[best])
+
+    def save(self, image: Any, path: str, max_distance: Optional[int] = None) -> str:
+        """
+        保存截图，近似重复时只记录引用
+
+        Args:
+            image: PIL.Image 对象
+            path: 请求写入的文件路径
+            max_distance: 本张截图的去重阈值，None 使用 self.max_distance，负数表示只去除完全相同的截图
+
+        Returns:
+            实际保存该画面的文件路径（重复时为已有文件，原路径被占用时为带哈希后缀的文件）
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        phash = perceptual_hash(image)
+        key = self._relative(path)
+        with self._lock:
+            nearest = self._nearest(phash, max_distance)
+            if nearest is not None:
+                return self._reference(key, phash, *nearest)
+
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        data = buffer.getvalue()
+        digest = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            # 编码期间其他线程可能已保存了相同或相近的画面
+            if digest in self.objects:
+                return self._reference(key, phash, digest, 0)
+            nearest = self._nearest(phash, max_distance)
+            if nearest is not None:
+                return self._reference(key, phash, *nearest)
+            target = self._write_new(path, data, digest)
+            self._add_object(digest, {
+                "path": self._relative(target), "phash": phash.tobytes().hex(), "bytes": len(data)
+            })
+            self.entries[key] = {"sha256": digest, "distance": 0, "created": time.time()}
+            self.stats["stored"] += 1
+            self._dirty = True
+        return target
+
+    @staticmethod
+    def _write_new(path: str, data: bytes, digest: str) -> str:
+        """写入新文件，不覆盖已存在的文件；原路径被占用时改用带内容哈希后缀的文件名"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            with open(path, "xb") as f:
+                f.write(data)
+            return path
+        except FileExistsError:
+            stem, ext = os.path.splitext(path)
+            # 文件名由内容决定，已存在时内容必然相同
+            target = f"{stem}-{digest[:12]}{ext}"
+            with open(target, "wb") as f:
+                f.write(data)
+            logger.debug(f"截图路径 {path} 已被占用，写入 {target}")
+            return target
+
+    def _reference(self, key: str, phash: np.ndarray, digest: str, distance: int) -> str:
+        """在锁内登记一条指向已有截图的引用"""
+        obj = self.objects[digest]
+        self.entries[key] = {"sha256": digest, "distance": distance, "reference": True, "created": time.time()}
+        self.stats["deduplicated"] += 1
+        self.stats["bytes_saved"] += obj["bytes"]
+        self._dirty = True
+        logger.debug(f"截图 {key} 与 {obj['path']} 近似重复 (距离 {distance})，只记录引用")
+        return self._absolute(obj["path"])
+
+    def resolve(self, path: str) -> Optional[str]:
+        """
+        查找某个请求路径实际对应的文件
+
+        Args:
+            path: 保存时请求的文件路径
+
+        Returns:
+            实际文件路径，未登记时返回 None
+        """
+        with self._lock:
+            entry = self.entries.get(self._relative(path))
+            if entry is None:
+                return None
+            return self._absolute(self.objects[entry["sha256"]]["path"])
+
+    def is_reference(self, path: str) -> bool:
+        """
+        某个请求路径是否只记录了对已有截图的引用（没有写入新文件）
+
+        Args:
+            path: 保存时请求的文件路径
+
+        Returns:
+            True 如果该路径登记为重复截图的引用
+        """
+        with self._lock:
+            entry = self.entries.get(self._relative(path))
+            return bool(entry and entry.get("reference"))
+
+    def compact(self) -> Dict[str, int]:
+        """
+        整理根目录下未登记的 PNG 文件
+
+        按修改时间依次登记，与已登记截图近似重复的文件删除并改为引用，
+        用于压缩旧的或关闭去重时产生的截图目录
+
+        Returns:
+            包含 scanned、removed、bytes_saved 的统计
+        """
+        from PIL import Image
+
+        with self._lock:
+            known = {obj["path"] for obj in self.objects.values()}
+        files = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                if name.lower().endswith(".png") and self._relative(path) not in known:
+                    files.append(path)
+        files.sort(key=os.path.getmtime)
+
+        result = {"scanned": len(files), "removed": 0, "bytes_saved": 0}
+        for path in files:
+            with open(path, "rb") as f:
+                data = f.read()
+            with Image.open(io.BytesIO(data)) as image:
+                phash = perceptual_hash(image)
+            digest = hashlib.sha256(data).hexdigest()
+            key = self._relative(path)
+            with self._lock:
+                nearest = (digest, 0) if digest in self.objects else self._nearest(phash, self.max_distance)
+                if nearest is None:
+                    self._add_object(digest, {"path": key, "phash": phash.tobytes().hex(), "bytes": len(data)})
+                    self.entries[key] = {"sha256": digest, "distance": 0, "created": os.path.getmtime(path)}
+                    self._dirty = True
+                    continue
+                self._reference(key, phash, *nearest)
+            os.remove(path)
+            result["removed"] += 1
+            result["bytes_saved"] += len(data)
+        self.write_index()
+        logger.info(f"截图整理完成: 扫描 {result['scanned']} 张, 删除重复 {result['removed']} 张")
+        return result
+
+    def write_index(self):
+        """把索引写入根目录（有变化时）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "hash": f"dhash{HASH_SIZE}",
+                "max_distance": self.max_distance,
+                "objects": self.objects,
+                "entries": self.entries,
+            }
+            os.makedirs(self.root, exist_ok=True)
+            tmp_file = self.index_path + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.index_path)
+            self._dirty = False
+
+    def get_stats(self) -> Dict[str, int]:
+        """返回保存、去重的截图数和节省的字节数"""
+        with self._lock:
+            return dict(self.stats)
+
+
+if __name__ == "__main__":
+    import sys
+    from config.config import Config
+
+    root = sys.argv[1] if len(sys.argv) > 1 else Config.SCREENSHOT_DIR
+    print(ScreenshotStore(root, max_distance=Config.SCREENSHOT_DEDUP_DISTANCE).compact())
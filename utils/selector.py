@@ -0,0 +1,228 @@
+"""
+本地选择器求值
+在解析好的层级节点上建立哈希索引，按 uiautomator 选择器语法在本地查找元素
+"""
+import re
+import json
+from typing import Dict, Any, List, Iterable
+
+# 选择器字段 -> 层级 XML 属性名
+SELECTOR_ATTRIBUTES = {
+    "text": "text",
+    "description": "content-desc",
+    "resourceId": "resource-id",
+    "className": "class",
+    "packageName": "package",
+}
+
+# 布尔类型的选择器字段 -> 层级 XML 属性名
+BOOLEAN_ATTRIBUTES = {
+    "checkable": "checkable",
+    "checked": "checked",
+    "clickable": "clickable",
+    "longClickable": "long-clickable",
+    "scrollable": "scrollable",
+    "enabled": "enabled",
+    "focusable": "focusable",
+    "focused": "focused",
+    "selected": "selected",
+}
+
+# 建立哈希索引的字段
+INDEXED_FIELDS = ("resourceId", "text", "description", "className")
+
+# 关系选择器字段，值为嵌套的选择器字典
+RELATION_FIELDS = ("child", "sibling")
+
+_SUFFIXES = ("Contains", "StartsWith", "Matches")
+
+
+def split_key(key: str):
+    """
+    拆分选择器字段名
+
+    Args:
+        key: 如 textContains、resourceIdMatches
+
+    Returns:
+        (基础字段名, 后缀)，无后缀时后缀为空字符串
+    """
+    for suffix in _SUFFIXES:
+        if key.endswith(suffix) and key[:-len(suffix)] in SELECTOR_ATTRIBUTES:
+            return key[:-len(suffix)], suffix
+    return key, ""
+
+
+def match_value(actual: str, suffix: str, expected: Any) -> bool:
+    """按选择器后缀（Contains/StartsWith/Matches）比较单个属性"""
+    if suffix == "Contains":
+        return str(expected) in actual
+    if suffix == "StartsWith":
+        return actual.startswith(str(expected))
+    if suffix == "Matches":
+        return re.fullmatch(str(expected), actual) is not None
+    return actual == str(expected)
+
+
+def validate_selector(selector: Dict[str, Any]):
+    """
+    校验选择器字段名
+
+    Args:
+        selector: uiautomator 选择器字典
+
+    Raises:
+        ValueError: 包含不支持的字段
+    """
+    for key in selector:
+        if key in ("instance", "index") or key in RELATION_FIELDS or key in BOOLEAN_ATTRIBUTES:
+            continue
+        if split_key(key)[0] not in SELECTOR_ATTRIBUTES:
+            raise ValueError(f"不支持的选择器字段: {key}")
+
+
+def selector_key(selector: Dict[str, Any]) -> str:
+    """
+    选择器的规范化字符串，可作为字典键
+
+    Args:
+        selector: uiautomator 选择器字典
+
+    Returns:
+        字段排序后的 JSON 文本，字段顺序不同的等价选择器得到相同的键
+    """
+    return json.dumps(selector, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def match_node(node, selector: Dict[str, Any]) -> bool:
+    """
+    判断单个节点是否满足选择器（不含 instance 和关系字段）
+
+    Args:
+        node: 层级节点
+        selector: uiautomator 选择器字典
+
+    Returns:
+        True 如果满足所有条件
+    """
+    for key, expected in selector.items():
+        if key == "instance" or key in RELATION_FIELDS:
+            continue
+        if key in BOOLEAN_ATTRIBUTES:
+            if (node.get(BOOLEAN_ATTRIBUTES[key]) == "true") != bool(expected):
+                return False
+            continue
+        if key == "index":
+            if node.get("index") != str(expected):
+                return False
+            continue
+        base, suffix = split_key(key)
+        if not match_value(node.get(SELECTOR_ATTRIBUTES[base]), suffix, expected):
+            return False
+    return True
+
+
+class SelectorIndex:
+    """
+    层级节点的选择器索引
+
+    对 resourceId、text、description、className 建立 值 -> 节点列表 的哈希索引。
+    精确匹配直接取最小的桶再过滤，Contains/StartsWith/Matches 只扫描索引中的不同取值
+    """
+
+    def __init__(self, nodes: List[Any]):
+        """
+        初始化索引
+
+        Args:
+            nodes: 按文档先序排列的节点列表，节点需提供 get()/order/parent/children
+        """
+        self.nodes = nodes
+        self.indexes: Dict[str, Dict[str, List[Any]]] = {field: {} for field in INDEXED_FIELDS}
+        for node in nodes:
+            for field in INDEXED_FIELDS:
+                value = node.get(SELECTOR_ATTRIBUTES[field])
+                self.indexes[field].setdefault(value, []).append(node)
+
+    def _candidates(self, selector: Dict[str, Any]) -> Iterable[Any]:
+        """利用索引缩小候选节点范围"""
+        best = None
+        for key, expected in selector.items():
+            base, suffix = split_key(key)
+            if base not in self.indexes:
+                continue
+            index = self.indexes[base]
+            if not suffix:
+                bucket = index.get(str(expected), [])
+            else:
+                bucket = []
+                for value, nodes in index.items():
+                    if match_value(value, suffix, expected):
+                        bucket.extend(nodes)
+                bucket.sort(key=lambda n: n.order)
+            if best is None or len(bucket) < len(best):
+                best = bucket
+            if not best:
+                break
+        return self.nodes if best is None else best
+
+    def _select(self, selector: Dict[str, Any], scope: List[Any] = None) -> List[Any]:
+        """求值单层选择器（含 instance），scope 限定候选节点"""
+        if scope is None:
+            matches = [n for n in self._candidates(selector) if match_node(n, selector)]
+        else:
+            matches = [n for n in scope if match_node(n, selector)]
+        if "instance" in selector:
+            instance = int(selector["instance"])
+            return matches[instance:instance + 1]
+        return matches
+
+    def find_all(self, selector: Dict[str, Any]) -> List[Any]:
+        """
+        查找所有匹配的节点
+
+        支持的语法与 uiautomator 选择器一致，另外可用 child / sibling 字段嵌套选择器：
+        {"resourceId": "list", "child": {"text": "显示"}} 对应 d(resourceId="list").child(text="显示")，
+        同一层同时出现时先求 child 再求 sibling
+
+        Args:
+            selector: uiautomator 选择器字典
+
+        Returns:
+            按文档顺序排列的节点列表
+        """
+        return self._resolve(selector)
+
+    def _resolve(self, selector: Dict[str, Any], scope: List[Any] = None) -> List[Any]:
+        validate_selector(selector)
+        matches = self._select(selector, scope)
+        if "child" in selector:
+            related = {}
+            for node in matches:
+                for descendant in iter_descendants(node):
+                    related[descendant.order] = descendant
+            matches = self._resolve(selector["child"], [related[k] for k in sorted(related)])
+        if "sibling" in selector:
+            related = {}
+            for node in matches:
+                if node.parent is None:
+                    continue
+                for sibling in node.parent.children:
+                    if sibling is not node:
+                        related[sibling.order] = sibling
+            matches = self._resolve(selector["sibling"], [related[k] for k in sorted(related)])
+        return matches
+
+    def find(self, selector: Dict[str, Any]):
+        """查找第一个匹配的节点，不存在返回 None"""
+        matches = self.find_all(selector)
+        return matches[0] if matches else None
+
+
+def iter_descendants(node):
+    """先序遍历节点的所有后代"""
+    stack = list(reversed(node.children))
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(reversed(current.children))
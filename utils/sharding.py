@@ -0,0 +1,293 @@
+"""
+按历史耗时分片
+根据以往运行的用例耗时，用最长处理时间优先（LPT）装箱把用例分给各 xdist worker，
+并在会话结束时对比预测与实际的 makespan
+"""
+import os
+import json
+import heapq
+import logging
+import statistics
+from collections import defaultdict
+from typing import Optional, Dict, Any, List
+
+import pytest
+
+logger = logging.getLogger(__name__)
+
+# 分片使用的 xdist_group 名称前缀
+SHARD_PREFIX = "shard-"
+# 没有任何历史数据时的默认耗时估计（秒）
+DEFAULT_ESTIMATE = 1.0
+# 更新历史耗时时新数据的权重
+EWMA_ALPHA = 0.5
+
+
+def strip_group(nodeid: str) -> str:
+    """
+    去掉 loadgroup 模式下追加在 nodeid 末尾的 @group 后缀
+
+    Args:
+        nodeid: 用例 nodeid
+
+    Returns:
+        原始 nodeid
+    """
+    if nodeid.rfind("@") > nodeid.rfind("]"):
+        return nodeid.rsplit("@", 1)[0]
+    return nodeid
+
+
+def load_durations(db_path: str, report_path: Optional[str] = None) -> Dict[str, float]:
+    """
+    读取历史耗时
+
+    优先使用耗时库中的平滑值，库中没有的用例再从 pytest-json-report 的报告中补充
+
+    Args:
+        db_path: 耗时库文件路径
+        report_path: reports/report.json 路径
+
+    Returns:
+        nodeid -> 耗时（秒）
+    """
+    durations: Dict[str, float] = {}
+    if report_path and os.path.exists(report_path):
+        try:
+            with open(report_path, encoding="utf-8") as f:
+                report = json.load(f)
+            for test in report.get("tests", []):
+                total = sum(
+                    test.get(phase, {}).get("duration", 0.0) for phase in ("setup", "call", "teardown")
+                )
+                durations[strip_group(test["nodeid"])] = total
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"读取测试报告耗时失败: {e}")
+    if os.path.exists(db_path):
+        try:
+            with open(db_path, encoding="utf-8") as f:
+                durations.update({nodeid: entry["mean"] for nodeid, entry in json.load(f).items()})
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"耗时库损坏，已忽略: {e}")
+    return durations
+
+
+def update_duration_db(db_path: str, observed: Dict[str, float], alpha: float = EWMA_ALPHA):
+    """
+    用本次运行的耗时更新耗时库（指数加权平均）
+
+    Args:
+        db_path: 耗时库文件路径
+        observed: nodeid -> 本次耗时（秒）
+        alpha: 新数据的权重
+    """
+    db: Dict[str, Dict[str, Any]] = {}
+    if os.path.exists(db_path):
+        try:
+            with open(db_path, encoding="utf-8") as f:
+                db = json.load(f)
+        except (OSError, ValueError):
+            db = {}
+    for nodeid, seconds in observed.items():
+        entry = db.get(nodeid)
+        if entry is None:
+            db[nodeid] = {"mean": round(seconds, 4), "runs": 1}
+        else:
+            entry["mean"] = round(alpha * seconds + (1 - alpha) * entry["mean"], 4)
+            entry["runs"] += 1
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    tmp_file = db_path + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(db, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_file, db_path)
+
+
+def estimate(nodeids: List[str], durations: Dict[str, float]) -> Dict[str, float]:
+    """
+    估计每个用例的耗时
+
+    没有历史数据的用例依次使用同模块已知用例的平均值、全部已知用例的中位数、DEFAULT_ESTIMATE
+
+    Args:
+        nodeids: 用例 nodeid 列表
+        durations: 历史耗时
+
+    Returns:
+        nodeid -> 估计耗时（秒）
+    """
+    by_module: Dict[str, List[float]] = defaultdict(list)
+    for nodeid, seconds in durations.items():
+        by_module[nodeid.split("::", 1)[0]].append(seconds)
+    fallback = statistics.median(durations.values()) if durations else DEFAULT_ESTIMATE
+
+    estimates = {}
+    for nodeid in nodeids:
+        if nodeid in durations:
+            estimates[nodeid] = durations[nodeid]
+        else:
+            known = by_module.get(nodeid.split("::", 1)[0])
+            estimates[nodeid] = sum(known) / len(known) if known else fallback
+    return estimates
+
+
+def lpt_partition(weights: Dict[str, float], bins: int) -> List[List[str]]:
+    """
+    最长处理时间优先装箱
+
+    按耗时从大到小依次放入当前总耗时最小的分片，makespan 不超过最优解的 4/3
+
+    Args:
+        weights: 用例 -> 耗时
+        bins: 分片数
+
+    Returns:
+        每个分片的用例列表
+    """
+    bins = max(1, bins)
+    shards: List[List[str]] = [[] for _ in range(bins)]
+    heap = [(0.0, i) for i in range(bins)]
+    # 耗时相同时按 nodeid 排序，保证每个 worker 算出相同的分片
+    for nodeid in sorted(weights, key=lambda n: (-weights[n], n)):
+        load, i = heapq.heappop(heap)
+        shards[i].append(nodeid)
+        heapq.heappush(heap, (load + weights[nodeid], i))
+    return shards
+
+
+class DurationSharding:
+    """
+    按历史耗时分片的 pytest 插件
+
+    需要配合 ``-n N --dist loadgroup`` 使用：每个 worker 独立收集用例并算出相同的 N 个分片，
+    通过 xdist_group 标记让每个分片整体交给一个 worker。
+    无论是否分片，主进程都会在会话结束时把本次耗时写入耗时库；
+    给出 device_fixture 时只有至少一个用例实际用到设备的会话才写入，纯单元测试的运行不产生文件
+    """
+
+    # 用例用到设备时写入报告 user_properties 的键，随报告从 xdist worker 传回主进程
+    DEVICE_PROPERTY = "uses_device"
+
+    def __init__(
+        self,
+        config,
+        db_path: str,
+        report_path: Optional[str] = None,
+        enabled: bool = False,
+        device_fixture: Optional[str] = None
+    ):
+        """
+        初始化插件
+
+        Args:
+            config: pytest config 对象
+            db_path: 耗时库文件路径
+            report_path: 以往运行的 pytest-json-report 报告路径
+            enabled: 是否分片
+            device_fixture: 提供设备的 fixture 名称，None 表示每次运行都写入耗时库
+        """
+        self.config = config
+        self.db_path = db_path
+        self.report_path = report_path
+        self.enabled = enabled
+        self.device_fixture = device_fixture
+        self.used_device = device_fixture is None
+        self.plan: Dict[str, float] = {}
+        self.observed: Dict[str, float] = defaultdict(float)
+        self.actual: Dict[str, float] = defaultdict(float)
+
+    @property
+    def is_worker(self) -> bool:
+        return hasattr(self.config, "workerinput")
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_collection_modifyitems(self, config, items):
+        """worker 在 xdist 追加分组后缀之前为用例打上分片标记"""
+        if not self.enabled:
+            return
+        workers = int(os.getenv("PYTEST_XDIST_WORKER_COUNT", "0"))
+        # xdist 在 worker 中把 dist 重置为 no，loadgroup 模式记录在 option.loadgroup
+        if workers < 2 or not getattr(config.option, "loadgroup", False):
+            return
+
+        free = [item for item in items if item.get_closest_marker("xdist_group") is None]
+        estimates = estimate([item.nodeid for item in free], load_durations(self.db_path, self.report_path))
+        by_nodeid = {item.nodeid: item for item in free}
+        self.plan = {}
+        for i, shard in enumerate(lpt_partition(estimates, workers)):
+            name = f"{SHARD_PREFIX}{i}"
+            self.plan[name] = round(sum(estimates[nodeid] for nodeid in shard), 3)
+            for nodeid in shard:
+                by_nodeid[nodeid].add_marker(pytest.mark.xdist_group(name=name))
+        logger.info(f"按历史耗时分为 {workers} 片，预测耗时: {self.plan}")
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        """标记执行到用例体且用到设备的用例（设备 fixture 中跳过的不算）"""
+        outcome = yield
+        report = outcome.get_result()
+        if report.when == "call" and self.device_fixture in getattr(item, "fixturenames", ()):
+            report.user_properties.append((self.DEVICE_PROPERTY, True))
+
+    def pytest_runtest_logreport(self, report):
+        """主进程累计每个用例和每个分片的实际耗时"""
+        if self.is_worker:
+            return
+        if dict(report.user_properties).get(self.DEVICE_PROPERTY):
+            self.used_device = True
+        self.observed[strip_group(report.nodeid)] += report.duration
+        group = report.nodeid[len(strip_group(report.nodeid)) + 1:]
+        worker = getattr(getattr(report, "node", None), "gateway", None)
+        key = group if group.startswith(SHARD_PREFIX) else (worker.id if worker else "master")
+        self.actual[key] += report.duration
+
+    def pytest_sessionfinish(self, session):
+        if self.is_worker:
+            if self.plan:
+                session.config.workeroutput["shard_plan"] = self.plan
+            return
+        if self.observed and self.used_device:
+            try:
+                update_duration_db(self.db_path, self.observed)
+            except OSError as e:
+                logger.warning(f"写入耗时库失败: {e}")
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        plan = getattr(node, "workeroutput", {}).get("shard_plan")
+        if plan:
+            self.plan = plan
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        预测与实际 makespan
+
+        Returns:
+            包含 predicted_makespan、actual_makespan 以及各分片耗时的字典
+        """
+        shards = {
+            name: {"predicted": self.plan.get(name), "actual": round(self.actual.get(name, 0.0), 3)}
+            for name in sorted(set(self.plan) | set(self.actual))
+        }
+        return {
+            "enabled": bool(self.plan),
+            "predicted_makespan": max(self.plan.values()) if self.plan else None,
+            "actual_makespan": round(max(self.actual.values()), 3) if self.actual else 0.0,
+            "shards": shards,
+        }
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.is_worker or not self.plan:
+            return
+        summary = self.summary()
+        terminalreporter.section("按耗时分片")
+        for name, shard in summary["shards"].items():
+            terminalreporter.write_line(
+                f"{name}: 预测 {shard['predicted'] or 0:.1f}秒, 实际 {shard['actual']:.1f}秒"
+            )
+        terminalreporter.write_line(
+            f"makespan: 预测 {summary['predicted_makespan']:.1f}秒, 实际 {summary['actual_makespan']:.1f}秒"
+        )
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_json_modifyreport(self, json_report):
+        json_report["sharding"] = self.summary()
@@ -0,0 +1,168 @@
+"""
+批量 shell 命令
+把多条命令拼成一个设备端脚本，一次 shell 调用执行，再按唯一分隔符切分出每条命令的输出和退出码
+"""
+import uuid
+import logging
+from typing import Optional, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+# 单次 shell 调用的脚本长度上限，超过时拆成多次调用
+MAX_SCRIPT_LENGTH = 32 * 1024
+
+
+class ShellResult:
+    """单条命令的执行结果"""
+
+    def __init__(self, command: str, output: str, exit_code: Optional[int]):
+        """
+        初始化执行结果
+
+        Args:
+            command: 命令
+            output: 标准输出和标准错误
+            exit_code: 退出码，命令未执行完（如整体超时）时为 None
+        """
+        self.command = command
+        self.output = output
+        self.exit_code = exit_code
+
+    @property
+    def ok(self) -> bool:
+        return self.exit_code == 0
+
+    def __iter__(self):
+        return iter((self.output, self.exit_code))
+
+    def __repr__(self) -> str:
+        return f"ShellResult(command={self.command!r}, exit_code={self.exit_code})"
+
+
+def build_script(commands: Sequence[str], token: str, start: int = 0) -> str:
+    """
+    生成批量执行脚本
+
+    每条命令在子 shell 中执行，前后输出 token:begin:i 和 token:end:i:退出码 标记；
+    结束标记前额外输出一个换行，保证没有换行结尾的输出也不会与标记粘在一行
+
+    Args:
+        commands: 命令列表
+        token: 分隔标记，必须不会出现在命令输出中
+        start: 第一条命令的编号
+
+    Returns:
+        sh 脚本
+    """
+    parts = []
+    for i, command in enumerate(commands, start):
+        parts.append(
+            f"echo '{token}:begin:{i}'; ( {command}\n) 2>&1; "
+            f"__rc=$?; echo; echo '{token}:end:{i}:'$__rc"
+        )
+    return "\n".join(parts)
+
+
+def parse_output(output: str, token: str, commands: Sequence[str], start: int = 0) -> List[ShellResult]:
+    """
+    按分隔标记切分批量脚本的输出
+
+    Args:
+        output: 脚本的完整输出
+        token: build_script 使用的分隔标记
+        commands: 命令列表
+        start: 第一条命令的编号
+
+    Returns:
+        与 commands 一一对应的 ShellResult 列表
+    """
+    begin_prefix = f"{token}:begin:"
+    end_prefix = f"{token}:end:"
+    outputs = {}
+    exit_codes = {}
+    current = None
+    lines: List[str] = []
+
+    for line in output.splitlines(keepends=True):
+        stripped = line.rstrip("\r\n")
+        if stripped.startswith(begin_prefix):
+            current = int(stripped[len(begin_prefix):])
+            lines = []
+        elif stripped.startswith(end_prefix) and current is not None:
+            _, _, code = stripped[len(end_prefix):].partition(":")
+            text = "".join(lines)
+            # 去掉结束标记前额外输出的换行
+            for newline in ("\r\n", "\n"):
+                if text.endswith(newline):
+                    text = text[:-len(newline)]
+                    break
+            outputs[current] = text
+            exit_codes[current] = int(code) if code.lstrip("-").isdigit() else None
+            current = None
+        elif current is not None:
+            lines.append(line)
+
+    # 没有结束标记的命令（如脚本被超时终止）保留已有输出
+    if current is not None and current not in outputs:
+        outputs[current] = "".join(lines)
+
+    return [
+        ShellResult(command, outputs.get(i, ""), exit_codes.get(i))
+        for i, command in enumerate(commands, start)
+    ]
+
+
+def chunk_commands(commands: Sequence[str], max_length: int = MAX_SCRIPT_LENGTH) -> List[List[str]]:
+    """
+    按脚本长度上限把命令分组
+
+    Args:
+        commands: 命令列表
+        max_length: 单个脚本的长度上限
+
+    Returns:
+        命令分组，单条超长命令单独成组
+    """
+    chunks: List[List[str]] = []
+    size = 0
+    for command in commands:
+        # 每条命令的标记和包装约 120 个字符
+        cost = len(command) + 120
+        if chunks and size + cost <= max_length:
+            chunks[-1].append(command)
+            size += cost
+        else:
+            chunks.append([command])
+            size = cost
+    return chunks
+
+
+def run_batch(
+    device,
+    commands: Sequence[str],
+    timeout: int = 60,
+    max_length: int = MAX_SCRIPT_LENGTH
+) -> List[ShellResult]:
+    """
+    在设备上批量执行命令
+
+    Args:
+        device: uiautomator2 设备对象
+        commands: 命令列表
+        timeout: 每次 shell 调用的超时时间（秒）
+        max_length: 单个脚本的长度上限
+
+    Returns:
+        与 commands 一一对应的 ShellResult 列表
+    """
+    results: List[ShellResult] = []
+    token = f"__batch_{uuid.uuid4().hex}__"
+    for chunk in chunk_commands(commands, max_length):
+        start = len(results)
+        response = device.shell(build_script(chunk, token, start), timeout=timeout)
+        chunk_results = parse_output(response.output, token, chunk, start)
+        missing = [r.command for r in chunk_results if r.exit_code is None]
+        if missing:
+            logger.warning(f"批量 shell 中 {len(missing)} 条命令未执行完: {missing}")
+        results.extend(chunk_results)
+    return results
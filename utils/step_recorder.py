@@ -0,0 +1,276 @@
+"""
+失败步骤回放
+用例执行期间在内存环形缓冲区中保留最近 N 帧缩小并压缩过的截图，
+只有用例失败时才写盘（动画 WebP 或图片序列），通过的用例没有文件 I/O
+"""
+import io
+import os
+import re
+import time
+import logging
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+# 动画 WebP 中每帧显示时长的范围（毫秒），按实际间隔取值
+MIN_FRAME_DURATION = 200
+MAX_FRAME_DURATION = 2000
+
+
+class StepFrame:
+    """缓冲区中的一帧"""
+
+    __slots__ = ("index", "timestamp", "label", "data", "size")
+
+    def __init__(self, index: int, timestamp: float, label: str, data: bytes, size: tuple):
+        self.index = index
+        self.timestamp = timestamp
+        self.label = label
+        self.data = data
+        self.size = size
+
+
+class StepRecorder:
+    """
+    截图环形缓冲区
+
+    capture() 只登记一次截图请求，由后台线程抓取、缩小并编码为 JPEG 存入缓冲区；
+    后台线程忙时新的请求替换尚未处理的请求，测试线程不会等待截图 RPC
+    """
+
+    def __init__(self, device, frames: int = 10, max_size: int = 480, quality: int = 70):
+        """
+        初始化录制器
+
+        Args:
+            device: uiautomator2 设备对象
+            frames: 缓冲区保留的帧数
+            max_size: 缩小后图像最长边（像素）
+            quality: 内存中 JPEG 编码质量 (1-95)
+        """
+        self.device = device
+        self.max_size = max(16, max_size)
+        self.quality = quality
+        self._frames = deque(maxlen=max(1, frames))
+        self._cond = threading.Condition()
+        self._pending: Optional[str] = None
+        self._busy = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._index = 0
+        self.stats = {"requested": 0, "captured": 0, "coalesced": 0, "failed": 0}
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._closed = False
+            self._thread = threading.Thread(target=self._run, name="step-recorder", daemon=True)
+            self._thread.start()
+
+    def start(self):
+        """启动后台抓图线程"""
+        with self._cond:
+            self._ensure_thread()
+
+    def capture(self, label: str = ""):
+        """
+        登记一次截图请求，立即返回
+
+        Args:
+            label: 帧标签，写盘时出现在文件名中
+        """
+        with self._cond:
+            self.stats["requested"] += 1
+            if self._pending is not None:
+                self.stats["coalesced"] += 1
+            self._pending = label
+            self._ensure_thread()
+            self._cond.notify_all()
+
+    def capture_now(self, label: str = "") -> Optional[StepFrame]:
+        """
+        在当前线程同步抓取一帧
+
+        Args:
+            label: 帧标签
+
+        Returns:
+            新的帧，抓取失败时返回 None
+        """
+        with self._cond:
+            self.stats["requested"] += 1
+        return self._grab(label)
+
+    def _encode(self, image) -> tuple:
+        image = image.convert("RGB")
+        image.thumbnail((self.max_size, self.max_size))
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=self.quality)
+        return buffer.getvalue(), image.size
+
+    def _grab(self, label: str) -> Optional[StepFrame]:
+        try:
+            timestamp = time.time()
+            data, size = self._encode(self.device.screenshot())
+        except Exception as e:
+            logger.debug(f"步骤截图失败: {e}")
+            with self._cond:
+                self.stats["failed"] += 1
+            return None
+        with self._cond:
+            frame = StepFrame(self._index, timestamp, label, data, size)
+            self._index += 1
+            self._frames.append(frame)
+            self.stats["captured"] += 1
+        return frame
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                label, self._pending = self._pending, None
+                self._busy = True
+            self._grab(label)
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待已登记的截图请求处理完
+
+        Args:
+            timeout: 最长等待秒数，None 表示一直等待
+
+        Returns:
+            True 如果全部处理完成
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending is not None or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout: Optional[float] = 10.0):
+        """
+        处理完剩余请求并停止后台线程
+
+        Args:
+            timeout: 最长等待秒数
+        """
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._closed = True
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+
+    @property
+    def frames(self) -> List[StepFrame]:
+        """缓冲区中的帧，按时间先后排列"""
+        with self._cond:
+            return list(self._frames)
+
+    def memory_bytes(self) -> int:
+        """缓冲区中编码后图像占用的字节数"""
+        return sum(len(frame.data) for frame in self.frames)
+
+    def clear(self):
+        """清空缓冲区"""
+        with self._cond:
+            self._frames.clear()
+
+    def dump(self, directory: str, image_format: str = "webp") -> List[str]:
+        """
+        把缓冲区写盘
+
+        Args:
+            directory: 目标目录
+            image_format: webp 写一个动画 WebP，frames 写 JPEG 图片序列；
+                Pillow 不支持动画 WebP 时退回图片序列
+
+        Returns:
+            写入的文件路径列表，缓冲区为空时为空列表
+        """
+        frames = self.frames
+        if not frames:
+            return []
+        os.makedirs(directory, exist_ok=True)
+        if image_format == "webp":
+            path = os.path.join(directory, "steps.webp")
+            try:
+                self._save_animation(frames, path)
+                return [path]
+            except Exception as e:
+                logger.warning(f"写入动画 WebP 失败，改为图片序列: {e}")
+        paths = []
+        for frame in frames:
+            label = re.sub(r"[^\w.-]", "_", frame.label)
+            name = f"{frame.index:03d}_{label}.jpg" if label else f"{frame.index:03d}.jpg"
+            path = os.path.join(directory, name)
+            # 内存中已是 JPEG，直接写出不再重新编码
+            with open(path, "wb") as f:
+                f.write(frame.data)
+            paths.append(path)
+        return paths
+
+    @staticmethod
+    def _save_animation(frames: List[StepFrame], path: str):
+        from PIL import Image
+
+        images = [Image.open(io.BytesIO(frame.data)) for frame in frames]
+        # 帧尺寸可能因旋转而不同，统一到第一帧的画布
+        canvas = images[0].size
+        images = [image if image.size == canvas else image.resize(canvas) for image in images]
+        durations = []
+        for current, following in zip(frames, frames[1:]):
+            gap = int((following.timestamp - current.timestamp) * 1000)
+            durations.append(min(MAX_FRAME_DURATION, max(MIN_FRAME_DURATION, gap)))
+        durations.append(MAX_FRAME_DURATION)
+        images[0].save(
+            path, "WEBP", save_all=True, append_images=images[1:],
+            duration=durations, loop=0, quality=80,
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """返回请求、抓取、合并、失败的截图计数以及缓冲区帧数和字节数"""
+        with self._cond:
+            frames = list(self._frames)
+            stats = dict(self.stats)
+        stats.update(frames=len(frames), bytes=sum(len(frame.data) for frame in frames))
+        return stats
+
+
+_active: Optional[StepRecorder] = None
+
+
+def get_active_recorder() -> Optional[StepRecorder]:
+    """
+    获取当前用例的录制器
+
+    Returns:
+        StepRecorder 对象，未启用时返回 None
+    """
+    return _active
+
+
+def set_active_recorder(recorder: Optional[StepRecorder]) -> Optional[StepRecorder]:
+    """
+    设置当前用例的录制器
+
+    Args:
+        recorder: StepRecorder 对象，None 表示停止录制
+
+    Returns:
+        之前的录制器
+    """
+    global _active
+    previous, _active = _active, recorder
+    return previous